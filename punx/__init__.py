@@ -8,6 +8,7 @@ Python Utilities for NeXus HDF5 files
    ~FileNotFound
    ~HDF5_Open_Error
    ~SchemaNotFound
+   ~ValidationTimeout
 
 """
 
@@ -65,6 +66,10 @@ class CannotUpdateFromGithubNow(IOError):
     """custom exception"""
 
 
+class ValidationTimeout(RuntimeError):
+    """custom exception"""
+
+
 # fmt: off
 
 try:
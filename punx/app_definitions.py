@@ -0,0 +1,316 @@
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2023, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+requirements of an application definition, compiled once from its NXDL file
+
+A :class:`Requirement` tree has one node for each group, field,
+attribute, and link of the definition: its NeXus class (groups), its
+name (or none: any group of that class), how many times it may occur,
+and the values allowed (enumerations, as a ``frozenset``).
+The tree of each definition is compiled once for each
+:class:`~punx.nxdl_manager.NXDL_Manager`
+(see :meth:`~punx.nxdl_manager.NXDL_Manager.requirement_tree`)
+and matched against a data file by
+:mod:`~punx.validations.application_definition`.
+
+To find the definitions an entry would satisfy (such as an entry with
+no ``definition`` field, or a wrong one), the :class:`DefinitionIndex`
+inverts the required class paths of all application definitions of a
+file set: each class path found in the entry is one lookup.
+
+A definition that ``extends`` another application (or contributed)
+definition, such as ``NXxlaue`` (``extends="NXxrot"``), also has the
+requirements of that one (compiled first): each member of both is
+merged, the extending definition's own occurrences and values first.
+
+Occurrences follow the NXDL rules of application definitions: a group
+or field is required (``minOccurs=1``) unless its ``minOccurs`` is
+``0`` or it is ``optional`` or ``recommended``.  In other definitions
+(such as contributed definitions) groups and fields are optional unless
+``minOccurs`` says otherwise.  An attribute is required only if it is
+``optional="false"`` (as ``nxdl.xsd`` says: optional by default).
+
+.. autosummary::
+
+   ~Requirement
+   ~DefinitionIndex
+   ~compile_definition
+   ~merge
+   ~required_classpaths
+
+"""
+
+import collections
+import copy
+
+import lxml.etree
+
+from . import nxdl_schema
+from . import utils
+
+DEFINITION_CLASSPATH = "/NXentry/definition"  # names the definition, not required
+KINDS = ("group", "field", "attribute", "link")
+UNBOUNDED = None  # maxOccurs="unbounded"
+logger = utils.setup_logger(__name__)
+
+
+class Requirement(object):
+    """
+    one member (group, field, attribute, or link) of an application definition
+
+    kind str:
+        one of ``KINDS`` (or ``"definition"``, the root of the tree)
+    name str:
+        name of the member, ``None`` for a group named only by its class
+    nx_class str:
+        NeXus class of a group
+    nxdl_path str:
+        NXDL path of the member, such as ``/NXentry/NXdata/Q@units``
+    min_occurs int:
+        times the member must occur (``0``: optional)
+    max_occurs int:
+        most times the member may occur (``UNBOUNDED``: no limit)
+    recommended bool:
+        optional, but should occur
+    flexible bool:
+        the name of a field may be any name (``nameType="any"``)
+    enumerations frozenset:
+        values allowed (as text), ``None``: any value
+    target str:
+        NXDL path of the target of a link
+    groups, fields, attributes, links [obj]:
+        :class:`Requirement` of each member of a group (or field:
+        attributes only)
+    """
+
+    def __init__(self, kind, name=None, nxdl_path=""):
+        self.kind = kind
+        self.name = name
+        self.nx_class = None
+        self.nxdl_path = nxdl_path
+        self.min_occurs = 0
+        self.max_occurs = 1
+        self.recommended = False
+        self.flexible = False
+        self.enumerations = None
+        self.target = None
+        self.groups = ()
+        self.fields = ()
+        self.attributes = ()
+        self.links = ()
+
+    def __str__(self, *args, **kwargs):
+        occurs = "unbounded" if self.max_occurs is UNBOUNDED else self.max_occurs
+        return (
+            f"Requirement({self.kind}, {self.nxdl_path},"
+            f" occurs={self.min_occurs}..{occurs})"
+        )
+
+    @property
+    def required(self):
+        """Must this member occur?"""
+        return self.min_occurs > 0
+
+    def walk(self):
+        """Yield this requirement and all below it (parents first)."""
+        yield self
+        for member in self.groups + self.fields + self.attributes + self.links:
+            yield from member.walk()
+
+
+def compile_definition(definition):
+    """
+    Return the :class:`Requirement` tree of NXDL *definition*.
+
+    *definition* is an :class:`~punx.nxdl_manager.NXDL__definition`.
+    Its NXDL file is read again: the occurrences and the type of each
+    group are not kept in the parsed definition.
+    """
+    ns = nxdl_schema.get_xml_namespace_dictionary()
+    root = lxml.etree.parse(definition.file_name).getroot()
+    in_application = definition.category == "applications"
+    tree = Requirement("definition", definition.title)
+    _compile_members(tree, root, ns, in_application)
+
+    manager = definition.nxdl_manager
+    extends = manager.classes.get(root.attrib.get("extends"))
+    if extends is not None and extends.category != "base_classes":
+        if extends.title == definition.title:
+            raise ValueError(f"{definition.title} extends itself")
+        tree = merge(manager.requirement_tree(extends.title), tree)
+    logger.debug(
+        "%s: %d requirements", definition.title, len(list(tree.walk())) - 1
+    )
+    return tree
+
+
+def _compile_members(parent, node, ns, in_application):
+    """Compile the members of (group or field) *node* into *parent*."""
+    members = {kind: [] for kind in KINDS}
+    for kind in KINDS:
+        if parent.kind == "field" and kind != "attribute":
+            continue
+        for child in node.xpath(f"nx:{kind}", namespaces=ns):
+            members[kind].append(_compile(parent, kind, child, ns, in_application))
+    parent.groups = tuple(members["group"])
+    parent.fields = tuple(members["field"])
+    parent.attributes = tuple(members["attribute"])
+    parent.links = tuple(members["link"])
+
+
+def _compile(parent, kind, node, ns, in_application):
+    """Compile one member *node* of *parent*."""
+    attrib = node.attrib
+    name = attrib.get("name")
+    if kind == "group":
+        label = "/" + attrib["type"]  # NXDL path: the class, not the name
+    elif kind == "attribute":
+        label = "@" + name
+    else:
+        label = "/" + name
+    req = Requirement(kind, name, parent.nxdl_path + label)
+    if kind == "group":
+        req.nx_class = attrib["type"]
+
+    optional = (
+        attrib.get("optional") == "true"
+        or attrib.get("recommended") == "true"
+        or attrib.get("required") == "false"
+    )
+    req.recommended = attrib.get("recommended") == "true"
+    if kind == "attribute":
+        req.min_occurs = int(attrib.get("optional") == "false")
+    elif kind == "link":
+        req.min_occurs = int(in_application)
+    else:
+        default = int(in_application and not optional)
+        req.min_occurs = int(attrib.get("minOccurs", default))
+        # nxdl.xsd: a field occurs once, a group any number of times
+        max_occurs = attrib.get("maxOccurs", "1" if kind == "field" else "unbounded")
+        req.max_occurs = UNBOUNDED if max_occurs == "unbounded" else int(max_occurs)
+    req.flexible = attrib.get("nameType") == "any"
+    req.target = attrib.get("target")
+
+    items = node.xpath("nx:enumeration/nx:item", namespaces=ns)
+    if len(items) > 0:
+        req.enumerations = frozenset(
+            item.attrib["value"] for item in items if "value" in item.attrib
+        )
+    if kind in ("group", "field"):
+        _compile_members(req, node, ns, in_application)
+    return req
+
+
+def merge(base, req):
+    """
+    Return requirement *req* with the members of *base* it does not have.
+
+    Members of both (same kind and name, or NeXus class of a group
+    named only by its class) are merged: the occurrences and values
+    of *req*, the members of both.  A group of *base* named only by its
+    class is also merged with the one group of that class *req* names
+    (such as ``NXdata`` of ``NXxbase`` and ``name`` of ``NXxrot``).
+    Neither tree is changed.
+    """
+    merged = copy.copy(req)
+    for kind in ("groups", "fields", "attributes", "links"):
+        own = {_member_key(m): m for m in getattr(req, kind)}
+        inherited = getattr(base, kind)
+        keys = set(_member_key(m) for m in inherited)
+        members = []
+        for member in inherited:
+            key = _member_key(member)
+            if key not in own and member.kind == "group" and member.name is None:
+                named = [
+                    k for k in own if k[2] == member.nx_class and k not in keys
+                ]
+                if len(named) == 1:
+                    key = named[0]
+            members.append(member if key not in own else merge(member, own.pop(key)))
+        members += list(own.values())
+        setattr(merged, kind, tuple(members))
+    return merged
+
+
+def _member_key(req):
+    """what identifies member *req* in its parent (for :func:`merge`)"""
+    return req.kind, req.name, req.nx_class
+
+
+def required_classpaths(tree):
+    """
+    Return the class paths required in an ``NXentry`` by *tree* (a frozenset).
+
+    Only members required all the way up to the entry, with a fixed name
+    (or a group class), are used.  Same form as
+    :attr:`~punx.validate.Data_File_Validator.classpaths`, such as
+    ``/NXentry/NXdata/Q`` or ``/NXentry/NXdata@signal``.
+    """
+
+    def walk(req):
+        for member in req.groups + req.fields + req.attributes + req.links:
+            if member.required and not member.flexible:
+                yield member.nxdl_path
+                yield from walk(member)
+
+    classpaths = set()
+    for entry in tree.groups:
+        if entry.nx_class == "NXentry":
+            classpaths.update(walk(entry))
+    classpaths.discard(DEFINITION_CLASSPATH)
+    return frozenset(classpaths)
+
+
+class DefinitionIndex(object):
+    """
+    application definitions of a file set, by the class paths they require
+
+    Built once for each :class:`~punx.nxdl_manager.NXDL_Manager`
+    (see :meth:`~punx.nxdl_manager.NXDL_Manager.definition_index`).
+
+    required dict:
+        required class paths (frozenset), by definition name
+    definitions dict:
+        names of the definitions that require it, by class path
+    """
+
+    def __init__(self, manager):
+        self.required = {}
+        self.definitions = {}
+        for name, definition in manager.classes.items():
+            if definition.category != "applications":
+                continue
+            classpaths = required_classpaths(manager.requirement_tree(name))
+            if len(classpaths) == 0:
+                continue
+            self.required[name] = classpaths
+            for classpath in classpaths:
+                self.definitions.setdefault(classpath, []).append(name)
+        logger.debug(
+            "%d application definitions, %d required class paths",
+            len(self.required),
+            len(self.definitions),
+        )
+
+    def rank(self, classpaths):
+        """
+        Rank the definitions by their required *classpaths* found.
+
+        Returns a list of ``(name, found, required)``, best first:
+        the largest part of its required class paths found, then the
+        most found.  Definitions with none found are not listed.
+        """
+        found = collections.Counter(
+            name for cp in set(classpaths) for name in self.definitions.get(cp, [])
+        )
+        ranking = [(name, n, len(self.required[name])) for name, n in found.items()]
+        ranking.sort(key=lambda r: (-r[1] / r[2], -r[1], r[0]))
+        return ranking
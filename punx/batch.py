@@ -0,0 +1,497 @@
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2023, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+validate many NeXus data files with one shared NXDL manager
+
+The NXDL manager (the parsed NXDL file set) is built once, in the parent
+process.  Where the operating system supports it, worker processes are
+*forked* from the parent so they share the manager's memory pages
+(copy-on-write) rather than each parsing the NXDL files again.
+
+USAGE::
+
+    from punx import batch
+
+    for result in batch.validate_files(["data/", "scans/*.nxs"], workers=4):
+        print(result.fname, result.summary)
+
+.. autosummary::
+
+   ~expand_paths
+   ~validate_files
+   ~summary_table
+   ~FileResult
+
+"""
+
+import collections
+import glob
+import h5py
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+
+import pyRestTable
+
+from . import FileNotFound, HDF5_Open_Error, ValidationTimeout
+from . import catalog
+from . import finding
+from . import nxdl_manager
+from . import profiling
+from . import utils
+from . import validate
+
+GLOB_CHARACTERS = "*?["
+logger = utils.setup_logger(__name__)
+
+TIMEOUT_GRACE = 1.0  # s, after the timeout of a worker, before it is stopped
+_worker_config = None  # the WorkerConfig of this worker process
+
+
+class WorkerConfig(object):
+    """
+    settings to validate each file of one call of :func:`validate_files`
+
+    Given to each worker process once (the pool *initializer*).
+    A (spawned) worker loads its own NXDL manager: the manager is not
+    pickled, only the name of its file set.
+
+    manager obj:
+        :class:`~punx.nxdl_manager.NXDL_Manager` shared by all files
+    file_set_name str:
+        name of the NXDL file set of *manager*
+    timeout float:
+        maximum time (s) allowed to validate any one file (or ``None``)
+    results_cache obj:
+        :class:`~punx.results_cache.ResultsCache` (or ``None``)
+    options dict:
+        keyword arguments of :class:`~punx.validate.Data_File_Validator`
+    time_budget float:
+        time (s) to validate each file, then a partial validation
+    profile bool:
+        measure the time of each phase and rule
+    """
+
+    def __init__(
+        self,
+        manager,
+        timeout=None,
+        results_cache=None,
+        options=None,
+        time_budget=None,
+        profile=False,
+    ):
+        self.manager = manager
+        self.file_set_name = manager.nxdl_file_set.ref
+        self.timeout = timeout
+        self.results_cache = results_cache
+        self.options = dict(options or {})
+        self.time_budget = time_budget
+        self.profile = profile
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["manager"] = None  # loaded again by the worker
+        return state
+
+
+class FileResult(object):
+    """
+    validation result of one file in a batch
+
+    index int:
+        position of this file in the list of files to be validated
+    fname str:
+        name of the data file
+    findings [obj]:
+        list of :class:`~punx.finding.Finding` objects
+    filtered dict:
+        count of findings not kept (statuses not reported), by status
+    classpaths dict:
+        NeXus class path of the item of each finding, by HDF5 address
+    summary dict:
+        count of findings, by status (see
+        :meth:`~punx.validate.Data_File_Validator.finding_summary`)
+    score tuple:
+        (total, count, average) as from
+        :meth:`~punx.validate.Data_File_Validator.finding_score`
+    error str:
+        description of the reason validation did not complete, or ``None``
+    elapsed float:
+        time (s) to validate this file
+    stopped bool:
+        ``True`` if validation stopped at the first ERROR (``fail_fast``)
+    uncovered dict:
+        phases (and subtrees) not covered when the time budget ran out
+    profile dict:
+        time of each phase and rule (see
+        :meth:`~punx.profiling.Profiler.to_dict`), if profiled
+    """
+
+    def __init__(self, index, fname):
+        self.index = index
+        self.fname = fname
+        self.findings = []
+        self.filtered = {}
+        self.classpaths = {}
+        self.summary = collections.OrderedDict()
+        self.score = (0, 0, 0)
+        self.error = None
+        self.elapsed = 0
+        self.stopped = False
+        self.uncovered = {}
+        self.profile = None
+
+    def __str__(self, *args, **kwargs):
+        if self.error is not None:
+            return f"FileResult({self.fname}, error={self.error})"
+        return f"FileResult({self.fname}, findings={len(self.findings)})"
+
+    @property
+    def ok(self):
+        """``True`` if validation completed"""
+        return self.error is None
+
+    def collect(self, validator):
+        """Keep the findings (and counts) of a finished *validator*."""
+        self.findings = list(validator.validations)
+        self.filtered = dict(validator.filtered)
+        self.classpaths = validator.finding_classpaths()
+        self.stopped = validator.stopped
+        self.uncovered = dict(validator.uncovered)
+        self.summary = validator.finding_summary()
+        self.score = validator.finding_score()
+        if validator.profiler is not None:
+            self.profile = validator.profiler.to_dict()
+
+
+def expand_paths(paths):
+    """
+    Return a sorted list of HDF5 files named by *paths*.
+
+    Each item of *paths* may be a file name, a directory (searched
+    recursively for HDF5 files), or a glob pattern (``**`` is allowed).
+    A file named directly is kept even if it is not HDF5 so that
+    the validation reports the problem.  Duplicates are removed.
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+
+    def hdf5_files_in(directory):
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in sorted(files):
+                full_name = os.path.join(root, name)
+                if _is_hdf5(full_name):
+                    yield full_name
+
+    found = []
+    for path in paths:
+        path = str(path)
+        if os.path.isdir(path):
+            found += list(hdf5_files_in(path))
+        elif not os.path.exists(path) and any(c in path for c in GLOB_CHARACTERS):
+            for name in sorted(glob.glob(path, recursive=True)):
+                if os.path.isdir(name):
+                    found += list(hdf5_files_in(name))
+                elif _is_hdf5(name):
+                    found.append(name)
+        else:
+            found.append(path)
+
+    unique = collections.OrderedDict()
+    for name in found:
+        unique[os.path.abspath(name)] = name
+    return sorted(unique.values())
+
+
+def _is_hdf5(fname):
+    """Is *fname* an HDF5 file?  (reads only the file signature)"""
+    try:
+        return h5py.is_hdf5(fname)
+    except (IOError, OSError):
+        return False
+
+
+def validate_files(
+    paths,
+    file_set_name=None,
+    workers=1,
+    timeout=None,
+    manager=None,
+    results_cache=None,
+    statuses=None,
+    fail_fast=False,
+    time_budget=None,
+    sibling_sample=None,
+    profile=False,
+    content=False,
+    spill_threshold=catalog.SPILL_THRESHOLD,
+):
+    """
+    Validate many files, yield a :class:`FileResult` as each one finishes.
+
+    PARAMETERS
+
+    paths [str]:
+        file names, directories, or glob patterns (see :func:`expand_paths`)
+    file_set_name str:
+        name of the NXDL file set, default: the default file set
+    workers int:
+        number of worker processes, ``1`` validates in this process
+    timeout float:
+        maximum time (s) allowed to validate any one file, default: no limit
+        (by ``SIGALRM`` where the file is validated, else the worker
+        process is stopped by this process)
+    manager obj:
+        Instance of :class:`~punx.nxdl_manager.NXDL_Manager` to use,
+        default: create one for *file_set_name*
+    results_cache obj:
+        Instance of :class:`~punx.results_cache.ResultsCache`
+        to re-use findings of unchanged files, default: no cache
+    statuses [str]:
+        statuses of the findings to keep, default: all
+        (see :class:`~punx.validate.Data_File_Validator`)
+    fail_fast bool:
+        stop at the first ERROR, no more files are validated
+    time_budget float:
+        time (s) to validate each file, then report a partial
+        validation (see ``deadline`` of
+        :meth:`~punx.validate.Data_File_Validator.validate`),
+        default: no limit
+    sibling_sample int:
+        validate only this many of each run of identical sibling groups
+        (see :class:`~punx.validate.Data_File_Validator`), default: all
+    profile bool:
+        measure the time of each phase and rule (:attr:`FileResult.profile`)
+    content bool:
+        also check the data of numeric datasets
+        (see :class:`~punx.validate.Data_File_Validator`)
+    spill_threshold int:
+        catalog a file with more items than this on disk
+        (see :class:`~punx.validate.Data_File_Validator`)
+
+    Results are yielded in the order they finish.  Sort by
+    :attr:`FileResult.index` for the order in which files were named.
+    """
+    file_list = expand_paths(paths)
+    if len(file_list) == 0:
+        return
+    config = WorkerConfig(
+        manager or nxdl_manager.NXDL_Manager(file_set_name),
+        timeout=timeout,
+        results_cache=results_cache,
+        options=dict(
+            statuses=statuses,
+            fail_fast=fail_fast,
+            sibling_sample=sibling_sample,
+            content=content,
+            spill_threshold=spill_threshold,
+        ),
+        time_budget=time_budget,
+        profile=profile,
+    )
+
+    workers = max(1, min(int(workers or 1), len(file_list)))
+    jobs = list(enumerate(file_list))
+    if workers == 1 and (timeout is None or _can_use_alarm()):
+        for job in jobs:
+            result = _validate_one(job, config)
+            yield result
+            if result.stopped:
+                return
+        return
+
+    # a timeout that cannot be kept by this thread: by the parent of a worker
+    yield from _validate_in_pool(jobs, config, workers)
+
+
+def _validate_in_pool(jobs, config, workers):
+    """
+    Validate *jobs* in a pool of *workers*, yield each result as it finishes.
+
+    No more jobs are started than there are workers, so each job starts
+    when it is sent.  A job still running ``TIMEOUT_GRACE`` after its
+    timeout (the worker could not stop it) is reported as a timeout and
+    its worker stopped: the pool is started again, with the other jobs
+    it was running.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        # workers inherit the manager already loaded in this process
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context("spawn")
+    done = queue.Queue()
+    pending = collections.deque(jobs)
+    running = {}  # (job, start time), by index of the job
+
+    def start(pool, job):
+        running[job[0]] = job, time.time()
+        pool.apply_async(
+            _validate_job,
+            (job,),
+            callback=done.put,
+            error_callback=lambda exc, job=job: done.put(_failed(job, exc)),
+        )
+
+    def new_pool():
+        return context.Pool(workers, initializer=_init_worker, initargs=(config,))
+
+    pool = new_pool()
+    try:
+        while len(pending) > 0 or len(running) > 0:
+            while len(pending) > 0 and len(running) < workers:
+                start(pool, pending.popleft())
+            wait = None
+            if config.timeout is not None:
+                first = min(t for _job, t in running.values())
+                wait = max(0, first + config.timeout + TIMEOUT_GRACE - time.time())
+            try:
+                result = done.get(timeout=wait)
+            except queue.Empty:
+                result = None
+            if result is not None:
+                if running.pop(result.index, None) is None:
+                    continue  # job sent again after the pool was stopped
+                yield result
+                if result.stopped:
+                    break  # fail_fast: the other workers are terminated
+                continue
+
+            now = time.time()
+            for job, t in list(running.values()):
+                if now - t < config.timeout + TIMEOUT_GRACE:
+                    continue
+                del running[job[0]]
+                result = FileResult(*job)
+                result.error = f"timeout: exceeded {config.timeout} s"
+                result.elapsed = now - t
+                logger.warning("validating %s: worker stopped at timeout", job[1])
+                yield result
+            pool.terminate()
+            pool.join()
+            pending.extendleft(reversed([job for job, _t in running.values()]))
+            running.clear()
+            pool = new_pool()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _init_worker(config):
+    """keep the *config* of this worker (and load its NXDL manager, if spawned)"""
+    global _worker_config
+    if config.manager is None:
+        config.manager = nxdl_manager.NXDL_Manager(config.file_set_name)
+    _worker_config = config
+
+
+def _validate_job(job):
+    """validate one file in a worker process (with its WorkerConfig)"""
+    return _validate_one(job, _worker_config)
+
+
+def _failed(job, exc):
+    """FileResult of a *job* that failed in the pool, not in the validation"""
+    result = FileResult(*job)
+    if isinstance(exc, ValidationTimeout):
+        result.error = f"timeout: {exc}"
+    else:
+        result.error = f"{exc.__class__.__name__}: {exc}"
+    return result
+
+
+def _can_use_alarm():
+    """Can this thread stop a validation with ``SIGALRM``?"""
+    return (
+        hasattr(signal, "SIGALRM")
+        and threading.current_thread() is threading.main_thread()
+    )
+
+
+def _validate_one(job, config):
+    """validate one file (in this process), return a FileResult"""
+    index, fname = job
+    result = FileResult(index, fname)
+    t0 = time.time()
+
+    validator = validate.Data_File_Validator(
+        manager=config.manager,
+        results_cache=config.results_cache,
+        profiler=profiling.Profiler() if config.profile else None,
+        **config.options,
+    )
+
+    # otherwise (in a worker): stopped by the parent process
+    use_alarm = config.timeout is not None and _can_use_alarm()
+    if use_alarm:
+
+        def on_timeout(signum, frame):
+            raise ValidationTimeout(f"exceeded {config.timeout} s")
+
+        previous = signal.signal(signal.SIGALRM, on_timeout)
+        signal.setitimer(signal.ITIMER_REAL, config.timeout)
+
+    deadline = None
+    if config.time_budget is not None:
+        deadline = t0 + config.time_budget
+    try:
+        validator.validate(fname, deadline=deadline)
+        result.collect(validator)
+    except FileNotFound:
+        result.error = "file not found"
+    except HDF5_Open_Error:
+        result.error = "could not open as HDF5"
+    except ValidationTimeout as exc:
+        result.error = f"timeout: {exc}"
+    except Exception as exc:
+        logger.error("validating %s: %s", fname, exc)
+        result.error = f"{exc.__class__.__name__}: {exc}"
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+        validator.close()
+
+    result.elapsed = time.time() - t0
+    return result
+
+
+def summary_table(results):
+    """
+    Return a ``pyRestTable.Table`` summarizing the *results*, one row per file.
+
+    Rows are in the order the files were named.
+    """
+    statuses = [s.key for s in finding.VALID_STATUS_LIST]
+    t = pyRestTable.Table()
+    t.labels = ["file"] + statuses + ["<finding>", "time (s)", "notes"]
+    totals = collections.OrderedDict((s, 0) for s in statuses)
+    for result in sorted(results, key=lambda r: r.index):
+        counts = {str(k): v for k, v in result.summary.items()}
+        for s in statuses:
+            totals[s] += counts.get(s, 0)
+        row = [result.fname]
+        row += [counts.get(s, "") if result.ok else "" for s in statuses]
+        row.append("%.3f" % result.score[-1] if result.ok else "")
+        row.append("%.2f" % result.elapsed)
+        if result.stopped:
+            row.append("stopped at the first ERROR")
+        elif len(result.uncovered) > 0:
+            row.append("PARTIAL: time budget exhausted")
+        else:
+            row.append(result.error or "")
+        t.addRow(row)
+    t.addRow(["TOTAL"] + list(totals.values()) + ["", "", ""])
+    return t
@@ -0,0 +1,438 @@
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2023, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+benchmarks: NXDL loading, data file validation, and tree rendering
+
+========================== ===================================================
+benchmark                  measures
+========================== ===================================================
+``nxdl_manager.cold:FS``   load NXDL file set *FS* in a new Python process
+``nxdl_manager.warm:FS``   load *FS* again (its XML Schema already loaded)
+``schema_manager:FS``      load the XML Schema of *FS*
+``validate:FILE``          validate data file *FILE* (with a shared manager)
+``h5tree:FILE``            render the tree view of data file *FILE*
+========================== ===================================================
+
+Synthetic files of *N* objects (see :mod:`~punx.synthetic`), named
+``synthetic_N.h5``, may be added to sweep over file size (time and
+memory against items).
+
+Each benchmark reports the best time of *repeat* runs, the throughput
+(HDF5 items validated or tree lines rendered, per second), and the
+peak memory allocated by Python (``tracemalloc``, from one more run).
+
+USAGE::
+
+    python -m punx.benchmark --save baseline.json      # record a baseline
+    python -m punx.benchmark --baseline baseline.json  # compare with it
+    python -m punx.benchmark --synthetic 10 1000 100000 --save sweep.json
+
+Compared with a baseline, the exit code is nonzero if any time or peak
+memory is more than *threshold* times its baseline value.  Values below
+``NOISE_FLOOR`` (5 ms, 1 MB) are compared as if at the floor.
+A benchmark that could not be measured is reported (and kept in a
+saved baseline) with its error, and the exit code is nonzero.
+
+.. autosummary::
+
+   ~Benchmark
+   ~measure
+   ~measure_cold_load
+   ~run_benchmarks
+   ~compare
+   ~report
+   ~main
+
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pyRestTable
+
+from . import cache_manager
+from . import utils
+
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 1.5
+MAX_ERROR_LENGTH = 80
+NOISE_FLOOR = dict(seconds=0.005, peak_bytes=1_000_000)  # ratios of smaller: noise
+EXAMPLE_DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+COLD_LOAD_SCRIPT = """
+import json, sys, time, tracemalloc
+from punx import cache_manager, nxdl_manager
+file_set = cache_manager.CacheManager().all_file_sets[sys.argv[1]]
+tracemalloc.start()
+t0 = time.perf_counter()
+nxdl_manager.NXDL_Manager(file_set)
+seconds = time.perf_counter() - t0
+print(json.dumps([seconds, tracemalloc.get_traced_memory()[1]]))
+"""
+logger = utils.setup_logger(__name__)
+
+
+class Benchmark(object):
+    """
+    result of one benchmark
+
+    name str:
+        name of the benchmark, such as ``validate:writer_1_3.hdf5``
+    seconds float:
+        best time (s) of all runs
+    items int:
+        HDF5 items validated (or tree lines rendered) in each run, or ``None``
+    peak_bytes int:
+        peak memory allocated (by Python) in one run
+    error str:
+        reason the benchmark could not be measured, or ``None``
+    """
+
+    def __init__(self, name, seconds=None, items=None, peak_bytes=None, error=None):
+        self.name = name
+        self.seconds = seconds
+        self.items = items
+        self.peak_bytes = peak_bytes
+        self.error = error
+
+    def __str__(self, *args, **kwargs):
+        return f"Benchmark({self.name}, seconds={self.seconds})"
+
+    @property
+    def rate(self):
+        """items per second, or ``None``"""
+        if self.items is None or not self.seconds:
+            return None
+        return self.items / self.seconds
+
+    def to_dict(self):
+        """this result as a dictionary (such as for JSON)"""
+        return dict(
+            seconds=self.seconds,
+            items=self.items,
+            peak_bytes=self.peak_bytes,
+            error=self.error,
+        )
+
+
+def measure(name, func, repeat=DEFAULT_REPEAT):
+    """
+    Return a :class:`Benchmark` of *func* (best time of *repeat* calls).
+
+    *func* returns the number of items handled (or ``None``).
+    """
+    try:
+        best = None
+        for _i in range(max(1, repeat)):
+            t0 = time.perf_counter()
+            items = func()
+            seconds = time.perf_counter() - t0
+            best = seconds if best is None else min(best, seconds)
+
+        tracemalloc.start()  # slows the run: not timed
+        try:
+            func()
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    except Exception as exc:
+        logger.warning("benchmark %s: %s", name, exc)
+        return Benchmark(name, error=_error_text(exc))
+    return Benchmark(name, best, items, peak_bytes)
+
+
+def measure_cold_load(file_set_name, repeat=DEFAULT_REPEAT):
+    """
+    Return a :class:`Benchmark` of loading a NXDL file set in a new process.
+
+    Nothing but the ``punx`` package is loaded before, so the time
+    includes parsing the XML Schema of the file set.
+    """
+    name = f"nxdl_manager.cold:{file_set_name}"
+    best, peak_bytes = None, None
+    for _i in range(max(1, repeat)):
+        try:
+            out = subprocess.run(
+                [sys.executable, "-c", COLD_LOAD_SCRIPT, file_set_name],
+                capture_output=True,
+                check=True,
+                text=True,
+            ).stdout
+            seconds, peak = json.loads(out.strip().splitlines()[-1])
+        except subprocess.CalledProcessError as exc:
+            # last line of the traceback: the exception
+            error = (exc.stderr or "").strip().splitlines() or [str(exc)]
+            logger.warning("benchmark %s: %s", name, error[-1])
+            return Benchmark(name, error=error[-1][:MAX_ERROR_LENGTH])
+        except (ValueError, IndexError) as exc:
+            logger.warning("benchmark %s: %s", name, exc)
+            return Benchmark(name, error=_error_text(exc))
+        best = seconds if best is None else min(best, seconds)
+        peak_bytes = peak if peak_bytes is None else min(peak_bytes, peak)
+    return Benchmark(name, best, None, peak_bytes)
+
+
+def _error_text(exc):
+    """first line of the exception, shortened (for the report)"""
+    text = f"{exc.__class__.__name__}: {exc}".strip().splitlines()[0]
+    return text[:MAX_ERROR_LENGTH]
+
+
+def run_benchmarks(
+    file_sets=None, files=None, repeat=DEFAULT_REPEAT, cold=True, synthetic=None
+):
+    """
+    Run the benchmarks, return a list of :class:`Benchmark` results.
+
+    PARAMETERS
+
+    file_sets [str]:
+        names of the NXDL file sets to load, default: all in the cache
+    files [str]:
+        data files to validate and render, default: the example data files
+    repeat int:
+        number of timed runs of each benchmark (the best is reported)
+    cold bool:
+        also measure the load of each NXDL file set in a new process
+    synthetic [int]:
+        also validate and render synthetic files of these numbers of objects
+    """
+    from . import batch
+    from . import h5tree
+    from . import nxdl_manager
+    from . import schema_manager
+    from . import validate
+
+    cm = cache_manager.CacheManager()
+    if file_sets is None:
+        file_sets = sorted(cm.all_file_sets.keys())
+    if files is None:
+        files = batch.expand_paths([EXAMPLE_DATA_DIR])
+
+    results = []
+    for name in file_sets:
+        file_set = cm.all_file_sets[name]
+        if cold:
+            results.append(measure_cold_load(name, repeat))
+        file_set.schema_manager  # load it before the warm loads
+        results.append(
+            measure(
+                f"nxdl_manager.warm:{name}",
+                lambda: nxdl_manager.NXDL_Manager(file_set) and None,
+                repeat,
+            )
+        )
+        results.append(
+            measure(
+                f"schema_manager:{name}",
+                lambda: schema_manager.SchemaManager(file_set.path) and None,
+                repeat,
+            )
+        )
+
+    manager = nxdl_manager.NXDL_Manager()  # the default file set
+
+    def validate_file(fname):
+        validator = validate.Data_File_Validator(manager=manager)
+        try:
+            validator.validate(fname)
+        finally:
+            validator.close()
+        return len(validator.addresses)
+
+    def render_tree(fname):
+        return len(h5tree.Hdf5TreeView(fname).report())
+
+    def measure_files(files):
+        for fname in files:
+            label = os.path.basename(fname)
+            results.append(
+                measure(f"validate:{label}", lambda: validate_file(fname), repeat)
+            )
+            results.append(
+                measure(f"h5tree:{label}", lambda: render_tree(fname), repeat)
+            )
+
+    measure_files(files)
+    if synthetic:
+        from . import synthetic as generator
+
+        with tempfile.TemporaryDirectory() as path:
+            names = []
+            for objects in synthetic:
+                fname = os.path.join(path, f"synthetic_{objects}.h5")
+                generator.write_file(fname, **generator.parameters_for(objects))
+                names.append(fname)
+            measure_files(names)
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare *results* with *baseline* (as from :func:`read_baseline`).
+
+    Return a dictionary, by benchmark name, of ``(time ratio, memory
+    ratio, regressed)``.  A ratio is ``None`` if not measured in both.
+    *regressed* is ``True`` if either ratio exceeds *threshold*.
+    """
+    ratios = {}
+    for result in results:
+        base = baseline.get(result.name)
+        if base is None:
+            continue
+
+        def ratio(key):
+            value, base_value = getattr(result, key), base.get(key)
+            if value is None or base_value is None:
+                return None
+            floor = NOISE_FLOOR[key]
+            return max(value, floor) / max(base_value, floor)
+
+        t_ratio = ratio("seconds")
+        m_ratio = ratio("peak_bytes")
+        regressed = any(r is not None and r > threshold for r in (t_ratio, m_ratio))
+        ratios[result.name] = (t_ratio, m_ratio, regressed)
+    return ratios
+
+
+def report(results, ratios=None):
+    """Return a ``pyRestTable.Table`` of the *results* (and *ratios*)."""
+    ratios = ratios or {}
+    t = pyRestTable.Table()
+    t.labels = ["benchmark", "time (s)", "items/s", "peak (MB)"]
+    if len(ratios) > 0:
+        t.labels += ["time ratio", "memory ratio", "verdict"]
+
+    def text(value, fmt):
+        return "" if value is None else fmt % value
+
+    for result in results:
+        if result.error is not None:
+            row = [result.name, result.error, "", ""]
+        else:
+            row = [
+                result.name,
+                text(result.seconds, "%.4f"),
+                text(result.rate, "%.0f"),
+                text(result.peak_bytes and result.peak_bytes / 1e6, "%.2f"),
+            ]
+        if len(ratios) > 0:
+            t_ratio, m_ratio, regressed = ratios.get(result.name, (None, None, None))
+            row += [text(t_ratio, "%.2f"), text(m_ratio, "%.2f")]
+            if regressed is None:
+                row.append("no baseline")
+            else:
+                row.append("REGRESSION" if regressed else "ok")
+        t.addRow(row)
+    return t
+
+
+def read_baseline(fname):
+    """Return the baseline stored (by :func:`write_baseline`) in *fname*."""
+    with open(fname) as fp:
+        return json.load(fp)["benchmarks"]
+
+
+def write_baseline(fname, results):
+    """Store the *results* as a baseline in JSON file *fname*."""
+    data = dict(
+        python=sys.version.split()[0],
+        written=time.strftime("%Y-%m-%d %H:%M:%S"),
+        benchmarks={r.name: r.to_dict() for r in results},
+    )
+    with open(fname, "w") as fp:
+        json.dump(data, fp, indent=2)
+
+
+def main(argv=None):
+    """run the benchmarks from the command line, return the exit code"""
+    p = argparse.ArgumentParser(
+        prog="python -m punx.benchmark", description=__doc__.strip().splitlines()[0]
+    )
+    p.add_argument(
+        "files",
+        nargs="*",
+        help="data files to validate and render -- default: the example data files",
+    )
+    p.add_argument(
+        "-f",
+        "--file-set",
+        action="append",
+        dest="file_sets",
+        help="NXDL file set to load (may be repeated) -- default: all in the cache",
+    )
+    p.add_argument(
+        "-n",
+        "--repeat",
+        default=DEFAULT_REPEAT,
+        type=int,
+        help=f"timed runs of each benchmark -- default: {DEFAULT_REPEAT}",
+    )
+    p.add_argument(
+        "--no-cold",
+        action="store_false",
+        dest="cold",
+        help="do not measure the NXDL loads in a new process",
+    )
+    p.add_argument(
+        "--synthetic",
+        nargs="+",
+        type=int,
+        metavar="N",
+        help="also benchmark synthetic files of about N objects",
+    )
+    p.add_argument("--save", help="store the results as a baseline in this JSON file")
+    p.add_argument("--baseline", help="compare with the baseline in this JSON file")
+    p.add_argument(
+        "--threshold",
+        default=DEFAULT_THRESHOLD,
+        type=float,
+        help=(
+            "fail if a time or peak memory exceeds THRESHOLD"
+            f" times its baseline value -- default: {DEFAULT_THRESHOLD}"
+        ),
+    )
+    args = p.parse_args(argv)
+
+    results = run_benchmarks(
+        file_sets=args.file_sets,
+        files=args.files or None,
+        repeat=args.repeat,
+        cold=args.cold,
+        synthetic=args.synthetic,
+    )
+    ratios = None
+    if args.baseline is not None:
+        ratios = compare(results, read_baseline(args.baseline), args.threshold)
+    print(str(report(results, ratios)))
+
+    if args.save is not None:
+        write_baseline(args.save, results)
+        print(f"baseline written to: {args.save}")
+    exit_code = 0
+    errors = [r.name for r in results if r.error is not None]
+    if len(errors) > 0:
+        print(f"{len(errors)} benchmark(s) not measured: {', '.join(errors)}")
+        exit_code = 1
+    regressions = sorted(k for k, v in (ratios or {}).items() if v[2])
+    if len(regressions) > 0:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold}x baseline")
+        exit_code = 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
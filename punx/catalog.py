@@ -0,0 +1,495 @@
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2023, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+catalog of the items (groups, datasets, attributes) of an HDF5 file
+
+The validator finds each item of the file once (see
+:meth:`~punx.validate.Data_File_Validator.build_address_catalog`)
+then the rules look them up:
+
+=======================  ==============================================
+lookup                   items
+=======================  ==============================================
+``addresses``            item, by HDF5 address (catalog order)
+``classpaths``           list of items, by NeXus class path
+``attribute_classpaths`` NeXus class paths, by attribute name
+``children``             list of child items (and attributes), by HDF5
+                         address of a group
+``address_set``          HDF5 addresses (as reached in this file) of
+                         all groups and datasets
+=======================  ==============================================
+
+A :class:`Catalog` keeps all items in memory.  A file with more than
+``SPILL_THRESHOLD`` items is cataloged again in a :class:`SpillCatalog`,
+which keeps them in a (temporary) SQLite database, with the same
+lookups.  Items are made again (from the HDF5 file) when looked up and
+only the ``ITEM_CACHE_SIZE`` most recent ones (and those still in use)
+are kept in memory.
+
+.. autosummary::
+
+   ~Catalog
+   ~SpillCatalog
+   ~CatalogFull
+
+"""
+
+import collections
+import collections.abc
+import os
+import sqlite3
+import tempfile
+import weakref
+
+from . import utils
+
+SPILL_THRESHOLD = 1000000  # items, more are cataloged on disk
+ITEM_CACHE_SIZE = 10000  # items kept in memory by a SpillCatalog
+INSERT_BATCH = 10000  # rows in one insert
+PAGE_SIZE = 1000  # rows read at one time
+NO_ADDRESS = ""  # key of the items with no HDF5 address
+ITEM_COLUMNS = "items.id, items.parent, items.reach, items.attribute"
+ITEM_SELECT = f"SELECT {ITEM_COLUMNS} FROM items"
+logger = utils.setup_logger(__name__)
+
+
+class CatalogFull(Exception):
+    """more items than the threshold of a :class:`Catalog`"""
+
+
+def _key(address):
+    return NO_ADDRESS if address is None else address
+
+
+def _is_group(obj):
+    return utils.isHdf5Group(obj) or utils.isHdf5FileObject(obj)
+
+
+class Catalog(object):
+    """
+    catalog of the items of an HDF5 file, in memory
+
+    threshold int:
+        raise :class:`CatalogFull` when more items are added,
+        default: ``None`` (no limit)
+    """
+
+    spilled = False
+
+    def __init__(self, threshold=None):
+        self.threshold = threshold
+        self.count = 0  # items added
+        self.addresses = collections.OrderedDict()
+        self.classpaths = {}
+        self.attribute_classpaths = {}
+        self.children = {}
+        self.address_set = set()
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def add(self, v_item, address, attribute=False):
+        """
+        Add *v_item*, reached at HDF5 *address* (of its owner, if an *attribute*).
+
+        Items are added parents first.
+        """
+        self.count += 1
+        if self.threshold is not None and self.count > self.threshold:
+            raise CatalogFull(f"more than {self.threshold} items")
+        self.addresses[v_item.h5_address] = v_item
+        if not attribute:
+            self.address_set.add(address)
+        self._add_classpath(v_item.classpath)
+        self.classpaths[v_item.classpath].append(v_item)
+        parent = v_item.parent
+        if parent is not None and parent.h5_address in self.children:
+            self.children[parent.h5_address].append(v_item)
+        if not attribute and _is_group(v_item.h5_object):
+            self.children[v_item.h5_address] = []
+
+    def _add_classpath(self, classpath):
+        if classpath not in self.classpaths:
+            self.classpaths[classpath] = []
+            if "@" in classpath:
+                name = classpath.split("@")[-1]
+                self.attribute_classpaths.setdefault(name, []).append(classpath)
+
+    def values(self):
+        """all items, in catalog order (parents before children)"""
+        return list(self.addresses.values())
+
+    def by_classpath(self):
+        """all items, grouped by NeXus class path"""
+        return [v for v_list in self.classpaths.values() for v in v_list]
+
+    def groups(self):
+        """all groups (and the file), in catalog order"""
+        return [v for v in self.addresses.values() if _is_group(v.h5_object)]
+
+    def collapse(self, v_item):
+        """Mark *v_item* as collapsed (not validated)."""
+        v_item.collapsed = True
+
+    def flush(self):
+        """Finish adding items."""
+
+    def close(self):
+        """Release the catalog."""
+
+
+class SpillCatalog(Catalog):
+    """
+    catalog of the items of an HDF5 file, in a temporary SQLite database
+
+    root obj:
+        the open HDF5 file
+    get_member obj:
+        function ``(group, name)`` that returns the member of a group
+        (as used to build the catalog)
+    directory str:
+        directory of the database, default: the system temporary directory
+    cache_size int:
+        number of (recently used) items to keep in memory,
+        default: ``ITEM_CACHE_SIZE``
+
+    The lookups (``addresses``, ``classpaths``, ...) are read-only views.
+    The database is removed by :meth:`close`.
+    """
+
+    spilled = True
+
+    def __init__(self, root, get_member, directory=None, cache_size=None):
+        self.root = root
+        self.get_member = get_member
+        self.count = 0
+        fd, self.path = tempfile.mkstemp(
+            prefix="punx-catalog-", suffix=".sqlite", dir=directory
+        )
+        os.close(fd)
+        # only this process uses the (temporary) database: no journal
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=OFF")
+        self.db.execute("PRAGMA synchronous=OFF")
+        self.db.executescript(
+            """
+            CREATE TABLE items (
+                id INTEGER PRIMARY KEY,
+                parent INTEGER,
+                reach TEXT,
+                attribute TEXT,
+                classpath TEXT,
+                is_group INTEGER);
+            CREATE TABLE addresses (
+                address TEXT UNIQUE,
+                item INTEGER);
+            """
+        )
+        self._pending_items = []
+        self._pending_addresses = []
+        self._indexed = False
+        self._live = weakref.WeakValueDictionary()  # items in use, by id
+        self._recent = collections.deque(maxlen=cache_size or ITEM_CACHE_SIZE)
+        self.collapsed_ids = set()
+        self.classpath_order = {}  # NeXus class paths, in catalog order
+        self.attribute_classpaths = {}
+        self.addresses = _Addresses(self)
+        self.classpaths = _Classpaths(self)
+        self.children = _Children(self)
+        self.address_set = _AddressSet(self)
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def add(self, v_item, address, attribute=False):
+        self.count += 1
+        v_item.catalog_id = self.count
+        parent = v_item.parent
+        self._pending_items.append(
+            (
+                self.count,
+                None if parent is None else parent.catalog_id,
+                None if attribute else address,
+                v_item.name if attribute else None,
+                v_item.classpath,
+                int(not attribute and _is_group(v_item.h5_object)),
+            )
+        )
+        self._pending_addresses.append((_key(v_item.h5_address), self.count))
+        if v_item.classpath not in self.classpath_order:
+            self.classpath_order[v_item.classpath] = len(self.classpath_order)
+            if "@" in v_item.classpath:
+                name = v_item.classpath.split("@")[-1]
+                self.attribute_classpaths.setdefault(name, []).append(
+                    v_item.classpath
+                )
+        self._live[self.count] = v_item
+        if len(self._pending_items) >= INSERT_BATCH:
+            self._write()
+
+    def _write(self):
+        if len(self._pending_items) > 0:
+            with self.db:
+                self.db.executemany(
+                    "INSERT INTO items (id, parent, reach, attribute, classpath, is_group)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    self._pending_items,
+                )
+                # the last item of an address is the one found (as in a dict)
+                self.db.executemany(
+                    "INSERT INTO addresses VALUES (?, ?)"
+                    " ON CONFLICT (address) DO UPDATE SET item = excluded.item",
+                    self._pending_addresses,
+                )
+            self._pending_items = []
+            self._pending_addresses = []
+
+    def flush(self):
+        """Write the items added, index them (once, when all are added)."""
+        self._write()
+        if not self._indexed:
+            self._indexed = True
+            with self.db:
+                self.db.executescript(
+                    """
+                    CREATE INDEX items_parent ON items (parent, id);
+                    CREATE INDEX items_reach ON items (reach);
+                    CREATE INDEX items_classpath ON items (classpath, id);
+                    """
+                )
+
+    def _query(self, sql, params=()):
+        if len(self._pending_items) > 0 or not self._indexed:
+            self.flush()
+        return self.db.execute(sql, params)
+
+    def _pages(self, sql, params=()):
+        """
+        Yield the rows of *sql* (ordered by its first column, which is
+        not returned), a page at a time.
+
+        Each page is a new (short) query: the items of a page may be
+        looked up (with other queries) before the next page is read.
+        """
+        last = 0
+        while True:
+            rows = self._query(sql, (last,) + tuple(params)).fetchall()
+            for row in rows:
+                yield row[1:]
+            if len(rows) < PAGE_SIZE:
+                break
+            last = rows[-1][0]
+
+    def item(self, item_id):
+        """Return the item *item_id* (made again from the file if needed)."""
+        v_item = self._live.get(item_id)
+        if v_item is None:
+            row = self._query(ITEM_SELECT + " WHERE id = ?", (item_id,)).fetchone()
+            v_item = self._make(row)
+        self._recent.append(v_item)
+        return v_item
+
+    def _item(self, row):
+        """Return the item of *row* (see ``ITEM_SELECT``)."""
+        v_item = self._live.get(row[0])
+        if v_item is None:
+            v_item = self._make(row)
+        self._recent.append(v_item)
+        return v_item
+
+    def _make(self, row):
+        from .validate import ValidationItem
+
+        item_id, parent_id, reach, attribute = row
+        parent = None if parent_id is None else self.item(parent_id)
+        if attribute is not None:
+            obj = parent.h5_object.attrs[attribute]
+            v_item = ValidationItem(parent, obj, attribute_name=attribute)
+        elif parent is None:
+            v_item = ValidationItem(None, self.root)
+        else:
+            name = reach.rsplit("/", 1)[-1]
+            v_item = ValidationItem(parent, self.get_member(parent.h5_object, name))
+        v_item.catalog_id = item_id
+        v_item.collapsed = item_id in self.collapsed_ids
+        self._live[item_id] = v_item
+        return v_item
+
+    def _items(self, sql, params=()):
+        for row in self._pages(sql, params):
+            yield self._item(row)
+
+    def values(self):
+        return self._items(
+            f"SELECT addresses.rowid, {ITEM_COLUMNS} FROM addresses"
+            " JOIN items ON items.id = addresses.item"
+            f" WHERE addresses.rowid > ? ORDER BY addresses.rowid LIMIT {PAGE_SIZE}"
+        )
+
+    def by_classpath(self):
+        for classpath in self.classpath_order:
+            yield from self._classpath_items(classpath)
+
+    def _classpath_items(self, classpath):
+        return self._items(
+            f"SELECT id, {ITEM_COLUMNS} FROM items"
+            f" WHERE id > ? AND classpath = ? ORDER BY id LIMIT {PAGE_SIZE}",
+            (classpath,),
+        )
+
+    def groups(self):
+        return self._items(
+            f"SELECT addresses.rowid, {ITEM_COLUMNS} FROM addresses"
+            " JOIN items ON items.id = addresses.item"
+            " WHERE addresses.rowid > ? AND items.is_group = 1"
+            f" ORDER BY addresses.rowid LIMIT {PAGE_SIZE}"
+        )
+
+    def collapse(self, v_item):
+        v_item.collapsed = True
+        self.collapsed_ids.add(v_item.catalog_id)
+
+    def item_id(self, address):
+        """id of the item (found) at HDF5 *address*, or ``None``"""
+        row = self._query(
+            "SELECT item FROM addresses WHERE address = ?", (_key(address),)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def close(self):
+        """Remove the database."""
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+            self._live.clear()
+            self._recent.clear()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+class _Addresses(collections.abc.Mapping):
+    """item, by HDF5 address"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def __getitem__(self, address):
+        item_id = self.catalog.item_id(address)
+        if item_id is None:
+            raise KeyError(address)
+        return self.catalog.item(item_id)
+
+    def __contains__(self, address):
+        return self.catalog.item_id(address) is not None
+
+    def __iter__(self):
+        for (address,) in self.catalog._pages(
+            "SELECT rowid, address FROM addresses"
+            f" WHERE rowid > ? ORDER BY rowid LIMIT {PAGE_SIZE}"
+        ):
+            yield None if address == NO_ADDRESS else address
+
+    def __len__(self):
+        return self.catalog._query("SELECT COUNT(*) FROM addresses").fetchone()[0]
+
+    def values(self):
+        return self.catalog.values()
+
+    def items(self):
+        for v_item in self.catalog.values():
+            yield v_item.h5_address, v_item
+
+
+class _Classpaths(collections.abc.Mapping):
+    """list of items, by NeXus class path"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def __getitem__(self, classpath):
+        if classpath not in self.catalog.classpath_order:
+            raise KeyError(classpath)
+        return list(self.catalog._classpath_items(classpath))
+
+    def __contains__(self, classpath):
+        return classpath in self.catalog.classpath_order
+
+    def __iter__(self):
+        return iter(self.catalog.classpath_order)
+
+    def __len__(self):
+        return len(self.catalog.classpath_order)
+
+
+class _Children(collections.abc.Mapping):
+    """list of child items (and attributes), by HDF5 address of a group"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def _group_id(self, address):
+        item_id = self.catalog.item_id(address)
+        if item_id is None:
+            return None
+        row = self.catalog._query(
+            "SELECT is_group FROM items WHERE id = ?", (item_id,)
+        ).fetchone()
+        return item_id if row[0] else None
+
+    def __getitem__(self, address):
+        item_id = self._group_id(address)
+        if item_id is None:
+            raise KeyError(address)
+        return list(
+            self.catalog._items(
+                f"SELECT id, {ITEM_COLUMNS} FROM items"
+                f" WHERE id > ? AND parent = ? ORDER BY id LIMIT {PAGE_SIZE}",
+                (item_id,),
+            )
+        )
+
+    def __contains__(self, address):
+        return self._group_id(address) is not None
+
+    def __iter__(self):
+        for v_item in self.catalog.groups():
+            yield v_item.h5_address
+
+    def __len__(self):
+        return self.catalog._query(
+            "SELECT COUNT(*) FROM addresses JOIN items ON items.id = addresses.item"
+            " WHERE items.is_group = 1"
+        ).fetchone()[0]
+
+
+class _AddressSet(collections.abc.Set):
+    """HDF5 addresses (as reached in the file) of all groups and datasets"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def __contains__(self, address):
+        row = self.catalog._query(
+            "SELECT 1 FROM items WHERE reach = ? LIMIT 1", (address,)
+        ).fetchone()
+        return row is not None
+
+    def __iter__(self):
+        for (reach,) in self.catalog._pages(
+            "SELECT id, reach FROM items"
+            f" WHERE id > ? AND reach IS NOT NULL ORDER BY id LIMIT {PAGE_SIZE}"
+        ):
+            yield reach
+
+    def __len__(self):
+        return self.catalog._query(
+            "SELECT COUNT(DISTINCT reach) FROM items"
+        ).fetchone()[0]
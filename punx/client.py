@@ -0,0 +1,100 @@
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2023, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+client of the validation server (:mod:`~punx.server`)
+
+Only the Python standard library is used here: no NXDL file set is
+loaded and no HDF5 file is opened by the client.
+
+USAGE::
+
+    for record in punx.client.request("/validate", dict(files=[fname])):
+        print(record["status"] if "status" in record else record)
+
+.. autosummary::
+
+   ~request
+   ~request_lines
+   ~UnixHTTPConnection
+
+"""
+
+import http.client
+import json
+import socket
+
+DEFAULT_HOST = "127.0.0.1"  # the server listens only on localhost
+DEFAULT_PORT = 8765
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection on a Unix socket"""
+
+    def __init__(self, socket_path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def request_lines(
+    path, payload=None, port=DEFAULT_PORT, socket_path=None, timeout=None
+):
+    """
+    Send a request to the server, yield each (NDJSON) line of the response.
+
+    path str:
+        ``/status`` (GET), ``/validate`` or ``/tree`` (POST *payload*)
+    payload dict:
+        request, see :mod:`~punx.server`
+    port int:
+        localhost port of the server, default: ``DEFAULT_PORT``
+    socket_path str:
+        Unix socket of the server (instead of *port*)
+
+    Raises ``ConnectionError`` if there is no server and ``ValueError``
+    if the server cannot answer the request.
+    """
+    if socket_path is not None:
+        connection = UnixHTTPConnection(socket_path, timeout=timeout)
+    else:
+        connection = http.client.HTTPConnection(DEFAULT_HOST, port, timeout=timeout)
+    try:
+        if payload is None:
+            connection.request("GET", path)
+        else:
+            body = json.dumps(payload).encode("utf8")
+            headers = {"Content-Type": "application/json"}
+            connection.request("POST", path, body=body, headers=headers)
+        response = connection.getresponse()
+        if response.status != 200:
+            message = json.loads(response.read() or b"{}").get("error")
+            raise ValueError(f"{response.status} {response.reason}: {message}")
+        for line in response:
+            yield line.decode("utf8")
+    except FileNotFoundError as exc:  # no Unix socket
+        raise ConnectionRefusedError(str(exc))
+    finally:
+        connection.close()
+
+
+def request(path, payload=None, port=DEFAULT_PORT, socket_path=None, timeout=None):
+    """
+    Send a request to the server, yield each (decoded JSON) record.
+
+    See :func:`request_lines` for the parameters.
+    """
+    for line in request_lines(path, payload, port, socket_path, timeout):
+        yield json.loads(line)
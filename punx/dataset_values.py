@@ -0,0 +1,138 @@
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2023, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+bounded reads of HDF5 dataset values, each made once
+
+Most checks of a value need only the scalar, the first element, or a
+few elements of a dataset, not the entire (possibly large) dataset.
+Where the dtype and shape answer the question, nothing is read.
+Each value read is kept (by dataset) until the reader is discarded,
+such as at the end of a validation.
+
+.. autosummary::
+
+   ~DatasetValues
+
+"""
+
+import numpy
+
+from . import utils
+
+MAX_ELEMENTS = 1000  # most elements read by :meth:`DatasetValues.head`
+
+
+class DatasetValues(object):
+    """
+    read (and remember) the values of HDF5 datasets
+
+    max_elements int:
+        most elements to read from a dataset for :meth:`head`,
+        default: ``MAX_ELEMENTS``
+
+    USAGE::
+
+        values = DatasetValues()
+        if values.first(dataset) == "NXmx":
+            ...
+    """
+
+    def __init__(self, max_elements=MAX_ELEMENTS):
+        self.max_elements = max(1, max_elements)
+        self.reads = 0  # number of HDF5 reads made
+        self._first = {}  # by dataset id: decoded first value
+        self._head = {}  # by dataset id: (first elements, complete?)
+        self._full = {}  # by dataset id: entire value
+
+    def first(self, dataset):
+        """
+        Return the scalar value (or first element) of *dataset*, decoded.
+
+        For a dataset of rank > 1, the first element is its first row.
+        Only that is read.  Returns ``None`` if *dataset* has no elements.
+        """
+        key = dataset.id
+        if key not in self._first:
+            shape = dataset.shape
+            if len(shape) == 0:
+                value = self._full.get(key)
+                if value is None:
+                    value = self._read(dataset, ())
+                if isinstance(value, numpy.ndarray) and len(value) > 0:
+                    value = value[0]  # scalar of an array type
+            elif shape[0] == 0:
+                value = None
+            elif key in self._full:
+                value = self._full[key][0]
+            else:
+                value = self._read(dataset, 0)
+            self._first[key] = utils.decode_byte_string(value)
+        return self._first[key]
+
+    def head(self, dataset):
+        """
+        Return ``(value, complete)``: the first elements of *dataset*.
+
+        At most ``max_elements`` elements are read (as a hyperslab of
+        whole rows).  *complete* is ``True`` when that is all of them.
+        """
+        key = dataset.id
+        if key in self._full:
+            return self._full[key], True
+        if key not in self._head:
+            shape = dataset.shape
+            if len(shape) == 0:
+                self._head[key] = (self._read(dataset, ()), True)
+            else:
+                row = int(numpy.prod(shape[1:]))
+                rows = min(shape[0], max(1, self.max_elements // max(row, 1)))
+                value = self._read(dataset, slice(0, rows))
+                self._head[key] = (value, rows == shape[0])
+        return self._head[key]
+
+    def read(self, dataset):
+        """Return the entire value of *dataset* (read only once)."""
+        key = dataset.id
+        if key not in self._full:
+            value, complete = self._head.get(key, (None, False))
+            if not complete:
+                value = self._read(dataset, ())
+            self._full[key] = value
+        return self._full[key]
+
+    def item_sizes(self, dataset):
+        """
+        Return the size (bytes) of each item of fixed-length string *dataset*.
+
+        The items are along the first axis.  An item of a rank 1 dataset
+        is a string, its size is the length of its content.  Beyond the
+        first ``max_elements`` (and for higher rank), the size is from
+        the dtype (without reading).
+        """
+        shape = dataset.shape
+        if len(shape) == 0:
+            return []
+        stored = dataset.dtype.itemsize
+        if len(shape) > 1:
+            return [stored] * shape[0]
+        value, _complete = self.head(dataset)
+        sizes = [item.dtype.itemsize for item in value]
+        return sizes + [stored] * (shape[0] - len(sizes))
+
+    def clear(self):
+        """Forget all values (such as when the file is closed)."""
+        self._first.clear()
+        self._head.clear()
+        self._full.clear()
+
+    def _read(self, dataset, selection):
+        self.reads += 1
+        return dataset[selection]
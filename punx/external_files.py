@@ -0,0 +1,185 @@
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2023, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+pool of open HDF5 files reached by external links
+
+HDF5 opens the external file each time an external link is followed.
+A master file (such as NXmx) may link to hundreds of external data
+files, some of them many times.  With a pool, each external file is
+found (as HDF5 would find it) and opened at most once.  The pool is
+shared by the validator's address catalog and the tree view.
+
+At most *maxsize* files are kept open.  The least recently used file
+is closed to make room, but only once no object from it is still in
+use; the others close with the pool.
+
+.. autosummary::
+
+   ~ExternalFilePool
+   ~candidate_paths
+   ~find
+
+"""
+
+import collections
+import os
+
+import h5py
+
+from . import utils
+
+DEFAULT_MAXSIZE = 64
+ORIGIN = "${ORIGIN}"  # in HDF5_EXT_PREFIX: directory of the parent file
+logger = utils.setup_logger(__name__)
+
+
+def candidate_paths(filename, parent_filename=None):
+    """
+    Paths at which HDF5 looks for external file *filename*, in order.
+
+    *parent_filename* is the name of the file with the external link.
+    As HDF5: an absolute *filename* is tried first (then its base name
+    in the other places), then each prefix of environment variable
+    ``HDF5_EXT_PREFIX``, the directory of the parent file, and the
+    current working directory.
+    """
+    try:
+        cwd = os.getcwd()
+    except FileNotFoundError:  # working directory was removed
+        cwd = None
+    if parent_filename is None:
+        parent_dir = cwd
+    else:
+        parent_dir = os.path.dirname(os.path.join(cwd or "", parent_filename))
+    paths = []
+    if os.path.isabs(filename):
+        paths.append(filename)
+        filename = os.path.basename(filename)
+    for prefix in os.environ.get("HDF5_EXT_PREFIX", "").split(os.pathsep):
+        if len(prefix) > 0 and (parent_dir is not None or ORIGIN not in prefix):
+            paths.append(
+                os.path.join(prefix.replace(ORIGIN, parent_dir or ""), filename)
+            )
+    if parent_dir is not None:
+        paths.append(os.path.join(parent_dir, filename))
+    if cwd is not None:
+        paths.append(os.path.join(cwd, filename))
+    return paths
+
+
+def find(filename, parent_filename=None):
+    """Return the path of external file *filename* (as HDF5) or ``None``."""
+    for path in candidate_paths(filename, parent_filename):
+        if os.path.exists(path):
+            return os.path.normpath(path)
+    return None
+
+
+class ExternalFilePool(object):
+    """
+    open HDF5 files reached by external links, least recently used last
+
+    maxsize int:
+        most files to keep open, default: ``DEFAULT_MAXSIZE``
+    lookups dict:
+        path found (or ``None``) of each external file looked up,
+        by (file name of the link, absolute name of the parent file)
+
+    USAGE::
+
+        pool = ExternalFilePool()
+        link = group.get(name, getlink=True)
+        if isinstance(link, h5py.ExternalLink):
+            obj = pool.get(group, link)  # None if not found
+        ...
+        pool.close()
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = max(1, maxsize)
+        self.opened = collections.Counter()  # times opened, by path
+        self._files = collections.OrderedDict()  # by path, most recent last
+        self._retired = {}  # by path: evicted, objects still in use
+        self._resolved = {}  # path (or None), by (parent directory, filename)
+        self.lookups = {}
+
+    def __len__(self):
+        return len(self._files)
+
+    def resolve(self, filename, parent_filename=None):
+        """
+        Return the path of external file *filename* or ``None`` if not found.
+
+        Each lookup is kept in :attr:`lookups` (such as for the results
+        cache: the files a validation depends on).
+        """
+        key = (parent_filename and os.path.dirname(parent_filename), filename)
+        if key not in self._resolved:
+            self._resolved[key] = find(filename, parent_filename)
+        if parent_filename is not None:
+            parent_filename = os.path.abspath(parent_filename)
+        self.lookups[(filename, parent_filename)] = self._resolved[key]
+        return self._resolved[key]
+
+    def exists(self, filename, parent_filename=None):
+        """Can external file *filename* be found?"""
+        return self.resolve(filename, parent_filename) is not None
+
+    def open(self, path):
+        """Return the open HDF5 file *path* (opened once)."""
+        root = self._files.get(path)
+        if root is not None and root.id.valid:
+            self._files.move_to_end(path)
+            return root
+        root = self._retired.pop(path, None)  # still open
+        if root is None or not root.id.valid:
+            root = h5py.File(path, "r")
+            self.opened[path] += 1
+        self._files[path] = root
+        while len(self._files) > self.maxsize:
+            self._release(*self._files.popitem(last=False))
+        return root
+
+    def get(self, parent, link):
+        """
+        Return the object at external link *link* in group *parent*.
+
+        Returns ``None`` if the external file or the object is not found.
+        """
+        path = self.resolve(link.filename, parent.file.filename)
+        if path is None:
+            logger.debug("external file not found: %s", link.filename)
+            return None
+        try:
+            return self.open(path).get(link.path)
+        except OSError as exc:
+            logger.debug("cannot open external file %s: %s", path, exc)
+            return None
+
+    def close(self):
+        """Close all files of the pool."""
+        for root in list(self._files.values()) + list(self._retired.values()):
+            if root.id.valid:
+                root.close()
+        self._files.clear()
+        self._retired.clear()
+
+    def _release(self, path, root):
+        """close *root* now if none of its objects are in use, else later"""
+        if not root.id.valid:
+            return
+        in_use = h5py.h5f.get_obj_count(
+            root.id, h5py.h5f.OBJ_ALL & ~h5py.h5f.OBJ_FILE
+        )
+        if in_use == 0:
+            root.close()
+        else:
+            self._retired[path] = root
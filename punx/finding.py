@@ -14,6 +14,8 @@ document each item during validation
 .. autosummary::
 
    ~Finding
+   ~from_dict
+   ~get_status
    ~VALID_STATUS_DICT
 
 """
@@ -46,6 +48,15 @@ class ValidationResultStatus(object):
     def __str__(self, *args, **kwargs):
         return self.key
 
+    def __reduce__(self):
+        # pickle by name so status identity survives a trip through a process pool
+        return (get_status, (self.key,))
+
+
+def get_status(key):
+    """return the status object with the given *key* (such as ``"ERROR"``)"""
+    return VALID_STATUS_DICT[key]
+
 
 VERY_BAD = -10000000
 OK = ValidationResultStatus("OK", 100, "green", "meets NeXus specification")
@@ -108,6 +119,15 @@ class Finding(object):
         except Exception:
             return object.__str__(self, *args, **kwargs)
 
+    def as_dict(self):
+        """return a dictionary of this finding (such as for JSON)"""
+        return dict(
+            h5_address=self.h5_address,
+            test_name=self.test_name,
+            status=self.status.key,
+            comment=self.comment,
+        )
+
     def make_md5(self):
         """make a unique hash for this finding"""
         h = hashlib.md5()
@@ -115,3 +135,8 @@ class Finding(object):
         h.update(b"\n")
         h.update(bytes(self.test_name, "utf8"))
         return h.hexdigest()
+
+
+def from_dict(d):
+    """return a :class:`Finding` from a dictionary made by :meth:`Finding.as_dict`"""
+    return Finding(d["h5_address"], d["test_name"], get_status(d["status"]), d["comment"])
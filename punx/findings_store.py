@@ -0,0 +1,354 @@
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2023, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+store the findings of many validations for queries (SQLite)
+
+Each validation of a set of files (``punx validate --store``) is a
+*run*: the NXDL file set, punx version, and rules used.  Each file
+validated in a run is a row in ``files`` with its count of findings by
+status (in ``counts``, also the findings not kept for the report) and
+each kept finding is a row in ``findings``, with the NeXus class path
+of its item.  Indexes make the aggregate questions of ``punx query``
+fast, even over millions of findings:
+
+* which files have ERROR findings in ``/NXentry/NXinstrument/NXdetector``?
+* how many findings of each status (or test), in one run or another?
+
+Files are added in bulk: one transaction for each ``batch_size`` files.
+
+USAGE::
+
+    store = punx.findings_store.FindingsStore("sweep.sqlite")
+    run = store.start_run("v3.3")
+    for result in punx.batch.validate_files(["archive/"], workers=8):
+        store.add(run, result)
+    store.close()
+
+    store.files(run, status="ERROR", classpath="/NXentry/NXinstrument")
+
+.. autosummary::
+
+   ~FindingsStore
+   ~default_store_file
+
+"""
+
+import collections
+import os
+import sqlite3
+import time
+
+from . import __version__
+from . import utils
+
+STORE_FILE_NAME = "findings.sqlite"
+BATCH_SIZE = 100  # files in one transaction
+GROUP_BY = ("status", "test_name", "classpath")
+logger = utils.setup_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL,
+    file_set TEXT,
+    file_set_sha TEXT,
+    punx_version TEXT,
+    rules TEXT,
+    label TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER REFERENCES runs (id),
+    path TEXT,
+    score REAL,
+    error TEXT,
+    elapsed REAL,
+    stopped INTEGER,
+    partial INTEGER);
+CREATE TABLE IF NOT EXISTS counts (
+    file_id INTEGER REFERENCES files (id),
+    status TEXT,
+    n INTEGER);
+CREATE TABLE IF NOT EXISTS findings (
+    run_id INTEGER REFERENCES runs (id),
+    file_id INTEGER REFERENCES files (id),
+    h5_address TEXT,
+    classpath TEXT,
+    status TEXT,
+    test_name TEXT,
+    comment TEXT);
+CREATE INDEX IF NOT EXISTS files_run ON files (run_id, path);
+CREATE INDEX IF NOT EXISTS counts_file ON counts (file_id);
+CREATE INDEX IF NOT EXISTS findings_status
+    ON findings (run_id, status, classpath, file_id);
+CREATE INDEX IF NOT EXISTS findings_classpath
+    ON findings (run_id, classpath, status, file_id);
+CREATE INDEX IF NOT EXISTS findings_test
+    ON findings (run_id, test_name, status, file_id);
+"""
+
+
+def default_store_file():
+    """full path to the store in the user's punx settings directory"""
+    from . import cache_manager
+
+    cm = cache_manager.CacheManager()
+    return os.path.join(cm.user.path, STORE_FILE_NAME)
+
+
+class FindingsStore(object):
+    """
+    SQLite database of runs, files, and findings
+
+    PARAMETERS
+
+    path str:
+        name of the SQLite database file, default: :func:`default_store_file`
+    batch_size int:
+        number of files to add in one transaction
+
+    .. autosummary::
+
+       ~start_run
+       ~add
+       ~flush
+       ~resolve_run
+       ~runs
+       ~files
+       ~counts
+       ~compare
+       ~close
+    """
+
+    def __init__(self, path=None, batch_size=BATCH_SIZE):
+        self.path = path or default_store_file()
+        self.batch_size = batch_size
+        self.pending = []  # (run id, FileResult), not yet written
+        self._db = None
+
+    def __str__(self, *args, **kwargs):
+        return f"FindingsStore(path={self.path})"
+
+    @property
+    def db(self):
+        """connection to the database"""
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, timeout=60)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(SCHEMA)
+            self._db.commit()
+        return self._db
+
+    def start_run(self, file_set_name, file_set_sha=None, rules=None, label=None):
+        """
+        Record a new run (validation of a set of files), return its id.
+
+        file_set_name str:
+            name of the NXDL file set used
+        file_set_sha str:
+            ``sha`` of the NXDL file set
+        rules str:
+            validation rules (and options) used, see
+            :meth:`~punx.validate.Data_File_Validator.rules_key`
+        label str:
+            name of the run (to use in queries), default: ``None``
+        """
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT INTO runs"
+                " (started, file_set, file_set_sha, punx_version, rules, label)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (time.time(), file_set_name, file_set_sha, __version__, rules, label),
+            )
+        return cursor.lastrowid
+
+    def add(self, run_id, result):
+        """
+        Add the :class:`~punx.batch.FileResult` of one file to run *run_id*.
+
+        Written with the next ``batch_size`` files (or :meth:`flush`).
+        """
+        self.pending.append((run_id, result))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write all files added, in one transaction."""
+        if len(self.pending) == 0:
+            return
+        with self.db:
+            for run_id, result in self.pending:
+                self._insert(run_id, result)
+        logger.debug("%d files written to %s", len(self.pending), self.path)
+        self.pending = []
+
+    def _insert(self, run_id, result):
+        cursor = self.db.execute(
+            "INSERT INTO files"
+            " (run_id, path, score, error, elapsed, stopped, partial)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                run_id,
+                os.path.abspath(result.fname),
+                result.score[-1] if result.ok else None,
+                result.error,
+                result.elapsed,
+                int(result.stopped),
+                int(len(result.uncovered) > 0),
+            ),
+        )
+        file_id = cursor.lastrowid
+        self.db.executemany(
+            "INSERT INTO counts VALUES (?, ?, ?)",
+            [(file_id, str(k), n) for k, n in result.summary.items() if n > 0],
+        )
+        self.db.executemany(
+            "INSERT INTO findings VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    run_id,
+                    file_id,
+                    f.h5_address,
+                    result.classpaths.get(f.h5_address),
+                    f.status.key,
+                    f.test_name,
+                    f.comment,
+                )
+                for f in result.findings
+            ],
+        )
+
+    def resolve_run(self, run=None):
+        """
+        Return the id of a run named by *run*.
+
+        *run* is a run id, a label, or the name of a file set (the
+        latest run of that name), default: the latest run.
+        Raises ``KeyError`` if there is no such run.
+        """
+        if run is None:
+            row = self.db.execute("SELECT MAX(id) FROM runs").fetchone()
+        elif str(run).isdigit():
+            row = self.db.execute(
+                "SELECT id FROM runs WHERE id=?", (int(run),)
+            ).fetchone()
+        else:
+            row = self.db.execute(
+                "SELECT MAX(id) FROM runs WHERE label=? OR file_set=?",
+                (str(run), str(run)),
+            ).fetchone()
+        if row is None or row[0] is None:
+            raise KeyError(f"no run: {run}" if run is not None else "no runs")
+        return row[0]
+
+    def runs(self):
+        """
+        Return a list of all runs: (id, started, file set, label,
+        number of files, number of findings).
+        """
+        return self.db.execute(
+            "SELECT runs.id, runs.started, runs.file_set, runs.label,"
+            " COUNT(files.id), COALESCE(SUM(counts.total), 0)"
+            " FROM runs LEFT JOIN files ON files.run_id = runs.id"
+            " LEFT JOIN (SELECT file_id, SUM(n) AS total FROM counts"
+            "   GROUP BY file_id) AS counts ON counts.file_id = files.id"
+            " GROUP BY runs.id ORDER BY runs.id"
+        ).fetchall()
+
+    def files(self, run=None, status=None, classpath=None, test_name=None):
+        """
+        Return the files of a run with matching findings:
+        a list of (path, number of findings), the most first.
+
+        Findings match *status* (such as ``"ERROR"``), *classpath*
+        (NeXus class path of the item, or below it), and *test_name*,
+        if given.
+        """
+        where, params = self._where(run, status, classpath, test_name)
+        return self.db.execute(
+            "SELECT files.path, matched.n FROM"
+            f" (SELECT file_id, COUNT(*) AS n FROM findings WHERE {where}"
+            "   GROUP BY file_id) AS matched"
+            " JOIN files ON files.id = matched.file_id"
+            " ORDER BY matched.n DESC, files.path",
+            params,
+        ).fetchall()
+
+    def counts(self, run=None, by="status", status=None, classpath=None, test_name=None):
+        """
+        Return the number of findings of a run, grouped *by* one of
+        ``GROUP_BY``: an ordered dictionary, the most first.
+
+        Counted by status with no other terms, these are all findings
+        (also those not kept for the report).  Otherwise, only the
+        findings stored (see :meth:`files` for the terms).
+        """
+        if by not in GROUP_BY:
+            raise ValueError(f"cannot group by {by}, choose from {GROUP_BY}")
+        if by == "status" and (status, classpath, test_name) == (None, None, None):
+            rows = self.db.execute(
+                "SELECT counts.status, SUM(counts.n) FROM counts"
+                " JOIN files ON files.id = counts.file_id"
+                " WHERE files.run_id = ?"
+                " GROUP BY counts.status ORDER BY SUM(counts.n) DESC",
+                (self.resolve_run(run),),
+            )
+        else:
+            where, params = self._where(run, status, classpath, test_name)
+            rows = self.db.execute(
+                f"SELECT {by}, COUNT(*) FROM findings"
+                f" WHERE {where} GROUP BY {by} ORDER BY COUNT(*) DESC",
+                params,
+            )
+        return collections.OrderedDict(rows.fetchall())
+
+    def compare(self, run_a, run_b, by="status", **terms):
+        """
+        Compare the :meth:`counts` of two runs:
+        a list of (key, count in *run_a*, count in *run_b*, change).
+        """
+        a = self.counts(run_a, by=by, **terms)
+        b = self.counts(run_b, by=by, **terms)
+        keys = list(a) + [k for k in b if k not in a]
+        return [(k, a.get(k, 0), b.get(k, 0), b.get(k, 0) - a.get(k, 0)) for k in keys]
+
+    def _where(self, run, status, classpath, test_name):
+        """SQL terms (and parameters) to select findings (of one run)"""
+        terms, params = ["run_id = ?"], [self.resolve_run(run)]
+        if status is not None:
+            terms.append("status = ?")
+            params.append(str(status).upper())
+        if classpath is not None:
+            # the class path or below it (range terms can use the index)
+            classpath = classpath.rstrip("/")
+            terms.append(
+                "(classpath = ?"
+                " OR (classpath >= ? AND classpath < ?)"
+                " OR (classpath >= ? AND classpath < ?))"
+            )
+            params += [
+                classpath,
+                classpath + "/",
+                classpath + "0",  # the character after "/"
+                classpath + "@",
+                classpath + "A",  # the character after "@"
+            ]
+        if test_name is not None:
+            terms.append("test_name = ?")
+            params.append(test_name)
+        return " AND ".join(terms), params
+
+    def close(self):
+        """Write the files added, close the database connection."""
+        if self._db is not None or len(self.pending) > 0:
+            self.flush()
+            self._db.close()
+        self._db = None
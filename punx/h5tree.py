@@ -24,6 +24,8 @@ import os
 import h5py
 import numpy
 
+from . import dataset_values
+from . import external_files
 from . import utils
 
 
@@ -46,11 +48,20 @@ class Hdf5TreeView(object):
     isNeXus = False
     array_items_shown = 5
 
-    def __init__(self, filename):
-        """store filename and test if file is NeXus HDF5"""
+    def __init__(self, filename, external_file_pool=None):
+        """
+        store filename and test if file is NeXus HDF5
+
+        *external_file_pool* (:class:`~punx.external_files.ExternalFilePool`)
+        may be shared, such as with a validator, default: a new pool
+        for each report
+        """
         self.requested_filename = filename
         self.filename = None
         self.show_attributes = True
+        self.shared_file_pool = external_file_pool
+        self.external_files = None
+        self.dataset_values = None
         if os.path.exists(filename):
             self.filename = filename
             self.isNeXus = utils.isNeXusFile(filename)
@@ -80,11 +91,21 @@ class Hdf5TreeView(object):
         if self.filename is None:
             return None
         self.show_attributes = show_attributes
-        with h5py.File(self.filename, "r") as f:
-            txt = self.filename
-            if self.isNeXus:
-                txt += " : NeXus data file"
-            tree_string_list = self._renderGroup(f, txt, indentation="")
+        self.external_files = self.shared_file_pool
+        if self.external_files is None:
+            self.external_files = external_files.ExternalFilePool()
+        self.dataset_values = dataset_values.DatasetValues()
+        try:
+            with h5py.File(self.filename, "r") as f:
+                txt = self.filename
+                if self.isNeXus:
+                    txt += " : NeXus data file"
+                tree_string_list = self._renderGroup(f, txt, indentation="")
+        finally:
+            if self.external_files is not self.shared_file_pool:
+                self.external_files.close()
+            self.external_files = None
+            self.dataset_values = None
         return tree_string_list
 
     def _renderGroup(self, obj, name, indentation="  ", md=None):
@@ -119,17 +140,18 @@ class Hdf5TreeView(object):
         groups = []
         for itemname in sorted(obj):
             link_info = obj.get(itemname, getlink=True)
+            value = None
             # prevent fails of obj.get(itemname, getclass=True)
             # for external links if file is not available
-            if (
-                isinstance(link_info, h5py.ExternalLink)
-                and not os.path.exists(link_info.filename)
-            ):
-                classref = None
-                logger.debug(
-                    "FileNotFound: external file=%s  external HDF5 addr=%s",
-                    link_info.filename, link_info.path
-                )
+            if isinstance(link_info, h5py.ExternalLink):
+                # each external file is found and opened once
+                value = self.external_files.get(obj, link_info)
+                classref = None if value is None else value.__class__
+                if value is None:
+                    logger.debug(
+                        "FileNotFound: external file=%s  external HDF5 addr=%s",
+                        link_info.filename, link_info.path
+                    )
             elif isinstance(link_info, h5py.SoftLink):
                 classref = None
                 logger.debug("SoftLink: HDF5 addr=%s", link_info.path)
@@ -147,7 +169,8 @@ class Hdf5TreeView(object):
                             if v is not None:
                                 s += [self._renderSingleAttribute(indentation + "  ", nm, v)]
             else:
-                value = obj.get(itemname)
+                if value is None:
+                    value = obj.get(itemname)
                 if utils.isNeXusLink(value):
                     s += self._renderLinkedObject(value, itemname, indentation + "  ")
                 elif utils.isHdf5Group(value) or utils.isHdf5FileObject(value):
@@ -215,14 +238,15 @@ class Hdf5TreeView(object):
         txShape = self._renderDsShape(dset)
         s = []
         if dset.dtype.kind == "S":
-            if isinstance(dset[()], numpy.ndarray):
-                ss = ['"' + utils.decode_byte_string(ss) + '"' for ss in dset[()]]
+            values = self.dataset_values.read(dset)
+            if isinstance(values, numpy.ndarray):
+                ss = ['"' + utils.decode_byte_string(ss) + '"' for ss in values]
                 if len(ss) > 1:
                     value = " = [%s]" % ", ".join(ss)
                 else:
                     value = " = %s" % ", ".join(ss)
             else:
-                value = " = %s" % utils.decode_byte_string(dset[()])
+                value = " = %s" % utils.decode_byte_string(values)
             s += ["%s%s:%s%s" % (indentation, name, txType, value)]
             s += self._renderAttributes(dset, indentation)
             # dset.dtype.kind == 'S', nchar = dset.dtype.itemsize
@@ -270,7 +294,8 @@ class Hdf5TreeView(object):
         # dset.dtype.kind == 'S', nchar = dset.dtype.itemsize
         if obj.dtype.kind == "S":  # fixed-length string
             if len(obj.shape):
-                t = "char[%s]" % ",".join([str(o.dtype.itemsize) for o in obj])
+                sizes = self.dataset_values.item_sizes(obj)
+                t = "char[%s]" % ",".join(map(str, sizes))
             else:
                 t = "CHAR"
         elif obj.dtype.kind == "O":  # variable-length string
@@ -21,7 +21,7 @@ main user interface file
 ::
 
     console> punx -h
-    usage: punx [-h] [-v] {configuration,demonstrate,install,tree,validate} ...
+    usage: punx [-h] [-v] {configuration,demonstrate,install,query,tree,validate} ...
 
     Python Utilities for NeXus HDF5 files version: 0.2.7+30.gf373b62.dirty URL: https://prjemian.github.io/punx
 
@@ -32,12 +32,16 @@ main user interface file
     subcommand:
     valid subcommands
 
-    {configuration,demonstrate,install,tree,validate}
+    {client,configuration,demonstrate,install,query,serve,tree,validate,watch}
+        client              send files to the punx server, print its (NDJSON) reply
         configuration       show configuration details of punx
         demonstrate         demonstrate HDF5 file validation
         install             install NeXus definitions into the local cache
+        query               questions about the findings stored by validate --store
+        serve               validate files on request, NXDL file sets loaded once
         tree                show tree structure of HDF5 or NXDL file
         validate            validate a NeXus file
+        watch               validate the HDF5 files written into a directory
 
     Note: It is only necessary to use the first two (or more) characters
     of any subcommand, enough that the abbreviation is unique. Such as:
@@ -48,19 +52,31 @@ main user interface file
    ~main
    ~MyArgumentParser
    ~parse_command_line_arguments
+   ~func_client
    ~func_configuration
    ~func_demo
    ~func_install
+   ~func_query
+   ~func_serve
    ~func_tree
    ~func_validate
+   ~func_validate_batch
+   ~func_validate_file
+   ~func_watch
+   ~get_results_cache
+   ~get_findings_store
+   ~get_report_writer
+   ~report_batch_result
 
 """
 
 import argparse
+import contextlib
 import logging
 import os
 import pathlib
 import sys
+import time
 
 from punx import cache_manager
 
@@ -92,6 +108,43 @@ def exit_message(msg, exit_code=1):
     exit(exit_code)
 
 
+def func_client(args):
+    """
+    send files to the punx server (``punx serve``), print its NDJSON reply
+    """
+    from . import client
+
+    files = [os.path.abspath(f) for f in args.infile]
+    if len(files) == 0:
+        path, payload = "/status", None
+    elif args.tree:
+        path = "/tree"
+        payload = dict(
+            files=files,
+            show_attributes=args.show_attributes,
+            max_array_items=args.max_array_items,
+        )
+    else:
+        path = "/validate"
+        payload = dict(
+            files=files,
+            file_set_name=args.file_set_name,
+            report=args.report,
+            content=args.content,
+            time_budget=args.time_budget,
+        )
+    where = args.socket or f"port {args.port}"
+    try:
+        for line in client.request_lines(
+            path, payload, port=args.port, socket_path=args.socket
+        ):
+            sys.stdout.write(line)
+    except ConnectionError:
+        exit_message(f"no punx server at {where}, start one with: punx serve")
+    except ValueError as exc:
+        exit_message(f"punx server at {where}: {exc}")
+
+
 def func_configuration(args):
     """show internal configuration of punx"""
     from . import cache_manager
@@ -189,15 +242,23 @@ def func_tree(args):
 def func_validate(args):
     """
     validate the content of a NeXus HDF5 data file of NXDL XML file
+
+    More than one file (or a directory or glob pattern) may be named.
+    Then, the files are validated by a pool of worker processes
+    which share one NXDL manager and a summary table is printed last.
     """
     from . import validate
 
     cm = cache_manager.CacheManager()
 
-    if args.infile.endswith(".nxdl.xml"):
-        result = validate.validate_xml(args.infile)
+    infiles = args.infile
+    if isinstance(infiles, str):
+        infiles = [infiles]
+
+    if len(infiles) == 1 and infiles[0].endswith(".nxdl.xml"):
+        result = validate.validate_xml(infiles[0])
         if result is None:
-            print(args.infile, " validates")
+            print(infiles[0], " validates")
         return
 
     file_sets = list(cm.all_file_sets.keys())
@@ -207,8 +268,6 @@ def func_validate(args):
             f"  Either install it or use one of these: {', '.join(file_sets)}"
         )
 
-    validator = validate.Data_File_Validator(args.file_set_name)
-
     # determine which findings are to be reported
     report_choices, trouble = [], []
     for c in args.report.upper().split(","):
@@ -223,19 +282,268 @@ def func_validate(args):
             f"\t available choices: {choices}"
         )
 
+    from . import batch
+
+    single_file = len(infiles) == 1 and not (
+        os.path.isdir(infiles[0])
+        or (
+            not os.path.exists(infiles[0])
+            and any(c in infiles[0] for c in batch.GLOB_CHARACTERS)
+        )
+    )
+    if getattr(args, "live", None) is not None and not single_file:
+        exit_message("--live validates one file")
+
+    with get_report_writer(args, report_choices) as writer:
+        if single_file:
+            func_validate_file(args, infiles[0], report_choices, writer)
+        else:
+            func_validate_batch(args, infiles, report_choices, writer)
+
+
+def func_validate_file(args, infile, report_choices, writer):
+    """
+    validate one file, write the report of its findings
+    """
+    from . import validate
+
+    text = writer.format_name == "text"
+    live = getattr(args, "live", None)
+    try:
+        validator = validate.Data_File_Validator(
+            args.file_set_name,
+            results_cache=get_results_cache(args),
+            statuses=report_choices,
+            fail_fast=getattr(args, "fail_fast", False),
+            sibling_sample=getattr(args, "sibling_sample", None),
+            profiler=get_profiler(args),
+            content=getattr(args, "content", False),
+            report_writer=None if text or getattr(args, "sorted", True) else writer,
+            live=live is not None,
+            spill_threshold=get_spill_threshold(args),
+        )
+    except ValueError as exc:
+        exit_message(str(exc))
+
+    deadline = None
+    if getattr(args, "time_budget", None) is not None:
+        deadline = time.time() + args.time_budget
+
     try:
         # run the validation
-        validator.validate(args.infile)
+        validator.validate(infile, deadline=deadline)
     except FileNotFound:
-        exit_message("File not found: " + args.infile)
+        exit_message("File not found: " + infile)
     except HDF5_Open_Error:
-        exit_message("Could not open as HDF5: " + args.infile)
+        exit_message("Could not open as HDF5: " + infile)
     except SchemaNotFound as _exc:
         exit_message(str(_exc))
 
     # report the findings from the validation
-    validator.print_report(statuses=report_choices)
-    print(f"NeXus definitions version: {args.file_set_name}")
+    if validator.report_writer is None:
+        writer.write(validator)
+    if text:
+        print(f"NeXus definitions version: {args.file_set_name}")
+    report_profile(args, validator.profiler)
+    if live is not None:
+        follow_live_file(validator, live, writer)
+    store = get_findings_store(args)
+    if store is not None:
+        from . import batch
+
+        result = batch.FileResult(0, infile)
+        result.collect(validator)
+        run_id = start_store_run(args, store, validator)
+        store.add(run_id, result)
+        store.close()
+    if validator.stopped:
+        exit_message("validation stopped at the first ERROR")
+
+
+def follow_live_file(validator, interval, writer):
+    """
+    check again what changed in a file being written, until interrupted
+
+    Each time something changed, the report is written again
+    (only the new findings and the summary, when not sorted).
+    """
+    try:
+        while True:
+            time.sleep(interval)
+            changed = validator.refresh()
+            if len(changed) > 0:
+                logger.info("%s: %d items changed", validator.fname, len(changed))
+                if validator.report_writer is None:
+                    writer.write(validator)
+                writer.stream.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        validator.close()
+
+
+def func_validate_batch(args, infiles, report_choices, writer):
+    """
+    validate many files with a worker pool, report in the order named
+    """
+    from . import batch
+    from . import nxdl_manager
+    from . import validate
+
+    file_list = batch.expand_paths(infiles)
+    if len(file_list) == 0:
+        exit_message("No HDF5 files found: " + " ".join(infiles))
+
+    # load the NXDL file set once, before the workers are started
+    manager = nxdl_manager.NXDL_Manager(args.file_set_name)
+    profiler = get_profiler(args)
+    store = get_findings_store(args)
+    if store is not None:
+        run_id = start_store_run(
+            args,
+            store,
+            validate.Data_File_Validator(
+                manager=manager,
+                statuses=report_choices,
+                sibling_sample=getattr(args, "sibling_sample", None),
+                content=getattr(args, "content", False),
+            ),
+        )
+    results = {}
+    reported = 0
+    for result in batch.validate_files(
+        file_list,
+        workers=getattr(args, "workers", 1),
+        timeout=getattr(args, "timeout", None),
+        manager=manager,
+        results_cache=get_results_cache(args),
+        statuses=report_choices,
+        fail_fast=getattr(args, "fail_fast", False),
+        time_budget=getattr(args, "time_budget", None),
+        sibling_sample=getattr(args, "sibling_sample", None),
+        profile=profiler is not None,
+        content=getattr(args, "content", False),
+        spill_threshold=get_spill_threshold(args),
+    ):
+        results[result.index] = result
+        if store is not None:
+            store.add(run_id, result)
+        if profiler is not None and result.profile is not None:
+            profiler.merge(result.profile)
+        # print reports as soon as the next one (in order) is available
+        while reported in results:
+            report_batch_result(results[reported], manager, writer)
+            reported += 1
+    for index in sorted(results):
+        if index >= reported:  # only after a stop at the first ERROR
+            report_batch_result(results[index], manager, writer)
+    if store is not None:
+        store.close()
+
+    if writer.format_name == "text":
+        writer.stream.write("\nsummary of all files\n")
+        writer.stream.write(str(batch.summary_table(results.values())) + "\n")
+        print(f"NeXus definitions version: {args.file_set_name}")
+    report_profile(args, profiler)
+    stopped = [r.fname for r in results.values() if r.stopped]
+    if len(stopped) > 0:
+        exit_message(f"validation stopped at the first ERROR: {stopped[0]}")
+
+
+def get_results_cache(args):
+    """Return the validation results cache or ``None`` if not used."""
+    from . import results_cache
+
+    if not getattr(args, "cache", False) or get_profiler(args) is not None:
+        return None  # profile: validate, even if unchanged
+    return results_cache.ResultsCache()
+
+
+def get_findings_store(args):
+    """Return the findings store (``--store``) or ``None`` if not used."""
+    from . import findings_store
+
+    path = getattr(args, "store", None)
+    if path is None:
+        return None
+    return findings_store.FindingsStore(path)
+
+
+def start_store_run(args, store, validator):
+    """Record the run of this validation in the findings *store*, return its id."""
+    file_set = validator.manager.nxdl_file_set
+    return store.start_run(
+        file_set.ref,
+        file_set_sha=file_set.sha,
+        rules=validator.rules_key(),
+        label=getattr(args, "run_label", None),
+    )
+
+
+@contextlib.contextmanager
+def get_report_writer(args, report_choices):
+    """Yield the writer of the report (``--format``), closes ``--output``."""
+    from . import report_writers
+
+    format_name = getattr(args, "format", "text")
+    output = getattr(args, "output", None)
+    if output is None:
+        yield report_writers.get_writer(format_name, statuses=report_choices)
+    else:
+        with open(output, "w", newline="") as stream:
+            yield report_writers.get_writer(
+                format_name, stream=stream, statuses=report_choices
+            )
+
+
+def get_profiler(args):
+    """Return a new profiler if requested or ``None``."""
+    from . import profiling
+
+    if getattr(args, "profile", False) or getattr(args, "profile_json", None):
+        return profiling.Profiler()
+    return None
+
+
+def get_spill_threshold(args):
+    """Return the items cataloged in memory (``None``: no limit)."""
+    from . import catalog
+
+    threshold = getattr(args, "spill_threshold", None)
+    if threshold is None:
+        return catalog.SPILL_THRESHOLD
+    return threshold or None
+
+
+def report_profile(args, profiler):
+    """print (and write to JSON, if requested) the profile measurements"""
+    if profiler is None:
+        return
+    print(f"\nprofile: time of each phase and rule ({profiler.files} file(s))")
+    print(str(profiler.report()))
+    if getattr(args, "profile_json", None):
+        profiler.write_json(args.profile_json)
+        print(f"profile written to: {args.profile_json}")
+
+
+def report_batch_result(result, manager, writer):
+    """write the validation report of one file from a batch"""
+    from . import validate
+
+    if writer.format_name == "text":
+        writer.stream.write("\n")
+    if not result.ok:
+        writer.write_error(result.fname, result.error)
+        return
+    # a validator that only reports (the file is not opened again)
+    validator = validate.Data_File_Validator(manager=manager)
+    validator.fname = result.fname
+    validator.validations = result.findings
+    validator.filtered.update(result.filtered)
+    validator.stopped = result.stopped
+    validator.uncovered.update(result.uncovered)
+    validator.timed_out = len(result.uncovered) > 0
+    writer.write(validator)
 
 
 def func_install(args):
@@ -262,6 +570,117 @@ def func_install(args):
     print(f"default file set: {cm.default_file_set.ref}")
 
 
+def func_query(args):
+    """
+    answer questions about the findings stored by ``validate --store``
+    """
+    import datetime
+    import pyRestTable
+
+    from . import findings_store
+
+    if not os.path.exists(args.store):
+        exit_message(f"No findings stored: {args.store}")
+    store = findings_store.FindingsStore(args.store)
+    terms = dict(status=args.status, classpath=args.classpath, test_name=args.test_name)
+    runs = args.run or [None]
+
+    t = pyRestTable.Table()
+    try:
+        if args.question == "runs":
+            t.labels = ["run", "started", "file set", "label", "files", "findings"]
+            for run_id, started, file_set, label, files, findings in store.runs():
+                started = datetime.datetime.fromtimestamp(started)
+                started = started.isoformat(" ", "seconds")
+                t.addRow([run_id, started, file_set, label or "", files, findings])
+        elif args.question == "files":
+            t.labels = ["file", "findings"]
+            for row in store.files(runs[0], **terms):
+                t.addRow(list(row))
+        elif args.question == "counts":
+            t.labels = [args.by, "findings"]
+            for row in store.counts(runs[0], by=args.by, **terms).items():
+                t.addRow(list(row))
+        elif args.question == "compare":
+            if len(runs) != 2:
+                exit_message("compare: name two runs (--run RUN --run RUN)")
+            a, b = [store.resolve_run(r) for r in runs]
+            t.labels = [args.by, f"run {a}", f"run {b}", "change"]
+            for key, n_a, n_b, change in store.compare(a, b, by=args.by, **terms):
+                t.addRow([key, n_a, n_b, f"{change:+d}"])
+    except KeyError as exc:
+        exit_message(exc.args[0])
+    finally:
+        store.close()
+    print(t)
+
+
+def func_serve(args):
+    """
+    validate files on request (from ``punx client``), NXDL loaded once
+    """
+    from . import server
+
+    srv = server.ValidationServer(
+        args.file_set_name,
+        workers=args.workers,
+        results_cache=get_results_cache(args),
+    )
+    try:
+        srv.serve(port=args.port, socket_path=args.socket)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.close()
+
+
+def func_watch(args):
+    """
+    validate the HDF5 files written into a directory, as they land
+    """
+    from . import server
+    from . import watch
+
+    statuses = None
+    if args.report is not None:
+        statuses = [c.strip().upper() for c in args.report.split(",")]
+        trouble = [c for c in statuses if c not in finding.VALID_STATUS_DICT]
+        if len(trouble) > 0:
+            exit_message(f"invalid choice(s) for *--report* option: {','.join(trouble)}")
+    options = dict(statuses=statuses, content=args.content)
+
+    srv = server.ValidationServer(
+        args.file_set_name,
+        workers=args.workers,
+        results_cache=get_results_cache(args),
+    )
+    log = sys.stdout if args.output is None else open(args.output, "a")
+    try:
+        watcher = watch.Watcher(
+            args.directory,
+            srv,
+            log=log,
+            max_in_flight=args.max_in_flight,
+            options=options,
+            settle=args.settle,
+            poll_interval=args.poll_interval,
+            use_inotify=not args.polling,
+            existing=args.existing,
+        )
+    except NotADirectoryError:
+        exit_message(f"Not a directory: {args.directory}")
+    logger.info("watching %s (%s)", watcher.directory.path, watcher.directory.mode)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        srv.close()
+        if log is not sys.stdout:
+            log.close()
+
+
 class MyArgumentParser(argparse.ArgumentParser):
     """
     override standard ArgumentParser to enable shortcut feature
@@ -312,9 +731,20 @@ class MyArgumentParser(argparse.ArgumentParser):
         return argparse.ArgumentParser.parse_args(self, args, namespace)
 
 
+def add_server_address_arguments(p_sub):
+    """the address of the punx server (``serve`` & ``client``)"""
+    from . import client
+
+    help_text = f"localhost port of the server -- default={client.DEFAULT_PORT}"
+    p_sub.add_argument("--port", default=client.DEFAULT_PORT, type=int, help=help_text)
+    help_text = "Unix socket of the server (instead of --port)"
+    p_sub.add_argument("--socket", default=None, help=help_text)
+
+
 def parse_command_line_arguments():
     """process command line"""
     from . import cache_manager
+    from . import watch
 
     cm = cache_manager.CacheManager()
 
@@ -338,6 +768,62 @@ def parse_command_line_arguments():
 
     subcommand = p.add_subparsers(title="subcommand", description="valid subcommands",)
 
+    # --- subcommand: client
+    help_text = "send files to the punx server, print its (NDJSON) reply"
+    p_sub = subcommand.add_parser("client", help=help_text)
+    p_sub.set_defaults(func=func_client)
+    p_sub.add_argument(
+        "infile",
+        nargs="*",
+        help="HDF5 file name(s) -- none: print the status of the server",
+    )
+    add_server_address_arguments(p_sub)
+    p_sub.add_argument(
+        "--tree",
+        action="store_true",
+        default=False,
+        help="show the tree structure of each file (instead of validating)",
+    )
+    p_sub.add_argument(
+        "-a",
+        action="store_false",
+        default=True,
+        dest="show_attributes",
+        help="Do not print attributes of HDF5 file structure (--tree)",
+    )
+    p_sub.add_argument(
+        "-m",
+        "--max_array_items",
+        default=5,
+        type=int,
+        help="maximum number of array items to be shown (--tree)",
+    )
+    p_sub.add_argument(
+        "-f",
+        "--file_set_name",
+        default=None,
+        help="NeXus NXDL file set (definitions) name -- default: the server's first",
+    )
+    p_sub.add_argument(
+        "--report",
+        default=None,
+        help="statuses of the findings to report (separate with comma)"
+        " -- default: all",
+    )
+    p_sub.add_argument(
+        "--content",
+        action="store_true",
+        default=False,
+        help="also check the data of numeric datasets",
+    )
+    p_sub.add_argument(
+        "--time-budget",
+        default=None,
+        type=float,
+        dest="time_budget",
+        help="time (s) to validate any one file -- default: no limit",
+    )
+
     # --- subcommand: configuration
     help_text = "show configuration details of punx"
     p_sub = subcommand.add_parser("configuration", help=help_text)
@@ -381,6 +867,65 @@ def parse_command_line_arguments():
 
     # TODO: add_logging_argument(p_sub)
 
+    # --- subcommand: query
+    from . import findings_store
+
+    help_text = "questions about the findings stored by validate --store"
+    p_sub = subcommand.add_parser("query", help=help_text)
+    p_sub.set_defaults(func=func_query)
+    help_text = (
+        "runs: list the runs stored,"
+        " files: files with findings (matching the terms),"
+        " counts: number of findings (matching the terms),"
+        " compare: counts of two runs"
+    )
+    p_sub.add_argument("store", help="SQLite file of the findings (validate --store)")
+    p_sub.add_argument(
+        "question", choices=["runs", "files", "counts", "compare"], help=help_text
+    )
+    help_text = (
+        "run id, label, or file set name (its latest run)"
+        " -- default: the latest run (repeat for compare)"
+    )
+    p_sub.add_argument("--run", action="append", default=None, help=help_text)
+    help_text = "only findings of this status (such as ERROR)"
+    p_sub.add_argument("--status", default=None, help=help_text)
+    help_text = "only findings in (or below) this NeXus class path"
+    p_sub.add_argument("--classpath", default=None, help=help_text)
+    help_text = "only findings of this test"
+    p_sub.add_argument("--test", default=None, dest="test_name", help=help_text)
+    help_text = "count the findings by -- default: status"
+    p_sub.add_argument(
+        "--by", default="status", choices=findings_store.GROUP_BY, help=help_text
+    )
+
+    # --- subcommand: serve
+    help_text = "validate files on request, NXDL file sets loaded once"
+    p_sub = subcommand.add_parser("serve", help=help_text)
+    p_sub.set_defaults(func=func_serve)
+    p_sub.add_argument(
+        "-f",
+        "--file_set_name",
+        action="append",
+        default=None,
+        help="NeXus NXDL file set (definitions) to load now"
+        " (repeat for more) -- default: the default file set",
+    )
+    add_server_address_arguments(p_sub)
+    help_text = "number of worker processes -- default=1"
+    p_sub.add_argument("-j", "--workers", default=1, type=int, help=help_text)
+    help_text = (
+        "re-use the findings of unchanged files, store the others"
+        " (in the punx settings directory) -- default: no cache"
+    )
+    p_sub.add_argument(
+        "--cache",
+        action="store_true",
+        default=False,
+        dest="cache",
+        help=help_text,
+    )
+
     # --- subcommand: tree
     help_text = "show tree structure of HDF5 or NXDL file"
     p_sub = subcommand.add_parser("tree", help=help_text)
@@ -405,8 +950,12 @@ def parse_command_line_arguments():
     # TODO: add_logging_argument(p_sub)
 
     # --- subcommand: validate
-    p_sub = subcommand.add_parser("validate", help="validate a NeXus file")
-    p_sub.add_argument("infile", help="HDF5 or NXDL file name")
+    p_sub = subcommand.add_parser("validate", help="validate NeXus file(s)")
+    p_sub.add_argument(
+        "infile",
+        nargs="+",
+        help="HDF5 or NXDL file name(s), directories, or glob patterns",
+    )
     p_sub.set_defaults(func=func_validate)
 
     help_text = "NeXus NXDL file set (definitions) name for validation"
@@ -426,8 +975,230 @@ def parse_command_line_arguments():
         " (separate with comma if more than one, do not use white space)"
     )
     p_sub.add_argument("--report", default=reporting_choices, help=help_text)
+
+    help_text = "number of worker processes to validate many files -- default=1"
+    p_sub.add_argument("-j", "--workers", default=1, type=int, help=help_text)
+
+    help_text = "maximum time (s) to validate any one file -- default: no limit"
+    p_sub.add_argument("--timeout", default=None, type=float, help=help_text)
+
+    help_text = (
+        "time (s) to validate any one file, then report"
+        " a PARTIAL validation -- default: no limit"
+    )
+    p_sub.add_argument("--time-budget", default=None, type=float, help=help_text)
+
+    help_text = (
+        "validate only SIBLING_SAMPLE of each run of identical sibling groups"
+        " and summarize the others -- default: validate all"
+    )
+    p_sub.add_argument(
+        "--sibling-sample",
+        default=None,
+        type=int,
+        dest="sibling_sample",
+        help=help_text,
+    )
+
+    help_text = "stop at the first ERROR finding (exit code 1)"
+    p_sub.add_argument(
+        "--fail-fast",
+        action="store_true",
+        default=False,
+        dest="fail_fast",
+        help=help_text,
+    )
+
+    help_text = (
+        "also check the data of numeric datasets (NaN and Inf,"
+        " negative counts, monotonic axes, frames all zero),"
+        " which reads all of it"
+    )
+    p_sub.add_argument(
+        "--content",
+        action="store_true",
+        default=False,
+        dest="content",
+        help=help_text,
+    )
+
+    from . import catalog
+
+    help_text = (
+        "catalog a file with more than N items (groups, datasets,"
+        " and attributes) on disk, not in memory, 0: never"
+        f" -- default: {catalog.SPILL_THRESHOLD}"
+    )
+    p_sub.add_argument(
+        "--spill-threshold",
+        default=None,
+        type=int,
+        metavar="N",
+        dest="spill_threshold",
+        help=help_text,
+    )
+
+    from . import report_writers
+
+    help_text = (
+        "validate a file that is still being written (SWMR), then every"
+        " SECONDS check again what changed, until interrupted"
+    )
+    p_sub.add_argument(
+        "--live",
+        default=None,
+        type=float,
+        metavar="SECONDS",
+        dest="live",
+        help=help_text,
+    )
+
+    help_text = "also write the findings to this SQLite file (see punx query)"
+    p_sub.add_argument(
+        "--store", default=None, metavar="FILE", dest="store", help=help_text
+    )
+
+    help_text = "label of this run in the findings --store"
+    p_sub.add_argument("--run-label", default=None, dest="run_label", help=help_text)
+
+    help_text = "format of the report -- default: text"
+    p_sub.add_argument(
+        "--format",
+        default="text",
+        choices=sorted(report_writers.FORMATS),
+        dest="format",
+        help=help_text,
+    )
+
+    help_text = "write the report to this file -- default: standard output"
+    p_sub.add_argument("--output", default=None, dest="output", help=help_text)
+
+    help_text = (
+        "write the findings as they are found, not sorted"
+        " (ndjson & csv, one file)"
+    )
+    p_sub.add_argument(
+        "--no-sort",
+        action="store_false",
+        default=True,
+        dest="sorted",
+        help=help_text,
+    )
+
+    help_text = (
+        "print the time, calls, HDF5 calls, and findings"
+        " of each phase and rule (does not use the results cache)"
+    )
+    p_sub.add_argument(
+        "--profile",
+        action="store_true",
+        default=False,
+        dest="profile",
+        help=help_text,
+    )
+
+    help_text = "also write the --profile measurements to this JSON file"
+    p_sub.add_argument(
+        "--profile-json",
+        default=None,
+        dest="profile_json",
+        help=help_text,
+    )
+
+    help_text = (
+        "re-use the findings of unchanged files, store the others"
+        " (in the punx settings directory) -- default: no cache"
+    )
+    p_sub.add_argument(
+        "--cache",
+        action="store_true",
+        default=False,
+        dest="cache",
+        help=help_text,
+    )
     # TODO: add_logging_argument(p_sub)
 
+    # --- subcommand: watch
+    help_text = "validate the HDF5 files written into a directory"
+    p_sub = subcommand.add_parser("watch", help=help_text)
+    p_sub.set_defaults(func=func_watch)
+    p_sub.add_argument("directory", help="directory to watch (and its subdirectories)")
+    p_sub.add_argument(
+        "-f",
+        "--file_set_name",
+        action="append",
+        default=None,
+        help="NeXus NXDL file set (definitions) -- default: the default file set",
+    )
+    help_text = "number of worker processes -- default=1"
+    p_sub.add_argument("-j", "--workers", default=1, type=int, help=help_text)
+    p_sub.add_argument(
+        "--report",
+        default=None,
+        help="statuses of the findings to report (separate with comma)"
+        " -- default: all",
+    )
+    p_sub.add_argument(
+        "--content",
+        action="store_true",
+        default=False,
+        help="also check the data of numeric datasets",
+    )
+    help_text = "append the findings (NDJSON) to this file -- default: standard output"
+    p_sub.add_argument("--output", default=None, help=help_text)
+    help_text = (
+        "seconds a file must be unchanged (not still being written)"
+        f" -- default={watch.SETTLE_TIME}"
+    )
+    p_sub.add_argument(
+        "--settle", default=watch.SETTLE_TIME, type=float, help=help_text
+    )
+    help_text = (
+        "seconds between scans of the directory (without inotify)"
+        f" -- default={watch.POLL_INTERVAL}"
+    )
+    p_sub.add_argument(
+        "--poll-interval",
+        default=watch.POLL_INTERVAL,
+        type=float,
+        dest="poll_interval",
+        help=help_text,
+    )
+    p_sub.add_argument(
+        "--polling",
+        action="store_true",
+        default=False,
+        help="scan the directory, do not use inotify",
+    )
+    p_sub.add_argument(
+        "--existing",
+        action="store_true",
+        default=False,
+        help="also validate the files already in the directory",
+    )
+    help_text = (
+        "most files given to the workers at one time"
+        " (others wait in a queue) -- default: twice the workers"
+    )
+    p_sub.add_argument(
+        "--max-in-flight",
+        default=None,
+        type=int,
+        dest="max_in_flight",
+        help=help_text,
+    )
+    help_text = (
+        "re-use the findings of unchanged files, store the others"
+        " (in the punx settings directory) -- default: no cache"
+    )
+    p_sub.add_argument(
+        "--cache",
+        action="store_true",
+        default=False,
+        dest="cache",
+        help=help_text,
+    )
+
     return p.parse_args()
 
 
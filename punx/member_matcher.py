@@ -0,0 +1,158 @@
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2023, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+match the children of an HDF5 group with the members of its NXDL definition
+
+The names of the members of each NXDL definition are compiled once for
+each :class:`~punx.nxdl_manager.NXDL_Manager`
+(see :meth:`~punx.nxdl_manager.NXDL_Manager.member_matcher`).
+A child of a group (by name and, for a group, NeXus class) matches:
+
+#. a link of the same name
+#. a field of the same name (``nameType="specified"``)
+#. a group of the same name and NeXus class
+#. a field with a flexible name: with ``nameType="any"``, any name, the
+   ones whose name pattern matches first (such as ``AXISNAME_end``
+   for ``x_end``); with ``nameType="partial"``, only its name pattern
+   (the upper case parts of the name may be any text)
+#. a group named only by its NeXus class (``(NXdetector)``): any group
+   of that class
+
+The children are the items in the address catalog: no HDF5 calls.
+Results are kept for each name (and NeXus class), so each name is
+matched only once for each definition.
+
+.. autosummary::
+
+   ~MemberMatcher
+   ~name_pattern
+
+"""
+
+import re
+
+from . import utils
+
+FLEXIBLE_NAME_TYPES = ("any", "partial")
+PLACEHOLDER_PATTERN = re.compile("([A-Z]+)")  # upper case: any text
+logger = utils.setup_logger(__name__)
+
+
+def name_pattern(name):
+    """
+    Return a compiled pattern of NXDL *name*, its upper case parts any text.
+
+    ``VARIABLE_errors`` matches ``x_errors``, ``DATA`` matches any name.
+    """
+    parts = PLACEHOLDER_PATTERN.split(name)
+    regex = "".join(".+" if i % 2 else re.escape(p) for i, p in enumerate(parts))
+    return re.compile(regex)
+
+
+class MemberMatcher(object):
+    """
+    members (fields, groups, and links) of an NXDL definition, by name
+
+    fields dict:
+        fields with a specified name, by name
+    groups dict:
+        groups with a specified name, by name
+    links dict:
+        links (to a field or a group), by name
+    group_classes dict:
+        group named only by its NeXus class, by NeXus class (the first one)
+    patterns [[(obj, obj)]]:
+        compiled name pattern and field with a flexible name,
+        in tiers: most specific first (each in NXDL order)
+    """
+
+    def __init__(self, definition):
+        self.title = definition.title
+        self.fields = {}
+        self.groups = {}
+        self.links = dict(definition.links)
+        self.group_classes = {}
+        self.patterns = []
+        self._matches = {}
+
+        flexible = []
+        for name, spec in definition.fields.items():
+            if spec.name_type in FLEXIBLE_NAME_TYPES:
+                flexible.append(spec)
+            else:
+                self.fields[name] = spec
+        for name, spec in definition.groups.items():
+            if spec.name_type in FLEXIBLE_NAME_TYPES:
+                self.group_classes.setdefault(spec.nx_class, spec)
+            else:
+                self.groups[name] = spec
+
+        tiers = {}  # by length of the text of the name that must match
+        for spec in flexible:
+            specificity = len(PLACEHOLDER_PATTERN.sub("", spec.name))
+            tiers.setdefault(specificity, []).append((name_pattern(spec.name), spec))
+        self.patterns = [tiers[k] for k in sorted(tiers, reverse=True)]
+        logger.debug(
+            "%s: %d names, %d group classes, %d name patterns",
+            self.title,
+            len(self.fields) + len(self.groups) + len(self.links),
+            len(self.group_classes),
+            len(flexible),
+        )
+
+    def match(self, name, group=False, nx_class=None):
+        """
+        Return the NXDL members matched by child *name* (a tuple).
+
+        A child *group* of NeXus class *nx_class* (``None``: not NeXus),
+        else a field.  More than one member only for a flexible name
+        matched equally well by several (such as ``DATA`` and
+        ``VARIABLE`` of ``NXdata``), in NXDL order.
+        """
+        key = name, group, nx_class
+        if key not in self._matches:
+            self._matches[key] = self._match(name, group, nx_class)
+        return self._matches[key]
+
+    def _match(self, name, group, nx_class):
+        if name in self.links:
+            return (self.links[name],)
+        if group:
+            spec = self.groups.get(name)
+            if spec is None or spec.nx_class != nx_class:
+                spec = self.group_classes.get(nx_class)
+            return () if spec is None else (spec,)
+        if name in self.fields:
+            return (self.fields[name],)
+        for tier in self.patterns:
+            specs = tuple(spec for pattern, spec in tier if pattern.fullmatch(name))
+            if len(specs) > 0:
+                return specs
+        for tier in reversed(self.patterns):  # any name: the least specific
+            specs = tuple(spec for _p, spec in tier if spec.name_type == "any")
+            if len(specs) > 0:
+                return specs
+        return ()
+
+    def assign(self, children):
+        """
+        Return the names of the *children* matched, by NXDL member name.
+
+        *children* are items of the address catalog (fields and groups),
+        one of each name.
+        """
+        assigned = {}
+        for child in children:
+            group = utils.isHdf5Group(child.h5_object)
+            nx_class = getattr(child, "nx_class", None)
+            for spec in self.match(child.name, group, nx_class):
+                assigned.setdefault(spec.name, []).append(child.name)
+        return assigned
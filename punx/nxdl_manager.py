@@ -90,6 +90,9 @@ class NXDL_Manager(object):
         self.nxdl_file_set = file_set
         self.nxdl_defaults = self.get_nxdl_defaults()
         self.classes = collections.OrderedDict()
+        self.requirement_trees = {}  # compiled application definitions, by name
+        self.member_matchers = {}  # compiled member names of definitions, by name
+        self._definition_index = None
 
         for nxdl_file_name in get_NXDL_file_list(file_set.path):
             logger.debug("reading NXDL file: " + nxdl_file_name)
@@ -119,6 +122,50 @@ class NXDL_Manager(object):
         s += ")"
         return s
 
+    def requirement_tree(self, name):
+        """
+        Return the requirements of application definition *name* (or ``None``).
+
+        Compiled (once) into a tree of :class:`~punx.app_definitions.Requirement`.
+        """
+        from . import app_definitions
+
+        if name not in self.requirement_trees:
+            definition = self.classes.get(name)
+            if definition is None:
+                return None
+            self.requirement_trees[name] = app_definitions.compile_definition(
+                definition
+            )
+        return self.requirement_trees[name]
+
+    def member_matcher(self, name):
+        """
+        Return the member names matcher of NXDL definition *name* (or ``None``).
+
+        Compiled (once) as a :class:`~punx.member_matcher.MemberMatcher`.
+        """
+        from . import member_matcher
+
+        if name not in self.member_matchers:
+            definition = self.classes.get(name)
+            if definition is None:
+                return None
+            self.member_matchers[name] = member_matcher.MemberMatcher(definition)
+        return self.member_matchers[name]
+
+    def definition_index(self):
+        """
+        Return the application definitions, by the class paths they require.
+
+        Built (once) as a :class:`~punx.app_definitions.DefinitionIndex`.
+        """
+        from . import app_definitions
+
+        if self._definition_index is None:
+            self._definition_index = app_definitions.DefinitionIndex(self)
+        return self._definition_index
+
     def get_nxdl_defaults(self):
         """
         Get default values for this NXDL type from the NXDL Schema.
@@ -158,15 +205,19 @@ def get_NXDL_file_list(nxdl_dir):
     return nxdl_file_list
 
 
-def validate_xml_tree(xml_tree):
+def validate_xml_tree(xml_tree, manager=None):
     """
     Validate an NXDL XML file against its NeXus NXDL XML Schema file.
 
-    :param str xml_file_name: name of XML file
+    :param obj xml_tree: parsed NXDL file (lxml)
+    :param obj manager: :class:`~punx.schema_manager.SchemaManager` of the
+        file set of the NXDL file, default: of the default file set
     """
     from . import schema_manager
 
-    schema = schema_manager.get_default_schema_manager().lxml_schema
+    if manager is None:
+        manager = schema_manager.get_default_schema_manager()
+    schema = manager.lxml_schema
     try:
         result = schema.assertValid(xml_tree)
     except lxml.etree.DocumentInvalid as exc:
@@ -440,7 +491,8 @@ class NXDL__definition(NXDL__base):  # lgtm [py/missing-call-to-init]
         lxml_tree = lxml.etree.parse(self.file_name)
 
         try:
-            validate_xml_tree(lxml_tree)
+            # its own XML Schema, not the one of the default file set
+            validate_xml_tree(lxml_tree, self.nxdl_manager.nxdl_file_set.schema_manager)
         except InvalidNxdlFile as exc:
             msg = "NXDL file is not valid: " + self.file_name
             msg += "\n" + str(exc)
@@ -571,6 +623,9 @@ class NXDL__field(NXDL__base):
         self.attributes = {}
         self.dimensions = None
         self.enumerations = []
+        self.nxdl_type = "NX_CHAR"  # NXDL data type, such as NX_FLOAT
+        self.units = None  # NXDL units type, such as NX_LENGTH
+        self.name_type = "specified"  # any: the name may be any name
 
         self._init_defaults_from_schema(nxdl_defaults)
 
@@ -581,6 +636,9 @@ class NXDL__field(NXDL__base):
     def parse_nxdl_xml(self, xml_node):
         """parse the XML content"""
         self.name = xml_node.attrib["name"]
+        self.name_type = xml_node.attrib.get("nameType", self.name_type)
+        self.nxdl_type = xml_node.attrib.get("type", self.nxdl_type)
+        self.units = xml_node.attrib.get("units")
 
         self.parse_attributes(xml_node)
 
@@ -611,6 +669,8 @@ class NXDL__group(NXDL__base):
         self.fields = {}
         self.groups = {}
         self.links = {}
+        self.nx_class = None  # NeXus class (the NXDL type)
+        self.name_type = "specified"  # any: no name, any group of its class
 
         self._init_defaults_from_schema(nxdl_defaults)
 
@@ -621,6 +681,11 @@ class NXDL__group(NXDL__base):
     def parse_nxdl_xml(self, xml_node):
         """parse the XML content"""
         self.name = xml_node.attrib.get("name", xml_node.attrib["type"][2:])
+        self.nx_class = xml_node.attrib["type"]
+        if "name" not in xml_node.attrib:
+            self.name_type = "any"
+        else:
+            self.name_type = xml_node.attrib.get("nameType", self.name_type)
 
         self.parse_attributes(xml_node)
         for k, v in xml_node.attrib.items():
@@ -0,0 +1,235 @@
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2023, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+where does the validation time go?
+
+A :class:`Profiler` given to the validator records, for each phase
+(catalog, item names and attributes, base classes, application
+definitions, default plot) and each validation rule:
+
+* the number of calls
+* the wall time (s), including any rules called within
+* the number of HDF5 calls (item and attribute lookups, dataset reads)
+* the number of findings produced
+
+Without a profiler (the default), the rules are called directly.
+
+USAGE::
+
+    from punx import profiling, validate
+
+    profiler = profiling.Profiler()
+    validator = validate.Data_File_Validator(profiler=profiler)
+    validator.validate(hdf5_file_name)
+    print(profiler.report())
+
+.. autosummary::
+
+   ~Profiler
+   ~Timing
+
+"""
+
+import collections
+import contextlib
+import json
+import time
+
+import h5py
+import pyRestTable
+
+KIND_PHASE = "phase"
+KIND_RULE = "rule"
+PHASE_CATALOG = "catalog"
+
+HDF5_METHODS = (
+    # File is a Group, Group.get() and .items() call __getitem__
+    (h5py.Group, "__getitem__"),
+    (h5py.Dataset, "__getitem__"),
+    (h5py.AttributeManager, "__getitem__"),
+)
+
+
+class Timing(object):
+    """
+    measurements of one phase or rule
+
+    kind str:
+        ``"phase"`` or ``"rule"``
+    name str:
+        name of the phase or rule
+    calls int:
+        number of times called
+    seconds float:
+        total wall time (s)
+    hdf5_calls int:
+        number of HDF5 calls made
+    findings int:
+        number of findings produced (kept or only counted)
+    """
+
+    def __init__(self, kind, name):
+        self.kind = kind
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.hdf5_calls = 0
+        self.findings = 0
+
+    def __str__(self, *args, **kwargs):
+        return f"Timing({self.kind} {self.name}, {self.seconds:.3f}s)"
+
+    def to_dict(self):
+        """measurements as a dictionary (such as for JSON)"""
+        return dict(
+            kind=self.kind,
+            name=self.name,
+            calls=self.calls,
+            seconds=self.seconds,
+            hdf5_calls=self.hdf5_calls,
+            findings=self.findings,
+        )
+
+
+class Profiler(object):
+    """
+    record the time spent in each validation phase and rule
+
+    Measurements accumulate over all files validated with this profiler.
+
+    .. note:: While a file is validated, the counting of HDF5 calls
+       replaces methods of the ``h5py`` classes (in this process).
+    """
+
+    def __init__(self):
+        self.timings = collections.OrderedDict()  # by (kind, name)
+        self.files = 0
+        self.hdf5_calls = 0
+        self._count_findings = None
+        self._wrappers = {}
+
+    def timing(self, kind, name):
+        """Return the :class:`Timing` of *name* (create it if new)."""
+        key = (kind, name)
+        if key not in self.timings:
+            self.timings[key] = Timing(kind, name)
+        return self.timings[key]
+
+    @contextlib.contextmanager
+    def profiling(self, validator):
+        """Measure while validating a file with *validator*."""
+
+        def count_findings():
+            return len(validator.validations) + sum(validator.filtered.values())
+
+        self._count_findings = count_findings
+        self.files += 1
+        originals = [(cls, m, cls.__dict__[m]) for cls, m in HDF5_METHODS]
+        for cls, method, original in originals:
+            setattr(cls, method, self._counted(original))
+        try:
+            yield self
+        finally:
+            for cls, method, original in originals:
+                setattr(cls, method, original)
+            self._count_findings = None
+
+    def _counted(self, method):
+        def counted(*args, **kwargs):
+            self.hdf5_calls += 1
+            return method(*args, **kwargs)
+
+        return counted
+
+    def wrap(self, kind, name, func):
+        """Return *func*, measured as the phase or rule *name*."""
+        key = (kind, name, func)
+        wrapper = self._wrappers.get(key)
+        if wrapper is not None:
+            return wrapper
+        timing = self.timing(kind, name)
+
+        def wrapper(*args, **kwargs):
+            n_findings = self._count_findings()
+            n_hdf5 = self.hdf5_calls
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timing.seconds += time.perf_counter() - t0
+                timing.calls += 1
+                timing.hdf5_calls += self.hdf5_calls - n_hdf5
+                timing.findings += self._count_findings() - n_findings
+
+        self._wrappers[key] = wrapper
+        return wrapper
+
+    def ranked(self, kind=None):
+        """list of timings (only of *kind*, if given), slowest first"""
+        timings = [
+            t for t in self.timings.values() if kind is None or t.kind == kind
+        ]
+        return sorted(timings, key=lambda t: -t.seconds)
+
+    def merge(self, other):
+        """Add the measurements of *other* (a Profiler or its ``to_dict()``)."""
+        if isinstance(other, Profiler):
+            other = other.to_dict()
+        self.files += other["files"]
+        self.hdf5_calls += other["hdf5_calls"]
+        for item in other["timings"]:
+            timing = self.timing(item["kind"], item["name"])
+            for k in "calls seconds hdf5_calls findings".split():
+                setattr(timing, k, getattr(timing, k) + item[k])
+
+    def to_dict(self):
+        """all measurements as a dictionary (such as for JSON)"""
+        return dict(
+            files=self.files,
+            hdf5_calls=self.hdf5_calls,
+            timings=[t.to_dict() for t in self.ranked()],
+        )
+
+    def write_json(self, fname):
+        """Write all measurements to JSON file *fname*."""
+        with open(fname, "w") as fp:
+            json.dump(self.to_dict(), fp, indent=2)
+
+    def report(self):
+        """Return a ``pyRestTable.Table`` of the phases, then the rules, ranked."""
+        table = pyRestTable.Table()
+        table.labels = [
+            "kind",
+            "name",
+            "calls",
+            "time (s)",
+            "% of phases",
+            "us/call",
+            "HDF5 calls",
+            "findings",
+        ]
+        total = sum(t.seconds for t in self.ranked(KIND_PHASE)) or 1
+        for kind in (KIND_PHASE, KIND_RULE):
+            for timing in self.ranked(kind):
+                per_call = 1e6 * timing.seconds / max(timing.calls, 1)
+                table.addRow(
+                    [
+                        timing.kind,
+                        timing.name,
+                        timing.calls,
+                        "%.4f" % timing.seconds,
+                        "%.1f" % (100 * timing.seconds / total),
+                        "%.1f" % per_call,
+                        timing.hdf5_calls,
+                        timing.findings,
+                    ]
+                )
+        return table
@@ -0,0 +1,255 @@
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2023, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+write the findings of a validation, one at a time, in a chosen format
+
+=========  ====================================================
+format     output
+=========  ====================================================
+text       tables (reST), as :meth:`~punx.validate.Data_File_Validator.print_report`
+ndjson     one JSON object per line: each finding, then a summary
+csv        one row per finding (with a header row)
+summary    one line per file: count of findings by status
+=========  ====================================================
+
+A writer is called for each file: :meth:`~ReportWriter.begin`, then
+:meth:`~ReportWriter.write_finding` for each finding, then
+:meth:`~ReportWriter.end`.  :meth:`~ReportWriter.write` does all of
+that for a finished validation (findings in sorted order).  Given as
+``report_writer`` to a :class:`~punx.validate.Data_File_Validator`,
+a writer gets each finding as it is found.  No writer keeps the
+findings, each is written to the stream (such as ``sys.stdout``)
+when it is received.
+
+.. autosummary::
+
+   ~get_writer
+   ~sort_key
+   ~sorted_findings
+   ~ReportWriter
+   ~TextWriter
+   ~NdjsonWriter
+   ~CsvWriter
+   ~SummaryWriter
+
+"""
+
+import contextlib
+import csv
+import json
+import sys
+
+from . import finding
+
+CSV_COLUMNS = "file h5_address status test_name comment".split()
+
+
+def sort_key(f):
+    """
+    Return the (tuple) key to sort finding *f*.
+
+    By HDF5 address (with each attribute after its group or
+    dataset), then from best to worst status.
+    """
+    return (f.h5_address.replace("@", " @"), -f.status.value, f.status.description)
+
+
+def sorted_findings(findings):
+    """Return the *findings*, sorted (see :func:`sort_key`)."""
+    return sorted(findings, key=sort_key)
+
+
+class ReportWriter(object):
+    """
+    base class: write the findings of each file validated
+
+    stream obj:
+        open (text) file to write, default: ``sys.stdout``
+    statuses [str]:
+        keys of the statuses of findings to write, default: all
+    """
+
+    format_name = None
+
+    def __init__(self, stream=None, statuses=None):
+        self.stream = stream or sys.stdout
+        self.statuses = statuses or list(finding.VALID_STATUS_DICT.keys())
+
+    def selected(self, f):
+        """Is finding *f* to be written?"""
+        return str(f.status) in self.statuses
+
+    def write(self, validator, sort=True):
+        """Write the report of a finished *validator*."""
+        self.begin(validator)
+        findings = validator.validations
+        if sort:
+            findings = sorted_findings(findings)
+        for f in findings:
+            self.write_finding(validator, f)
+        self.end(validator)
+
+    def begin(self, validator):
+        """Start the report of the file of *validator*."""
+
+    def write_finding(self, validator, f):
+        """Write finding *f* (if selected)."""
+        if self.selected(f):
+            self._write_finding(validator, f)
+
+    def end(self, validator):
+        """Finish the report of the file of *validator*."""
+
+    def write_error(self, fname, error):
+        """Report that file *fname* was not validated (*error*)."""
+        raise NotImplementedError
+
+    def _write_finding(self, validator, f):
+        raise NotImplementedError
+
+
+class TextWriter(ReportWriter):
+    """
+    tables (reST) of the findings and the summary, as before
+
+    The table needs all the findings, it is written at the :meth:`end`.
+    """
+
+    format_name = "text"
+
+    def write_finding(self, validator, f):
+        pass  # written (sorted) from validator.validations at the end
+
+    def end(self, validator):
+        with contextlib.redirect_stdout(self.stream):
+            validator.print_report(statuses=self.statuses)
+
+    def write_error(self, fname, error):
+        self.stream.write(f"data file: {fname}\nNOT VALIDATED: {error}\n")
+
+
+class NdjsonWriter(ReportWriter):
+    """
+    one JSON object per line (newline-delimited JSON)
+
+    Each finding is an object with keys: ``file``, ``h5_address``,
+    ``status``, ``test_name``, and ``comment``.  The last line of each
+    file has keys: ``file``, ``summary`` (count by status), ``score``,
+    ``scored`` (number of findings in the score), ``partial``, and
+    ``stopped``.  A file not validated is one line with keys: ``file``
+    and ``error``.
+    """
+
+    format_name = "ndjson"
+
+    def _write_finding(self, validator, f):
+        self._write_line(dict(file=validator.fname, **f.as_dict()))
+
+    def end(self, validator):
+        _total, count, score = validator.finding_score()
+        summary = {
+            str(status): n
+            for status, n in validator.finding_summary().items()
+            if str(status) in self.statuses
+        }
+        self._write_line(
+            dict(
+                file=validator.fname,
+                summary=summary,
+                score=score,
+                scored=count,
+                partial=validator.timed_out,
+                stopped=validator.stopped,
+            )
+        )
+
+    def write_error(self, fname, error):
+        self._write_line(dict(file=fname, error=error))
+
+    def _write_line(self, record):
+        self.stream.write(json.dumps(record) + "\n")
+
+
+class CsvWriter(ReportWriter):
+    """
+    one row per finding, columns: ``CSV_COLUMNS``
+
+    The header row is written once (before the first file).
+    """
+
+    format_name = "csv"
+
+    def __init__(self, stream=None, statuses=None):
+        super().__init__(stream=stream, statuses=statuses)
+        self._csv = csv.writer(self.stream, lineterminator="\n")
+        self._header = False
+
+    def begin(self, validator):
+        if not self._header:
+            self._csv.writerow(CSV_COLUMNS)
+            self._header = True
+
+    def _write_finding(self, validator, f):
+        row = dict(file=validator.fname, **f.as_dict())
+        self._csv.writerow([row[k] for k in CSV_COLUMNS])
+
+    def write_error(self, fname, error):
+        self.begin(None)
+        self._csv.writerow([fname, "", "", "", f"NOT VALIDATED: {error}"])
+
+
+class SummaryWriter(ReportWriter):
+    """
+    one line for each file, such as::
+
+        data.hdf5: OK=120 NOTE=3 WARN=1 ERROR=0 TOTAL=124 score=94.2
+    """
+
+    format_name = "summary"
+
+    def write(self, validator, sort=True):
+        self.end(validator)  # the findings are not needed
+
+    def write_finding(self, validator, f):
+        pass
+
+    def end(self, validator):
+        counts = [
+            (str(status), n)
+            for status, n in validator.finding_summary().items()
+            if str(status) in self.statuses
+        ]
+        terms = [f"{key}={n}" for key, n in counts]
+        terms.append(f"TOTAL={sum(n for _k, n in counts)}")
+        terms.append(f"score={validator.finding_score()[2]:.1f}")
+        if validator.timed_out:
+            terms.append("PARTIAL")
+        if validator.stopped:
+            terms.append("STOPPED")
+        self.stream.write(f"{validator.fname}: {' '.join(terms)}\n")
+
+    def write_error(self, fname, error):
+        self.stream.write(f"{fname}: NOT VALIDATED: {error}\n")
+
+
+FORMATS = {
+    cls.format_name: cls for cls in (TextWriter, NdjsonWriter, CsvWriter, SummaryWriter)
+}
+"""writer class, by format name"""
+
+
+def get_writer(format_name, stream=None, statuses=None):
+    """
+    Return a new writer of the named format (see ``FORMATS``).
+
+    Raises ``KeyError`` if the format is not known.
+    """
+    return FORMATS[format_name](stream=stream, statuses=statuses)
@@ -0,0 +1,300 @@
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2023, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+persistent cache of data file validation results
+
+Validating the same (unchanged) file again with the same NXDL file set
+and the same rules gives the same findings.  The cache stores the
+findings, keyed by the identity of the file (path, size, modification
+time, and inode or content hash), the punx version, the ``sha`` of the
+NXDL file set, and the enabled rules.  A cache hit returns the stored
+findings without opening the HDF5 file.
+
+The files reached by external links are stored with the findings (the
+path found, or none, with its size and modification time).  If any of
+them has changed, or is found at another path, the stored findings are
+not used.
+
+The cache is an SQLite database.  When it grows beyond ``max_bytes``,
+the least-recently used results are removed.
+
+USAGE::
+
+    cache = punx.results_cache.ResultsCache()
+    validator = punx.validate.Data_File_Validator(results_cache=cache)
+    validator.validate(hdf5_file_name)  # validated, findings stored
+    validator.validate(hdf5_file_name)  # findings from the cache
+
+.. autosummary::
+
+   ~ResultsCache
+   ~default_cache_file
+   ~externals_unchanged
+
+"""
+
+import collections
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from . import __version__
+from . import external_files
+from . import finding
+from . import utils
+
+CACHE_FILE_NAME = "validation_results.sqlite"
+CACHE_VERSION = 2  # of the stored findings: results of other versions are not used
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+EVICT_CHECK_INTERVAL = 100  # puts between checks of the total size
+HASH_BLOCK_SIZE = 1024 * 1024
+logger = utils.setup_logger(__name__)
+
+
+def default_cache_file():
+    """full path to the cache file in the user's punx settings directory"""
+    from . import cache_manager
+
+    cm = cache_manager.CacheManager()
+    return os.path.join(cm.user.path, CACHE_FILE_NAME)
+
+
+class ResultsCache(object):
+    """
+    persistent (SQLite) cache of validation findings
+
+    PARAMETERS
+
+    path str:
+        name of the SQLite database file, default: :func:`default_cache_file`
+    max_bytes int:
+        upper limit of the stored findings (bytes) before the
+        least-recently used results are evicted
+    content_hash bool:
+        identify files by a hash of their content rather than inode
+        (slower, but survives copying a file)
+
+    .. autosummary::
+
+       ~key
+       ~get
+       ~put
+       ~total_bytes
+       ~clear
+       ~close
+    """
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES, content_hash=False):
+        self.path = path or default_cache_file()
+        self.max_bytes = max_bytes
+        self.content_hash = content_hash
+        self.hits = 0
+        self.misses = 0
+        self._db = None
+        self._pid = None
+        self._puts = 0
+
+    def __str__(self, *args, **kwargs):
+        return (
+            "ResultsCache("
+            f"path={self.path}"
+            f", hits={self.hits}"
+            f", misses={self.misses}"
+            ")"
+        )
+
+    def __getstate__(self):
+        # a database connection cannot be pickled (such as for a worker process)
+        state = dict(self.__dict__)
+        state["_db"] = None
+        return state
+
+    @property
+    def db(self):
+        """connection to the database (one per process)"""
+        if self._db is None or self._pid != os.getpid():
+            # never use a connection inherited by a forked process
+            self._db = sqlite3.connect(self.path, timeout=60)
+            self._pid = os.getpid()
+            # many processes may share the cache, commits should be cheap
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY,"
+                " path TEXT,"
+                " findings TEXT,"
+                " nbytes INTEGER,"
+                " last_used REAL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)"
+            )
+            self._db.commit()
+        return self._db
+
+    def key(self, fname, validator):
+        """
+        Return the cache key for file *fname* as validated by *validator*.
+
+        Only file system metadata is read (unless ``content_hash`` is set).
+        """
+        fname = os.path.abspath(fname)
+        st = os.stat(fname)
+        if self.content_hash:
+            identity = _file_hash(fname)
+        else:
+            identity = f"{st.st_dev}:{st.st_ino}"
+        terms = [
+            fname,
+            str(st.st_size),
+            str(st.st_mtime_ns),
+            identity,
+            str(CACHE_VERSION),
+            __version__,
+            str(validator.manager.nxdl_file_set.sha),
+            validator.rules_key(),
+        ]
+        return hashlib.sha256("\n".join(terms).encode("utf8")).hexdigest()
+
+    def get(self, key):
+        """
+        Return stored results for *key* or ``None``.
+
+        The results are a tuple: (list of findings, counts of other
+        findings by status, NeXus class paths by HDF5 address).
+        Only the findings of the statuses selected for the report are
+        kept, the others are counted.
+        ``None`` also if a file reached by an external link has changed.
+        """
+        row = self.db.execute(
+            "SELECT findings FROM results WHERE key=?", (key,)
+        ).fetchone()
+        stored = None if row is None else json.loads(row[0])
+        if stored is not None and not externals_unchanged(stored["externals"]):
+            stored = None
+        if stored is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        with self.db:
+            self.db.execute(
+                "UPDATE results SET last_used=? WHERE key=?", (time.time(), key)
+            )
+        findings = [finding.from_dict(d) for d in stored["findings"]]
+        filtered = collections.Counter(
+            {finding.get_status(k): n for k, n in stored["filtered"].items()}
+        )
+        return findings, filtered, stored["classpaths"]
+
+    def put(
+        self, key, fname, findings, filtered=None, classpaths=None, externals=None
+    ):
+        """
+        Store the *findings* of file *fname* by *key*.
+
+        *filtered* (dict) has the count, by status,
+        of findings not kept for the report.
+        *classpaths* (dict) has the NeXus class path
+        of the items of the findings, by HDF5 address.
+        *externals* (dict) has the path found (or ``None``) of each
+        external file, by (file name of the link, name of the parent
+        file), as :attr:`~punx.external_files.ExternalFilePool.lookups`.
+        """
+        stored = dict(
+            findings=[f.as_dict() for f in findings],
+            filtered={str(k): n for k, n in (filtered or {}).items()},
+            classpaths=classpaths or {},
+            externals=[
+                [filename, parent, _signature(path)]
+                for (filename, parent), path in sorted(
+                    (externals or {}).items(), key=str
+                )
+            ],
+        )
+        text = json.dumps(stored)
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (key, os.path.abspath(fname), text, len(text), time.time()),
+            )
+        self._puts += 1
+        if self._puts % EVICT_CHECK_INTERVAL == 1 or len(text) > self.max_bytes:
+            self.evict()
+
+    def total_bytes(self):
+        """size (bytes) of all stored findings"""
+        row = self.db.execute("SELECT SUM(nbytes) FROM results").fetchone()
+        return row[0] or 0
+
+    def evict(self):
+        """Remove least-recently used results until within ``max_bytes``."""
+        excess = self.total_bytes() - self.max_bytes
+        if excess <= 0:
+            return
+        doomed = []
+        cursor = self.db.execute(
+            "SELECT key, nbytes FROM results ORDER BY last_used ASC"
+        )
+        for key, nbytes in cursor:
+            doomed.append((key,))
+            excess -= nbytes
+            if excess <= 0:
+                break
+        with self.db:
+            self.db.executemany("DELETE FROM results WHERE key=?", doomed)
+        logger.debug("evicted %d results from %s", len(doomed), self.path)
+
+    def clear(self):
+        """Remove all stored results."""
+        with self.db:
+            self.db.execute("DELETE FROM results")
+
+    def close(self):
+        """Close the database connection."""
+        if self._db is not None and self._pid == os.getpid():
+            self._db.close()
+        self._db = None
+
+
+def externals_unchanged(externals):
+    """
+    Are the external files (as stored by :meth:`ResultsCache.put`) unchanged?
+
+    Each is found again (as HDF5 would find it), then compared by
+    path, size, and modification time.
+    """
+    for filename, parent, signature in externals:
+        if _signature(external_files.find(filename, parent)) != signature:
+            return False
+    return True
+
+
+def _signature(path):
+    """path, size, and modification time of file *path* (``None``: not found)"""
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [path, st.st_size, st.st_mtime_ns]
+
+
+def _file_hash(fname):
+    """sha256 of the content of file *fname*"""
+    h = hashlib.sha256()
+    with open(fname, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
@@ -0,0 +1,393 @@
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2023, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+validation server: NXDL file sets loaded once, for many requests
+
+The server (``punx serve``) loads the NXDL file sets when it starts,
+then answers requests (HTTP on localhost, or on a Unix socket) from
+:mod:`~punx.client` (``punx client``).  Each request is handled in
+its own thread, the files are validated by a pool of workers.  Worker
+processes (``workers > 1``) are forked after the file sets are loaded,
+so they start warm.
+
+=======  ===========  ==================================================
+method   path         request (JSON) and response
+=======  ===========  ==================================================
+GET      ``/status``  file sets loaded, workers, requests answered
+POST     ``/validate``  ``{"files": [...], "file_set_name": ...,
+                      "report": "ERROR,WARN", "content": false,
+                      "sibling_sample": null, "time_budget": null}``,
+                      NDJSON: the findings of each file, as
+                      :class:`~punx.report_writers.NdjsonWriter`
+POST     ``/tree``    ``{"files": [...], "show_attributes": true,
+                      "max_array_items": 5}``, NDJSON: one line
+                      ``{"file": ..., "tree": [lines]}`` for each file
+=======  ===========  ==================================================
+
+Files are reported in the order named, each as soon as it (and the
+files before it) are done.  Name files by absolute path (the server
+has its own working directory).
+
+.. autosummary::
+
+   ~ValidationServer
+   ~validate_file
+   ~tree_file
+
+"""
+
+import concurrent.futures
+import http.server
+import io
+import json
+import multiprocessing
+import os
+import socketserver
+import threading
+import time
+
+from . import FileNotFound, HDF5_Open_Error
+from . import finding
+from . import nxdl_manager
+from . import report_writers
+from . import utils
+from . import validate
+from .client import DEFAULT_HOST, DEFAULT_PORT
+
+NDJSON = "application/x-ndjson"
+VALIDATOR_OPTIONS = ("content", "sibling_sample")
+logger = utils.setup_logger(__name__)
+
+# in the server and (inherited or loaded) in each worker process
+_managers = {}  # NXDL_Manager, by file set name
+_results_cache = None
+
+
+class RequestError(ValueError):
+    """request cannot be answered (HTTP status 400)"""
+
+
+def _get_manager(file_set_name):
+    """NXDL manager of the named file set (loaded once in each process)"""
+    if file_set_name not in _managers:
+        _managers[file_set_name] = nxdl_manager.NXDL_Manager(file_set_name)
+    return _managers[file_set_name]
+
+
+def _init_worker(file_set_names, results_cache):
+    """load the NXDL file sets once in each (spawned) worker process"""
+    global _results_cache
+    for name in file_set_names:
+        _get_manager(name)
+    _results_cache = results_cache
+
+
+def validate_file(
+    fname, file_set_name=None, statuses=None, time_budget=None, **options
+):
+    """
+    Validate one file (in a worker), return its NDJSON report (text).
+
+    With a *time_budget* (s), a partial validation is reported
+    when the time runs out (see :mod:`~punx.validate`).
+    """
+    deadline = None
+    if time_budget is not None:
+        deadline = time.time() + time_budget
+    stream = io.StringIO()
+    writer = report_writers.NdjsonWriter(stream=stream, statuses=statuses)
+    validator = validate.Data_File_Validator(
+        manager=_get_manager(file_set_name),
+        results_cache=_results_cache,
+        statuses=statuses,
+        **options,
+    )
+    try:
+        validator.validate(fname, deadline=deadline)
+        writer.write(validator)
+    except FileNotFound:
+        writer.write_error(fname, "file not found")
+    except HDF5_Open_Error:
+        writer.write_error(fname, "could not open as HDF5")
+    except Exception as exc:
+        logger.error("validating %s: %s", fname, exc)
+        writer.write_error(fname, f"{exc.__class__.__name__}: {exc}")
+    finally:
+        validator.close()
+    return stream.getvalue()
+
+
+def tree_file(fname, show_attributes=True, max_array_items=5):
+    """
+    Return the tree of one file (in a worker) as an NDJSON line.
+    """
+    from . import h5tree
+
+    try:
+        view = h5tree.Hdf5TreeView(fname)
+        view.array_items_shown = max_array_items
+        record = dict(file=fname, tree=view.report(show_attributes) or [])
+    except FileNotFound:
+        record = dict(file=fname, error="file not found")
+    except HDF5_Open_Error:
+        record = dict(file=fname, error="could not open as HDF5")
+    except Exception as exc:
+        logger.error("tree of %s: %s", fname, exc)
+        record = dict(file=fname, error=f"{exc.__class__.__name__}: {exc}")
+    return json.dumps(record) + "\n"
+
+
+class ValidationServer(object):
+    """
+    validate files (and show their trees) on request
+
+    file_set_names [str]:
+        NXDL file sets to load now, default: the default file set
+        (others are loaded when first requested)
+    workers int:
+        number of worker processes, ``1`` validates (one file at a
+        time) in a thread of the server process
+    results_cache obj:
+        Instance of :class:`~punx.results_cache.ResultsCache`
+        to re-use findings of unchanged files, default: no cache
+
+    USAGE::
+
+        server = ValidationServer(["v2018.5"], workers=4)
+        server.serve(port=DEFAULT_PORT)  # until interrupted
+    """
+
+    def __init__(self, file_set_names=None, workers=1, results_cache=None):
+        global _results_cache
+        self.file_set_names = list(file_set_names or [None])
+        for name in self.file_set_names:
+            _get_manager(name)  # before the workers are forked
+        _results_cache = results_cache
+        self.results_cache = results_cache
+        self.workers = max(1, int(workers or 1))
+        self.requests = 0
+        self.httpd = None
+        self.socket_path = None
+        self._lock = threading.Lock()
+        self.pool = self._start_pool()
+
+    def _start_pool(self):
+        if self.workers == 1:
+            # one thread: HDF5 & SQLite calls are made from one thread
+            return concurrent.futures.ThreadPoolExecutor(1)
+        methods = multiprocessing.get_all_start_methods()
+        if "fork" in methods:
+            # workers inherit the NXDL file sets already loaded
+            return concurrent.futures.ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("fork")
+            )
+        return concurrent.futures.ProcessPoolExecutor(
+            self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.file_set_names, self.results_cache),
+        )
+
+    def status(self):
+        """Describe the server (dict)."""
+        return dict(
+            file_sets=[m.nxdl_file_set.ref for m in _managers.values()],
+            workers=self.workers,
+            requests=self.requests,
+            pid=os.getpid(),
+        )
+
+    def validate(self, request):
+        """
+        Yield the NDJSON report of each file named in *request* (dict).
+        """
+        files = _files(request)
+        file_set_name = request.get("file_set_name") or self.file_set_names[0]
+        statuses = _statuses(request.get("report"))
+        options = {k: request[k] for k in VALIDATOR_OPTIONS if k in request}
+        budget = request.get("time_budget")
+        if budget is not None:
+            budget = float(budget)
+        futures = [
+            self.submit(
+                fname,
+                file_set_name=file_set_name,
+                statuses=statuses,
+                time_budget=budget,
+                **options,
+            )
+            for fname in files
+        ]
+        self._count()
+        for future in futures:
+            yield future.result()
+
+    def submit(self, fname, file_set_name=None, **options):
+        """
+        Validate *fname* in a worker, return a future of its NDJSON report.
+
+        See :func:`validate_file` for the *options*.
+        """
+        return self.pool.submit(
+            validate_file,
+            fname,
+            file_set_name=file_set_name or self.file_set_names[0],
+            **options,
+        )
+
+    def tree(self, request):
+        """
+        Yield the tree (NDJSON line) of each file named in *request* (dict).
+        """
+        files = _files(request)
+        show_attributes = bool(request.get("show_attributes", True))
+        max_array_items = int(request.get("max_array_items", 5))
+        futures = [
+            self.pool.submit(tree_file, fname, show_attributes, max_array_items)
+            for fname in files
+        ]
+        self._count()
+        for future in futures:
+            yield future.result()
+
+    def serve(self, port=DEFAULT_PORT, socket_path=None, ready=None):
+        """
+        Answer requests until :meth:`shutdown` (or interrupted).
+
+        Listen on the Unix socket *socket_path* if given, else on
+        localhost *port*.  Call *ready* (if given) when listening.
+        """
+        if socket_path is not None:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)  # left by a server that stopped
+            self.httpd = UnixHTTPServer(socket_path, _RequestHandler)
+            self.socket_path = socket_path
+        else:
+            self.httpd = http.server.ThreadingHTTPServer(
+                (DEFAULT_HOST, port), _RequestHandler
+            )
+        self.httpd.punx_server = self
+        logger.info("punx server listening: %s", self.address)
+        if ready is not None:
+            ready(self)
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.httpd.server_close()
+            if self.socket_path is not None and os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    @property
+    def address(self):
+        """where the server listens: socket path or ``host:port``"""
+        if self.httpd is None:
+            return None
+        if self.socket_path is not None:
+            return self.socket_path
+        host, port = self.httpd.server_address[:2]
+        return f"{host}:{port}"
+
+    def shutdown(self):
+        """Stop answering requests (call from another thread)."""
+        if self.httpd is not None:
+            self.httpd.shutdown()
+
+    def close(self):
+        """Stop the workers."""
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+    def _count(self):
+        with self._lock:
+            self.requests += 1
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP on a Unix socket, a thread for each request"""
+
+    daemon_threads = True
+
+
+class _RequestHandler(http.server.BaseHTTPRequestHandler):
+    """answer one HTTP request, see the table in :mod:`~punx.server`"""
+
+    protocol_version = "HTTP/1.0"  # the response ends when the connection closes
+
+    def do_GET(self):
+        server = self.server.punx_server
+        if self.path.rstrip("/") == "/status":
+            self._respond(200, [json.dumps(server.status()) + "\n"])
+        else:
+            self._error(404, f"unknown path: {self.path}")
+
+    def do_POST(self):
+        server = self.server.punx_server
+        handlers = {"/validate": server.validate, "/tree": server.tree}
+        handler = handlers.get(self.path.rstrip("/"))
+        if handler is None:
+            self._error(404, f"unknown path: {self.path}")
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise RequestError("request must be a JSON object")
+            lines = handler(request)
+            first = next(lines, None)  # request errors are raised here
+        except (RequestError, ValueError) as exc:
+            self._error(400, str(exc))
+            return
+        self._respond(200, [] if first is None else _chain(first, lines))
+
+    def _respond(self, code, lines):
+        self.send_response(code)
+        self.send_header("Content-Type", NDJSON)
+        self.end_headers()
+        for line in lines:
+            self.wfile.write(line.encode("utf8"))
+            self.wfile.flush()
+
+    def _error(self, code, message):
+        self._respond(code, [json.dumps(dict(error=message)) + "\n"])
+
+    def address_string(self):
+        if isinstance(self.client_address, tuple) and len(self.client_address) > 0:
+            return self.client_address[0]
+        return "unix"
+
+    def log_message(self, format, *args):
+        logger.debug("%s %s", self.address_string(), format % args)
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+
+def _files(request):
+    files = request.get("files")
+    if isinstance(files, str):
+        files = [files]
+    if not isinstance(files, list) or len(files) == 0:
+        raise RequestError("no files named")
+    return [str(f) for f in files]
+
+
+def _statuses(report):
+    """keys of the statuses to report (or ``None`` for all)"""
+    if report in (None, ""):
+        return None
+    if isinstance(report, str):
+        report = report.split(",")
+    keys = [str(k).upper() for k in report]
+    unknown = [k for k in keys if k not in finding.VALID_STATUS_DICT]
+    if len(unknown) > 0:
+        raise RequestError(f"unknown status(es): {','.join(unknown)}")
+    return keys
@@ -0,0 +1,358 @@
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2023, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+write synthetic NeXus HDF5 files, to study how validation scales
+
+The same parameters and *seed* always write the same content.
+The structure of each file::
+
+    /                              @default
+      entry_N:NXentry              @default @attr_K
+        data:NXdata                @signal @attr_K
+          signal[dataset_size]     @attr_K   (chunks, compression)
+        group_N:NXcollection       @attr_K   (fanout groups, depth levels)
+          value_N[value_size]      @attr_K   (datasets in each group)
+          group_N:NXcollection ...
+        hard_link_N                (to a value_N, which gets @target)
+        soft_link_N                (to another value_N)
+        external_link_N            (to a dataset in FILE_external.h5)
+
+Each object is at a distinct address (also those reached by external
+links), so the validator catalogs every one of them.
+
+USAGE::
+
+    from punx import synthetic
+
+    # a file of about 100,000 objects (groups, datasets, attributes, links)
+    n = synthetic.write_file("big.h5", **synthetic.parameters_for(100_000))
+
+or from the command line::
+
+    python -m punx.synthetic big.h5 --objects 100000
+
+.. autosummary::
+
+   ~write_file
+   ~estimate_objects
+   ~count_objects
+   ~parameters_for
+   ~main
+
+"""
+
+import argparse
+import os
+import sys
+
+import h5py
+import numpy
+
+from . import utils
+
+DEFAULTS = dict(
+    entries=1,
+    depth=2,
+    fanout=3,
+    datasets=2,
+    attributes=1,
+    hard_links=0,
+    soft_links=0,
+    external_links=0,
+    dataset_size=100,
+    value_size=1,
+    chunks=None,
+    compression=None,
+    compression_opts=None,
+    seed=0,
+)
+MAX_FANOUT = 50
+WRITE_BLOCK = 1_000_000  # elements of a large dataset written at once
+logger = utils.setup_logger(__name__)
+
+
+def write_file(fname, **kwargs):
+    """
+    Write a synthetic NeXus HDF5 file, return the number of objects.
+
+    PARAMETERS (all optional)
+
+    entries int:
+        number of ``NXentry`` groups
+    depth int:
+        levels of ``NXcollection`` groups below each entry
+    fanout int:
+        number of subgroups in each group (of the levels)
+    datasets int:
+        number of datasets in each ``NXcollection`` group
+    attributes int:
+        number of extra attributes of each group and dataset
+    hard_links int:
+        number of hard links (NeXus links) in each entry
+    soft_links int:
+        number of soft links in each entry
+    external_links int:
+        number of external links in each entry (to datasets written in
+        companion file ``<fname>_external.h5``, next to *fname*)
+    dataset_size int:
+        number of elements of the (large) signal dataset of each entry
+    value_size int:
+        number of elements of each dataset in the ``NXcollection`` groups
+    chunks obj:
+        ``h5py`` chunks of the signal datasets:
+        ``None`` (default), ``True`` (automatic), or chunk length
+    compression str:
+        ``h5py`` compression of the signal datasets:
+        ``None`` (default), ``"gzip"``, or ``"lzf"``
+    compression_opts obj:
+        ``h5py`` compression options, such as the gzip level
+    seed int:
+        seed of the random numbers (values and choice of link targets)
+
+    The number of objects (counted as the validator catalogs them:
+    file root, groups, datasets, links, and attributes) is the same as
+    from :func:`estimate_objects` and :func:`count_objects`.
+    """
+    p = _parameters(kwargs)
+    rng = numpy.random.default_rng(p["seed"])
+    n_tree_datasets = _tree_groups(p) * p["datasets"]
+    if p["hard_links"] + p["soft_links"] > n_tree_datasets:
+        raise ValueError(
+            f"{p['hard_links']} hard and {p['soft_links']} soft links"
+            f" need as many datasets, only {n_tree_datasets} in each entry"
+        )
+
+    external_name = None
+    if p["external_links"] > 0:
+        external_name = _external_file_name(fname)
+        with h5py.File(external_name, "w") as ext:
+            for i in range(p["entries"]):
+                for k in range(p["external_links"]):
+                    ds = ext.create_dataset(
+                        f"entry_{i}_value_{k}",
+                        data=rng.random(p["value_size"]),
+                        track_times=False,
+                    )
+                    _add_attributes(ds, p, rng)
+
+    with h5py.File(fname, "w") as root:
+        root.attrs["default"] = "entry_0"
+        for i in range(p["entries"]):
+            entry = root.create_group(f"entry_{i}")
+            entry.attrs["NX_class"] = "NXentry"
+            entry.attrs["default"] = "data"
+            _add_attributes(entry, p, rng)
+
+            nxdata = entry.create_group("data")
+            nxdata.attrs["NX_class"] = "NXdata"
+            nxdata.attrs["signal"] = "signal"
+            _add_attributes(nxdata, p, rng)
+            _write_signal(nxdata, p, rng)
+
+            values = []  # addresses of all datasets in the tree
+            _write_tree(entry, p, rng, 1, values)
+
+            # distinct targets, so each link is counted alike
+            chosen = rng.choice(
+                len(values), p["hard_links"] + p["soft_links"], replace=False
+            )
+            for k, j in enumerate(chosen[: p["hard_links"]]):
+                target = entry[values[j]]
+                target.attrs["target"] = target.name
+                entry[f"hard_link_{k}"] = target
+            for k, j in enumerate(chosen[p["hard_links"]:]):
+                entry[f"soft_link_{k}"] = h5py.SoftLink(entry[values[j]].name)
+            for k in range(p["external_links"]):
+                entry[f"external_link_{k}"] = h5py.ExternalLink(
+                    os.path.basename(external_name), f"/entry_{i}_value_{k}"
+                )
+
+    return estimate_objects(**p)
+
+
+def estimate_objects(**kwargs):
+    """
+    Return the number of objects :func:`write_file` writes (same parameters).
+
+    Each group, dataset, link, and attribute is one object.  An item
+    reached by a link is counted again (with its attributes), as the
+    validator catalogs it again.
+    """
+    p = _parameters(kwargs)
+    a = p["attributes"]
+    groups = _tree_groups(p)
+    per_entry = (
+        (3 + a)  # entry: NX_class, default
+        + (3 + a)  # NXdata: NX_class, signal
+        + (1 + a)  # signal dataset
+        + groups * (2 + a)  # NXcollection: NX_class
+        + groups * p["datasets"] * (1 + a)
+        + p["hard_links"] * (3 + a)  # @target, at link and at its target
+        + p["soft_links"] * (1 + a)
+        + p["external_links"] * (1 + a)
+    )
+    return 2 + p["entries"] * per_entry  # root: default
+
+
+def count_objects(fname):
+    """
+    Return the number of objects in HDF5 file *fname*.
+
+    Counts as the validator catalogs the file: the root, each item
+    (following links), and each attribute.
+    """
+
+    def count(group):
+        n = 1 + len(group.attrs)
+        for name in group:
+            obj = group.get(name)
+            if obj is None:
+                continue  # dangling link
+            if isinstance(obj, h5py.Group):
+                n += count(obj)
+            else:
+                n += 1 + len(obj.attrs)
+        return n
+
+    with h5py.File(fname, "r") as root:
+        return count(root)
+
+
+def parameters_for(objects, **kwargs):
+    """
+    Return :func:`write_file` parameters for about *objects* objects.
+
+    The *depth* (at most that given, default 2) and *fanout* of the
+    groups are chosen first, then the number of *entries*.
+    The other parameters (as given or default) are not changed.
+    """
+    p = _parameters(kwargs)
+    candidates = []
+    for depth in range(p["depth"] + 1):
+        for fanout in range(1, MAX_FANOUT + 1):
+            trial = dict(p, entries=1, depth=depth, fanout=fanout)
+            if _tree_groups(trial) * p["datasets"] < p["hard_links"] + p["soft_links"]:
+                continue
+            candidates.append((abs(estimate_objects(**trial) - objects), trial))
+            if depth == 0:
+                break  # fanout does not matter
+    if len(candidates) == 0:
+        raise ValueError("too many links for the depth given")
+    best = min(candidates, key=lambda c: c[0])[1]
+    per_entry = estimate_objects(**best) - 2
+    best["entries"] = max(1, int(round((objects - 2) / per_entry)))
+    return best
+
+
+def _parameters(kwargs):
+    unknown = set(kwargs) - set(DEFAULTS)
+    if len(unknown) > 0:
+        raise KeyError(f"unknown parameter(s): {', '.join(sorted(unknown))}")
+    p = dict(DEFAULTS)
+    p.update(kwargs)
+    return p
+
+
+def _tree_groups(p):
+    """number of NXcollection groups in each entry"""
+    return sum(p["fanout"] ** k for k in range(1, p["depth"] + 1))
+
+
+def _external_file_name(fname):
+    return os.path.splitext(fname)[0] + "_external.h5"
+
+
+def _add_attributes(obj, p, rng):
+    for k in range(p["attributes"]):
+        obj.attrs[f"attr_{k}"] = int(rng.integers(0, 1000))
+
+
+def _write_signal(nxdata, p, rng):
+    """write the (large) signal dataset, a block at a time"""
+    n = p["dataset_size"]
+    chunks = p["chunks"]
+    if isinstance(chunks, int) and not isinstance(chunks, bool):
+        chunks = (min(chunks, max(n, 1)),)
+    ds = nxdata.create_dataset(
+        "signal",
+        shape=(n,),
+        dtype="float64",
+        chunks=chunks,
+        compression=p["compression"],
+        compression_opts=p["compression_opts"],
+        track_times=False,
+    )
+    for start in range(0, n, WRITE_BLOCK):
+        stop = min(start + WRITE_BLOCK, n)
+        ds[start:stop] = rng.random(stop - start)
+    _add_attributes(ds, p, rng)
+
+
+def _write_tree(group, p, rng, level, values):
+    """write the NXcollection groups (and their datasets) below *group*"""
+    if level > p["depth"]:
+        return
+    for i in range(p["fanout"]):
+        subgroup = group.create_group(f"group_{i}")
+        subgroup.attrs["NX_class"] = "NXcollection"
+        _add_attributes(subgroup, p, rng)
+        for j in range(p["datasets"]):
+            ds = subgroup.create_dataset(
+                f"value_{j}", data=rng.random(p["value_size"]), track_times=False
+            )
+            _add_attributes(ds, p, rng)
+            values.append(ds.name.split("/", 2)[-1])  # relative to the entry
+        _write_tree(subgroup, p, rng, level + 1, values)
+
+
+def main(argv=None):
+    """write a synthetic file from the command line"""
+    p = argparse.ArgumentParser(
+        prog="python -m punx.synthetic",
+        description=__doc__.strip().splitlines()[0],
+    )
+    p.add_argument("fname", help="name of the HDF5 file to write")
+    p.add_argument(
+        "-n",
+        "--objects",
+        type=int,
+        help="choose entries, depth, and fanout for about this many objects",
+    )
+    for key, default in DEFAULTS.items():
+        if key in ("chunks", "compression", "compression_opts"):
+            continue
+        p.add_argument(
+            "--" + key.replace("_", "-"),
+            type=int,
+            default=default,
+            dest=key,
+            help=f"default: {default}",
+        )
+    p.add_argument("--chunks", type=int, help="chunk length of the signal datasets")
+    p.add_argument(
+        "--compression",
+        choices=["gzip", "lzf"],
+        help="compression of the signal datasets",
+    )
+    p.add_argument("--compression-opts", type=int, dest="compression_opts")
+    args = vars(p.parse_args(argv))
+
+    fname = args.pop("fname")
+    objects = args.pop("objects")
+    if objects is not None:
+        args = parameters_for(objects, **args)
+    n = write_file(fname, **args)
+    print(f"{fname}: {n} objects")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
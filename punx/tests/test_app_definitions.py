@@ -0,0 +1,214 @@
+"""
+application definitions: compiled requirements, matched to a data file
+"""
+
+import h5py
+import numpy
+
+from .. import app_definitions
+from .. import finding
+from .. import nxdl_manager
+from .. import validate
+from ..validations import application_definition
+from ._core import hfile
+
+TEST_NAMES = ("NXDL group", "NXDL field", "NXDL attribute", "NXDL link")
+
+
+def test_requirement_tree():
+    manager = nxdl_manager.NXDL_Manager("v3.3")
+    tree = manager.requirement_tree("NXcanSAS")
+    assert manager.requirement_tree("NXcanSAS") is tree  # compiled once
+    assert manager.requirement_tree("NXunknown") is None
+
+    requirements = {r.nxdl_path: r for r in tree.walk()}
+    entry = requirements["/NXentry"]
+    assert entry.nx_class == "NXentry"
+    assert entry.name is None
+    title = requirements["/NXentry/title"]
+    assert (title.min_occurs, title.max_occurs) == (1, 1)
+    run = requirements["/NXentry/run"]
+    assert run.flexible
+    assert run.max_occurs is app_definitions.UNBOUNDED
+    instrument = requirements["/NXentry/NXinstrument"]
+    assert not instrument.required
+    units = requirements["/NXentry/NXdata/Q@units"]
+    assert units.required
+    assert units.enumerations == frozenset(("1/m", "1/nm", "1/angstrom"))
+    assert not requirements["/NXentry/NXdata/Q@uncertainties"].required
+    # two NXdata groups (SASdata and SAStransmission_spectrum)
+    assert [g.nx_class for g in entry.groups].count("NXdata") == 2
+
+
+def write_entry(hfile):
+    with h5py.File(hfile, "w") as root:
+        entry = root.create_group("sasentry")
+        entry.attrs["NX_class"] = "NXentry"
+        entry.attrs["canSAS_class"] = "SASentry"
+        entry.attrs["version"] = "1.0"
+        entry["definition"] = "NXcanSAS"
+        entry["title"] = "test"
+        entry["run"] = "1"
+        data = entry.create_group("sasdata")
+        data.attrs["NX_class"] = "NXdata"
+        data.attrs["canSAS_class"] = "SASdata"
+        data.attrs["signal"] = "I"
+        data.attrs["I_axes"] = "Q"
+        data.attrs["Q_indices"] = 0
+        data["Q"] = numpy.linspace(0.01, 0.1, 5)
+        data["Q"].attrs["units"] = "1/A"  # not allowed
+        data["I"] = numpy.ones(5)
+        data["I"].attrs["units"] = "1/cm"
+        data["Qdev"] = numpy.zeros(5)  # optional, but then needs @units
+        # transmission spectrum: the other NXdata of NXcanSAS
+        trans = entry.create_group("transmission")
+        trans.attrs["NX_class"] = "NXdata"
+        trans.attrs["canSAS_class"] = "SAStransmission_spectrum"
+        trans.attrs["signal"] = "T"
+        trans["T"] = numpy.ones(5)
+
+
+def test_application_definition(hfile):
+    write_entry(hfile)
+    validator = validate.Data_File_Validator("v3.3")
+    validator.validate(hfile)
+    validator.close()
+    findings = {
+        (f.h5_address, f.comment): f.status
+        for f in validator.validations
+        if f.test_name.startswith(TEST_NAMES)
+    }
+
+    def status(address, comment):
+        return findings.get((address, "NXcanSAS:" + comment))
+
+    assert status("/sasentry/title", "/NXentry/title found") == finding.OK
+    assert status("/sasentry/sasdata", "/NXentry/NXdata found") == finding.OK
+    assert (
+        status(
+            "/sasentry/sasdata/Q@units",
+            "/NXentry/NXdata/Q@units has value: 1/A, not: 1/angstrom | 1/m | 1/nm",
+        )
+        == finding.ERROR
+    )
+    assert (
+        status(
+            "/sasentry/sasdata/I@units",
+            "/NXentry/NXdata/I@units has expected value: 1/cm",
+        )
+        == finding.OK
+    )
+    assert (
+        status("/sasentry/sasdata/Qdev", "/NXentry/NXdata/Qdev@units (required) not found")
+        == finding.ERROR
+    )
+    assert (
+        status("/sasentry/sasdata@Q_indices", "/NXentry/NXdata@Q_indices found")
+        == finding.OK
+    )
+    # matched to its own spec, not to SASdata
+    assert (
+        status("/sasentry/transmission/T", "/NXentry/NXdata/T found") == finding.OK
+    )
+    assert (
+        status("/sasentry/transmission", "/NXentry/NXdata/Tdev (required) not found")
+        == finding.ERROR
+    )
+    assert (
+        status("/sasentry/transmission", "/NXentry/NXdata/I (required) not found")
+        is None
+    )
+    # optional, not found: not reported
+    assert not any(
+        "NXsample" in comment or "@mask" in comment for _address, comment in findings
+    )
+
+
+def detections(hfile):
+    validator = validate.Data_File_Validator("v3.3")
+    validator.validate(hfile)
+    validator.close()
+    return [
+        f.comment
+        for f in validator.validations
+        if f.test_name == application_definition.DETECTION_TEST_NAME
+    ]
+
+
+def test_definition_index():
+    manager = nxdl_manager.NXDL_Manager("v3.3")
+    index = manager.definition_index()
+    assert manager.definition_index() is index  # built once
+    assert index.required["NXcanSAS"] == frozenset(
+        (
+            "/NXentry/title",
+            "/NXentry/NXdata",
+            "/NXentry/NXdata/I",
+            "/NXentry/NXdata/I@units",
+            "/NXentry/NXdata/Q",
+            "/NXentry/NXdata/Q@units",
+        )
+    )
+    assert "NXcanSAS" in index.definitions["/NXentry/NXdata/Q@units"]
+    assert app_definitions.DEFINITION_CLASSPATH not in index.definitions
+
+    ranking = index.rank(index.required["NXcanSAS"])
+    assert ranking[0] == ("NXcanSAS", 6, 6)
+    assert index.rank(["/NXentry/no_such_field"]) == []
+
+
+def test_detection(hfile):
+    write_entry(hfile)
+    assert detections(hfile) == []  # satisfies its own definition
+
+    with h5py.File(hfile, "a") as root:
+        del root["/sasentry/definition"]
+    assert detections(hfile)[0] == (
+        "candidate application definition: NXcanSAS (6 of 6 required class paths)"
+    )
+
+    with h5py.File(hfile, "a") as root:
+        root["/sasentry/definition"] = "NXtomo"  # not this one
+    comments = detections(hfile)
+    assert comments[0].startswith("NXtomo has ")
+    assert comments[1] == (
+        "candidate application definition: NXcanSAS (6 of 6 required class paths)"
+    )
+
+
+def test_any_name_fields(hfile):
+    write_entry(hfile)
+    with h5py.File(hfile, "a") as root:
+        entry = root["/sasentry"]
+        del entry["run"]
+        entry["run_0"] = "1"
+        entry["run_1"] = "2"
+    validator = validate.Data_File_Validator("v3.3")
+    validator.validate(hfile)
+    validator.close()
+    found = [
+        (f.h5_address, f.status)
+        for f in validator.validations
+        if f.test_name == "NXDL field" and f.comment.startswith("NXcanSAS:/NXentry/run")
+    ]
+    # run (nameType="any"): each field not named by NXcanSAS
+    assert ("/sasentry/run_0", finding.OK) in found
+    assert ("/sasentry/run_1", finding.OK) in found
+    assert ("/sasentry/title", finding.OK) not in found
+    assert all(status == finding.OK for _address, status in found)
+
+
+def test_extends():
+    manager = nxdl_manager.NXDL_Manager("v3.3")
+    base = set(r.nxdl_path for r in manager.requirement_tree("NXxbase").walk())
+    rot = {r.nxdl_path: r for r in manager.requirement_tree("NXxrot").walk()}
+    assert base <= set(rot)  # NXxrot extends NXxbase
+    # the NXdata of NXxbase is named by NXxrot: one group, members of both
+    assert "/NXentry/NXdata/data" in rot
+    assert "/NXentry/NXdata/rotation_angle" in rot
+    entry = rot["/NXentry"]
+    assert [g.nx_class for g in entry.groups].count("NXdata") == 1
+    assert rot["/NXentry/NXsample/rotation_angle"].required
+
+    laue = set(r.nxdl_path for r in manager.requirement_tree("NXxlaue").walk())
+    assert set(rot) <= laue  # NXxlaue extends NXxrot
@@ -0,0 +1,128 @@
+import os
+import pickle
+import shutil
+import threading
+
+import pytest
+
+from .. import batch
+from .. import finding
+from .. import nxdl_manager
+from .. import validate
+from ._core import EXAMPLE_DATA_DIR
+from ._core import tempdir
+
+TEST_FILES = "writer_1_3.hdf5 writer_2_1.hdf5 chopper.nxs".split()
+
+
+@pytest.fixture(scope="function")
+def data_dir(tempdir):
+    for name in TEST_FILES:
+        shutil.copy(os.path.join(EXAMPLE_DATA_DIR, name), tempdir)
+    with open(os.path.join(tempdir, "notes.txt"), "w") as f:
+        f.write("not an HDF5 file\n")
+    yield tempdir
+
+
+def test_status_pickle():
+    for status in finding.VALID_STATUS_LIST:
+        assert pickle.loads(pickle.dumps(status)) is status
+
+    f = finding.Finding("/entry", "test", finding.WARN, "comment")
+    f2 = pickle.loads(pickle.dumps(f))
+    assert f2.status is finding.WARN
+    assert f2.h5_address == f.h5_address
+
+
+def test_expand_paths(data_dir):
+    names = batch.expand_paths(data_dir)
+    assert len(names) == len(TEST_FILES)  # notes.txt is not HDF5
+    assert names == sorted(names)
+
+    names = batch.expand_paths([os.path.join(data_dir, "*.hdf5"), data_dir])
+    assert len(names) == len(TEST_FILES)  # no duplicates
+
+    names = batch.expand_paths(os.path.join(data_dir, "writer_*.hdf5"))
+    assert len(names) == 2
+
+    # named directly: kept so the validation reports the problem
+    names = batch.expand_paths(os.path.join(data_dir, "notes.txt"))
+    assert len(names) == 1
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_validate_files(workers, data_dir):
+    manager = nxdl_manager.NXDL_Manager()
+    paths = [data_dir, os.path.join(data_dir, "notes.txt")]
+    results = list(batch.validate_files(paths, workers=workers, manager=manager))
+    assert len(results) == len(TEST_FILES) + 1
+    assert sorted(r.index for r in results) == list(range(len(results)))
+
+    for result in results:
+        if result.fname.endswith("notes.txt"):
+            assert not result.ok
+            assert result.error == "could not open as HDF5"
+            continue
+        assert result.ok
+
+        # same findings as with a validator of its own
+        validator = validate.Data_File_Validator(manager=manager)
+        validator.validate(result.fname)
+        assert len(result.findings) == len(validator.validations)
+        assert result.summary == validator.finding_summary()
+        for status in result.summary:
+            assert status in finding.VALID_STATUS_LIST
+        validator.close()
+
+    table = str(batch.summary_table(results))
+    assert "TOTAL" in table
+    assert "could not open as HDF5" in table
+
+
+def test_timeout(data_dir):
+    results = list(
+        batch.validate_files(
+            os.path.join(data_dir, "chopper.nxs"), timeout=1e-4
+        )
+    )
+    assert len(results) == 1
+    assert not results[0].ok
+    assert results[0].error.startswith("timeout")
+
+
+def test_timeout_by_parent(data_dir, monkeypatch):
+    # no SIGALRM (such as on Windows): the worker is stopped by the parent
+    monkeypatch.setattr(batch, "_can_use_alarm", lambda: False)
+    monkeypatch.setattr(batch, "TIMEOUT_GRACE", 0)
+    paths = [os.path.join(data_dir, name) for name in TEST_FILES]
+    results = list(batch.validate_files(paths, timeout=1e-3))
+    assert len(results) == len(TEST_FILES)
+    assert sorted(r.index for r in results) == list(range(len(TEST_FILES)))
+    for result in results:
+        assert result.error == "timeout: exceeded 0.001 s"
+
+
+def test_timeout_in_thread(data_dir):
+    # SIGALRM only in the main thread: validated in a worker process
+    results = []
+    path = os.path.join(data_dir, "chopper.nxs")
+    thread = threading.Thread(
+        target=lambda: results.extend(batch.validate_files(path, timeout=1e-4))
+    )
+    thread.start()
+    thread.join()
+    assert len(results) == 1
+    assert results[0].error.startswith("timeout")
+
+
+def test_concurrent_calls(data_dir):
+    # each call has its own settings (no module globals)
+    manager = nxdl_manager.NXDL_Manager()
+    path = os.path.join(data_dir, "writer_1_3.hdf5")
+    all_statuses = batch.validate_files(path, manager=manager)
+    only_errors = batch.validate_files(path, manager=manager, statuses=["ERROR"])
+    first = next(all_statuses)
+    second = next(only_errors)
+    statuses = set(f.status for f in first.findings)
+    assert len(statuses) > 1
+    assert set(f.status for f in second.findings) <= {finding.ERROR}
@@ -0,0 +1,79 @@
+"""
+benchmarks of NXDL loading and data file validation
+"""
+
+import os
+
+from .. import benchmark
+from .. import nxdl_manager
+from ._core import EXAMPLE_DATA_DIR
+from ._core import tempdir
+
+EXAMPLE = os.path.join(EXAMPLE_DATA_DIR, "writer_1_3.hdf5")
+
+
+def test_measure():
+    calls = []
+
+    def func():
+        calls.append(1)
+        return 10
+
+    result = benchmark.measure("counter", func, repeat=3)
+    assert len(calls) == 3 + 1  # one more for the peak memory
+    assert result.error is None
+    assert result.items == 10
+    assert result.rate > 0
+    assert result.peak_bytes >= 0
+
+    def broken():
+        raise ValueError("first line\nsecond line")
+
+    result = benchmark.measure("broken", broken)
+    assert result.seconds is None
+    assert result.error == "ValueError: first line"
+
+
+def test_compare():
+    baseline = {
+        "fast": dict(seconds=1.0, peak_bytes=10e6),
+        "hungry": dict(seconds=1.0, peak_bytes=10e6),
+        "tiny": dict(seconds=0.0001, peak_bytes=1000),
+    }
+    results = [
+        benchmark.Benchmark("fast", 0.5, None, 10e6),
+        benchmark.Benchmark("hungry", 1.0, None, 30e6),
+        benchmark.Benchmark("tiny", 0.003, None, 5000),  # within the noise
+        benchmark.Benchmark("new", 1.0, None, 1),
+    ]
+    ratios = benchmark.compare(results, baseline, threshold=1.5)
+    assert ratios["fast"] == (0.5, 1.0, False)
+    assert ratios["hungry"] == (1.0, 3.0, True)
+    assert ratios["tiny"] == (1.0, 1.0, False)
+    assert "new" not in ratios
+    assert "no baseline" in str(benchmark.report(results, ratios))
+
+
+def test_baseline(tempdir):
+    # another file set selected first: each is loaded with its own XML Schema
+    nxdl_manager.NXDL_Manager("v3.3")
+    fname = os.path.join(tempdir, "baseline.json")
+    args = ["--no-cold", "-n", "1", "-f", "v2018.5", EXAMPLE]
+    assert benchmark.main(args + ["--save", fname]) == 0
+    baseline = benchmark.read_baseline(fname)
+    assert "nxdl_manager.warm:v2018.5" in baseline
+    assert baseline["validate:writer_1_3.hdf5"]["items"] > 0
+    assert baseline["h5tree:writer_1_3.hdf5"]["seconds"] > 0
+
+    assert benchmark.main(args + ["--baseline", fname, "--threshold", "1e6"]) == 0
+    assert benchmark.main(args + ["--baseline", fname, "--threshold", "0"]) == 1
+
+
+def test_errors_reported(tempdir):
+    fname = os.path.join(tempdir, "baseline.json")
+    missing = os.path.join(tempdir, "no_such_file.h5")
+    args = ["--no-cold", "-n", "1", "-f", "v2018.5", missing, "--save", fname]
+    assert benchmark.main(args) == 1
+    baseline = benchmark.read_baseline(fname)
+    assert baseline["validate:no_such_file.h5"]["error"].startswith("FileNotFound")
+    assert baseline["nxdl_manager.warm:v2018.5"]["error"] is None
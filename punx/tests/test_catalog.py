@@ -0,0 +1,81 @@
+"""
+catalog the items of large files on disk (spill)
+"""
+
+import os
+
+import h5py
+import pytest
+
+from .. import catalog
+from .. import validate
+from ._core import EXAMPLE_DATA_DIR
+from ._core import hfile
+
+
+def findings(fname, tmp_path, **kwargs):
+    validator = validate.Data_File_Validator(spill_directory=str(tmp_path), **kwargs)
+    validator.validate(fname)
+    result = (
+        sorted(map(str, validator.validations)),
+        validator.finding_classpaths(),
+        validator.catalog.spilled,
+    )
+    validator.close()
+    return result
+
+
+@pytest.mark.parametrize(
+    "name", ["writer_1_3.hdf5", "writer_2_1.hdf5", "Qx_rank4_test_data.h5"]
+)
+def test_spill(name, tmp_path, monkeypatch):
+    fname = os.path.join(EXAMPLE_DATA_DIR, name)
+    in_memory = findings(fname, tmp_path, spill_threshold=None)
+    assert not in_memory[2]
+
+    # few items in memory: most are made again when looked up
+    monkeypatch.setattr(catalog, "ITEM_CACHE_SIZE", 2)
+    monkeypatch.setattr(catalog, "PAGE_SIZE", 3)
+    on_disk = findings(fname, tmp_path, spill_threshold=5)
+    assert on_disk[2]
+    assert on_disk[:2] == in_memory[:2]
+    assert os.listdir(tmp_path) == []  # removed when closed
+
+
+def test_lookups(hfile, tmp_path):
+    with h5py.File(hfile, "w") as root:
+        entry = root.create_group("entry")
+        entry.attrs["NX_class"] = "NXentry"
+        data = entry.create_group("data")
+        data.attrs["NX_class"] = "NXdata"
+        data["x"] = [1.0, 2.0]
+        data["y"] = [1.0, 2.0]
+        entry["x"] = h5py.SoftLink("/entry/data/x")
+
+    validator = validate.Data_File_Validator(
+        spill_threshold=3, spill_directory=str(tmp_path)
+    )
+    validator.validate(hfile)
+    assert validator.catalog.spilled
+    assert len(os.listdir(tmp_path)) == 1
+
+    addresses = validator.addresses
+    assert addresses["/entry/data"].classpath == "/NXentry/NXdata"
+    assert addresses.get("/no/such") is None
+    assert "/entry/data@NX_class" in addresses
+    assert list(addresses)[:3] == ["/", "/entry", "/entry@NX_class"]
+    assert "/entry/x" in validator.address_set  # reached by the soft link
+    assert "/entry/y" not in validator.address_set
+    assert [v.name for v in validator.children["/entry/data"]] == [
+        "NX_class",
+        "x",
+        "y",
+    ]
+    assert "/entry/data/x" not in validator.children  # a dataset
+    assert len(validator.classpaths["/NXentry/NXdata/x"]) == 1
+    assert validator.attribute_classpaths["NX_class"] == [
+        "/NXentry@NX_class",
+        "/NXentry/NXdata@NX_class",
+    ]
+    validator.close()
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,68 @@
+"""
+bounded reads of dataset values
+"""
+
+import h5py
+import numpy
+
+from .. import dataset_values
+from .. import h5tree
+from .. import validate
+from ._core import hfile
+
+
+def write_values_file(hfile, n=5000):
+    with h5py.File(hfile, "w") as root:
+        root["scalar"] = b"NXmx"
+        root["array"] = numpy.array([b"ab", b"abcd", b"abc"])
+        root["big"] = numpy.array([b"x" * (i % 7 + 1) for i in range(n)])
+        root["table"] = numpy.arange(n * 4).reshape(n, 4)
+        root["empty"] = numpy.array([], dtype="S4")
+
+
+def test_first(hfile):
+    write_values_file(hfile)
+    values = dataset_values.DatasetValues()
+    with h5py.File(hfile, "r") as root:
+        assert values.first(root["scalar"]) == "NXmx"
+        assert values.first(root["array"]) == "ab"
+        assert list(values.first(root["table"])) == [0, 1, 2, 3]
+        assert values.first(root["empty"]) is None
+        assert values.reads == 3
+
+        # remembered, no more reads
+        assert values.first(root["array"]) == "ab"
+        assert values.reads == 3
+
+
+def test_head(hfile):
+    write_values_file(hfile)
+    values = dataset_values.DatasetValues(max_elements=100)
+    with h5py.File(hfile, "r") as root:
+        value, complete = values.head(root["table"])
+        assert value.shape == (25, 4)
+        assert not complete
+        value, complete = values.head(root["array"])
+        assert len(value) == 3
+        assert complete
+
+        # whole dataset already read
+        assert values.read(root["array"]) is value
+        assert values.reads == 2
+
+        sizes = values.item_sizes(root["big"])
+        assert len(sizes) == 5000
+        assert sizes[:8] == [1, 2, 3, 4, 5, 6, 7, 1]
+        assert sizes[100:] == [7] * 4900  # from the dtype
+        assert values.item_sizes(root["array"]) == [2, 4, 3]
+
+
+def test_tree_and_validator(hfile):
+    write_values_file(hfile, n=10)
+    lines = h5tree.Hdf5TreeView(hfile).report()
+    assert '  array:char[2,4,3] = ["ab", "abcd", "abc"]' in lines
+
+    validator = validate.Data_File_Validator()
+    validator.validate(hfile)
+    assert isinstance(validator.dataset_values, dataset_values.DatasetValues)
+    validator.close()
@@ -0,0 +1,108 @@
+"""
+deadline-bounded validation
+"""
+
+import collections
+import time
+
+import h5py
+
+from .. import validate
+from ._core import hfile
+
+
+def write_many_logs(hfile, n_logs):
+    with h5py.File(hfile, "w") as root:
+        root.attrs["default"] = "entry"
+        nxentry = root.create_group("entry")
+        nxentry.attrs["NX_class"] = "NXentry"
+        nxentry.attrs["default"] = "data"
+        nxentry.create_dataset("definition", data="NXarpes")
+        nxdata = nxentry.create_group("data")
+        nxdata.attrs["NX_class"] = "NXdata"
+        nxdata.attrs["signal"] = "counts"
+        nxdata.create_dataset("counts", data=[1, 2, 3])
+        nxcollection = nxentry.create_group("logs")
+        nxcollection.attrs["NX_class"] = "NXcollection"
+        for i in range(n_logs):
+            nxlog = nxcollection.create_group(f"log_{i}")
+            nxlog.attrs["NX_class"] = "NXlog"
+            nxlog.create_dataset("value", data=[i])
+
+
+def findings_of(validator):
+    return collections.Counter(
+        (f.h5_address, f.test_name, f.status.key, f.comment)
+        for f in validator.validations
+    )
+
+
+def test_no_deadline_reached(hfile):
+    write_many_logs(hfile, 5)
+    validator = validate.Data_File_Validator()
+    validator.validate(hfile)
+    full = findings_of(validator)
+
+    validator.validate(hfile, deadline=time.time() + 1000)
+    assert not validator.timed_out
+    assert len(validator.uncovered) == 0
+    assert findings_of(validator) == full
+    validator.close()
+
+
+def test_deadline_passed(hfile):
+    write_many_logs(hfile, 5)
+    validator = validate.Data_File_Validator()
+    validator.validate(hfile, deadline=time.time() - 1)
+    assert validator.timed_out
+    assert list(validator.uncovered.keys()) == [
+        validate.PHASE_APPLICATION_DEFINITIONS,
+        validate.PHASE_DEFAULT_PLOT,
+        validate.PHASE_GROUPS,
+        validate.PHASE_ITEMS,
+    ]
+    assert validator.uncovered[validate.PHASE_APPLICATION_DEFINITIONS] == ["/entry"]
+    assert validator.uncovered[validate.PHASE_ITEMS] is None  # not started
+    assert len(validator.validations) == 0
+    validator.close()
+
+
+def test_partial(hfile, monkeypatch, capsys):
+    n_logs = 20
+    write_many_logs(hfile, n_logs)
+
+    # a clock that advances one second each time it is read
+    clock = iter(range(1000000))
+    monkeypatch.setattr(validate.time, "time", lambda: next(clock))
+
+    validator = validate.Data_File_Validator()
+    validator.validate(hfile, deadline=10)
+    assert validator.timed_out
+    assert validate.PHASE_APPLICATION_DEFINITIONS not in validator.uncovered
+    assert validate.PHASE_DEFAULT_PLOT not in validator.uncovered
+    subtrees = validator.uncovered[validate.PHASE_GROUPS]
+    assert 0 < len(subtrees) < n_logs
+    assert all(addr.startswith("/entry/logs/log_") for addr in subtrees)
+    assert validator.uncovered[validate.PHASE_ITEMS] is None
+
+    test_names = set(f.test_name for f in validator.validations)
+    assert "NeXus default plot" in test_names
+    assert "NeXus application definition" in test_names
+
+    validator.print_report()
+    out = capsys.readouterr().out
+    assert "PARTIAL validation: time budget exhausted" in out
+    assert f"{validate.PHASE_ITEMS}: not started" in out
+    assert "summary statistics (PARTIAL" in out
+    validator.close()
+
+
+def test_subtrees(hfile):
+    write_many_logs(hfile, 3)
+    validator = validate.Data_File_Validator()
+    validator.validate(hfile)
+    items = list(validator.addresses.values())
+    start = [v.h5_address for v in items].index("/entry/logs")
+    assert validate._subtrees(items[start:]) == ["/entry/logs"]
+    assert validate._subtrees(items) == ["/"]
+    validator.close()
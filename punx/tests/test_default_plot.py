@@ -0,0 +1,173 @@
+"""
+default plot: a verdict for each NXentry and NXsubentry
+"""
+
+import h5py
+import numpy
+
+from .. import finding
+from .. import validate
+from ..validations import default_plot
+from ._core import hfile
+
+
+def add_data(group, name="data", signal="y", axes=None, **indices):
+    nxdata = group.create_group(name)
+    nxdata.attrs["NX_class"] = "NXdata"
+    nxdata.attrs["signal"] = signal
+    nxdata["x"] = numpy.arange(5.0)
+    nxdata["y"] = numpy.ones(5)
+    if axes is not None:
+        nxdata.attrs["axes"] = axes
+    for k, v in indices.items():
+        nxdata.attrs[k] = v
+    return nxdata
+
+
+def add_entry(group, name, nx_class="NXentry", default=None):
+    entry = group.create_group(name)
+    entry.attrs["NX_class"] = nx_class
+    if default is not None:
+        entry.attrs["default"] = default
+    return entry
+
+
+def verdicts(hfile):
+    validator = validate.Data_File_Validator()
+    validator.validate(hfile)
+    validator.close()
+    result = {
+        f.h5_address: (f.status, f.comment)
+        for f in validator.validations
+        if f.test_name in (default_plot.TEST_ENTRY, default_plot.TEST_NAME)
+    }
+    return result
+
+
+def test_entries(hfile):
+    with h5py.File(hfile, "w") as root:
+        root.attrs["default"] = "entry"
+        entry = add_entry(root, "entry", default="data")
+        add_data(entry, axes="x", x_indices=0)
+        # no @default: its only NXdata
+        add_data(add_entry(root, "fallback"), axes=["x"], x_indices=3)
+        # @default names an NXsubentry, at some depth
+        sub = add_entry(add_entry(root, "outer", default="sub"), "sub", "NXsubentry")
+        sub.attrs["default"] = "plot"
+        add_data(sub, name="plot", axes="q")
+        add_entry(root, "broken", default="no_such_group")
+        add_data(add_entry(root, "bad_signal"), signal="z")
+        add_entry(root, "empty")
+        cycle = add_entry(root, "cycle", default="sub")
+        add_entry(cycle, "sub", "NXsubentry", default="subsub")
+        add_entry(cycle["sub"], "subsub", "NXsubentry", default="nothing")
+
+    result = verdicts(hfile)
+    # NIAC2014 (@default from the root): the @signal attribute
+    assert result["/"] == (finding.OK, "found by v3: /entry/data@signal")
+    assert result["/entry"] == (
+        finding.OK,
+        "@default=data: /entry/data/y (v3), axes: x",
+    )
+    assert result["/fallback"] == (
+        finding.WARN,
+        "no @default: /fallback/data/y (v3), axes: x;"
+        " @x_indices=[3]: signal has rank 1",
+    )
+    assert result["/outer"] == (
+        finding.WARN,
+        "@default=sub: @default=plot: /outer/sub/plot/y (v3); @axes: no field q",
+    )
+    assert result["/outer/sub"][1].startswith("@default=plot: ")
+    assert result["/broken"] == (
+        finding.ERROR,
+        "@default=no_such_group: no such group",
+    )
+    assert result["/bad_signal"] == (
+        finding.ERROR,
+        "no @default: @signal=z: field described by @signal does not exist",
+    )
+    assert result["/empty"] == (finding.NOTE, "no default plot described")
+    assert result["/cycle/sub/subsub"][0] == finding.ERROR
+    assert result["/cycle"][0] == finding.ERROR
+
+
+def test_many_entries(hfile):
+    n = 500
+    with h5py.File(hfile, "w") as root:
+        for i in range(n):
+            add_data(add_entry(root, f"entry_{i}", default="data"))
+
+    result = verdicts(hfile)
+    entries = [a for a in result if a != "/"]
+    assert len(entries) == n
+    assert all(result[a][0] == finding.OK for a in entries)
+
+
+def test_v2(hfile):
+    with h5py.File(hfile, "w") as root:
+        entry = add_entry(root, "entry")
+        nxdata = entry.create_group("data")
+        nxdata.attrs["NX_class"] = "NXdata"
+        nxdata["y"] = numpy.ones(5)
+        nxdata["y"].attrs["signal"] = 1
+        instrument = entry.create_group("instrument")
+        instrument.attrs["NX_class"] = "NXinstrument"
+        detector = instrument.create_group("detector")
+        detector.attrs["NX_class"] = "NXdetector"
+        detector["data"] = numpy.ones(5)
+        detector["data"].attrs["signal"] = 1
+
+    result = verdicts(hfile)
+    assert result["/entry"] == (
+        finding.OK,
+        "no @default: /entry/data/y (v2: @signal=1)",
+    )
+    assert result["/"] == (finding.OK, "found by v2: /entry/data/y")  # the field
+
+    with h5py.File(hfile, "a") as root:
+        del root["/entry/data"]  # v2: a field with @signal=1 in any group
+    validator = validate.Data_File_Validator()
+    validator.validate(hfile)
+    validator.close()
+    found = {
+        (f.h5_address, f.test_name): f.status
+        for f in validator.validations
+        if f.test_name.startswith(default_plot.TEST_NAME)
+    }
+    address = "/entry/instrument/detector/data@signal"
+    assert found[address, default_plot.TEST_V2 + ", @signal=1"] == finding.OK
+    assert found[address, default_plot.TEST_V2] == finding.OK
+    root_finding = [
+        f for f in validator.validations if f.test_name == default_plot.TEST_NAME
+    ]
+    assert root_finding[0].comment == "found by v2: /entry/instrument/detector/data"
+
+
+def test_v2_spilled(hfile, tmp_path):
+    with h5py.File(hfile, "w") as root:
+        entry = add_entry(root, "entry")
+        instrument = entry.create_group("instrument")
+        instrument.attrs["NX_class"] = "NXinstrument"
+        detector = instrument.create_group("detector")
+        detector.attrs["NX_class"] = "NXdetector"
+        detector["data"] = numpy.ones(5)
+        detector["data"].attrs["signal"] = 1
+        detector["other"] = numpy.ones(5)
+        detector["other"].attrs["signal"] = 2
+
+    validator = validate.Data_File_Validator(
+        spill_threshold=3, spill_directory=str(tmp_path)
+    )
+    validator.validate(hfile)
+    assert validator.catalog.spilled
+    v2 = default_plot.find_v2(validator)
+    assert sorted(v.h5_address for v in v2["/entry/instrument/detector"]) == [
+        "/entry/instrument/detector/data@signal",
+        "/entry/instrument/detector/other@signal",
+    ]
+    root_finding = [
+        f for f in validator.validations if f.test_name == default_plot.TEST_NAME
+    ]
+    assert root_finding[0].comment == "found by v2: /entry/instrument/detector/data"
+    validator.close()
@@ -0,0 +1,128 @@
+"""
+pool of open files reached by external links
+"""
+
+import os
+
+import h5py
+import pytest
+
+from .. import external_files
+from .. import h5tree
+from .. import validate
+from ._core import tempdir
+
+N_FILES = 3
+N_LINKS = 4  # to each external file
+
+
+@pytest.fixture(scope="function")
+def workdir(tempdir):
+    """work in *tempdir* (the current directory may have been removed)"""
+    try:
+        previous = os.getcwd()
+    except FileNotFoundError:
+        previous = None
+    os.chdir(tempdir)
+    yield tempdir
+    if previous is not None:
+        os.chdir(previous)
+
+
+def write_master(path, missing=True):
+    """master file with many external links to a few data files"""
+    for i in range(N_FILES):
+        with h5py.File(os.path.join(path, f"data_{i}.h5"), "w") as root:
+            group = root.create_group("data")
+            group.attrs["NX_class"] = "NXcollection"
+            group.attrs["signal"] = "frames"
+            group.create_dataset("frames", data=[i, i + 1])
+            root.create_dataset("count", data=i)
+    master = os.path.join(path, "master.h5")
+    with h5py.File(master, "w") as root:
+        entry = root.create_group("entry")
+        entry.attrs["NX_class"] = "NXentry"
+        for i in range(N_FILES):
+            for k in range(N_LINKS - 1):
+                entry[f"count_{i}_{k}"] = h5py.ExternalLink(f"data_{i}.h5", "/count")
+            entry[f"data_{i}"] = h5py.ExternalLink(f"data_{i}.h5", "/data")
+        if missing:
+            entry["missing"] = h5py.ExternalLink("no_such_file.h5", "/count")
+    return master
+
+
+def test_candidate_paths(monkeypatch, workdir):
+    parent = os.path.join(os.sep, "beamline", "master.h5")
+    monkeypatch.delenv("HDF5_EXT_PREFIX", raising=False)
+    paths = external_files.candidate_paths("data.h5", parent)
+    assert paths == [
+        os.path.join(os.sep, "beamline", "data.h5"),
+        os.path.join(workdir, "data.h5"),
+    ]
+
+    monkeypatch.setenv(
+        "HDF5_EXT_PREFIX", os.pathsep.join([os.path.join("${ORIGIN}", "raw"), "/x"])
+    )
+    absolute = os.path.join(os.sep, "elsewhere", "data.h5")
+    paths = external_files.candidate_paths(absolute, parent)
+    assert paths[:3] == [
+        absolute,
+        os.path.join(os.sep, "beamline", "raw", "data.h5"),
+        os.path.join("/x", "data.h5"),
+    ]
+
+
+def test_opened_once(workdir):
+    path = os.path.join(workdir, "files")  # not the current directory
+    os.mkdir(path)
+    master = write_master(path, missing=False)
+    pool = external_files.ExternalFilePool()
+
+    validator = validate.Data_File_Validator(external_file_pool=pool)
+    validator.validate(master)
+    assert "/data/frames" in validator.addresses
+    lines = h5tree.Hdf5TreeView(master, external_file_pool=pool).report()
+    validator.close()
+
+    assert len(pool.opened) == N_FILES
+    assert all(n == 1 for n in pool.opened.values())
+    assert sum("@signal" in line for line in lines) == N_FILES
+    pool.close()
+    assert len(pool) == 0
+
+
+def test_missing_file(tempdir):
+    master = write_master(tempdir)
+    validator = validate.Data_File_Validator()
+    validator.validate(master)
+    validator.close()
+    assert list(validator.broken_links) == ["/entry/missing"]
+    assert "/entry/count_0_0" in validator.address_set
+
+    lines = h5tree.Hdf5TreeView(master).report()
+    assert "    missing: missing external file" in lines
+    assert sum("count_" in line for line in lines) == N_FILES * (N_LINKS - 1)
+
+
+def test_lru(tempdir):
+    write_master(tempdir)
+    names = [os.path.join(tempdir, f"data_{i}.h5") for i in range(N_FILES)]
+    pool = external_files.ExternalFilePool(maxsize=1)
+
+    first = pool.open(names[0])
+    dataset = first["data/frames"]  # in use
+    pool.open(names[1])
+    assert len(pool) == 1
+    assert first.id.valid  # kept open: its dataset is in use
+    assert pool.open(names[0]) is first  # not opened again
+
+    del dataset
+    second = pool.open(names[1])
+    assert not first.id.valid  # nothing in use: closed
+    assert pool.opened[names[0]] == 1
+    assert pool.opened[names[1]] == 2
+    pool.close()
+    assert not second.id.valid
+
+    assert pool.exists("data_0.h5", names[2])
+    assert not pool.exists("no_such_file.h5", names[2])
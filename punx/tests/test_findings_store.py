@@ -0,0 +1,84 @@
+"""
+store of findings for queries
+"""
+
+import os
+
+import pytest
+
+from .. import batch
+from .. import finding
+from .. import findings_store
+from ._core import EXAMPLE_DATA_DIR
+
+EXAMPLES = [
+    os.path.join(EXAMPLE_DATA_DIR, name)
+    for name in ("writer_1_3.hdf5", "writer_2_1.hdf5", "Qx_rank4_test_data.h5")
+]
+
+
+@pytest.fixture(scope="function")
+def store(tmp_path):
+    store = findings_store.FindingsStore(str(tmp_path / "findings.sqlite"), batch_size=2)
+    yield store
+    store.close()
+
+
+def sweep(store, file_set_name, label=None, statuses=None):
+    run = store.start_run(file_set_name, label=label)
+    results = list(batch.validate_files(EXAMPLES, statuses=statuses))
+    for result in results:
+        store.add(run, result)
+    store.flush()
+    return run, results
+
+
+def test_store_and_query(store):
+    run, results = sweep(store, "v2018.5", label="first")
+    assert store.resolve_run() == run
+    assert store.resolve_run("first") == run
+    assert store.resolve_run("v2018.5") == run
+    with pytest.raises(KeyError):
+        store.resolve_run("no such run")
+
+    # all findings are counted
+    expected = {}
+    for result in results:
+        for status, n in result.summary.items():
+            if n > 0:
+                expected[str(status)] = expected.get(str(status), 0) + n
+    assert dict(store.counts()) == expected
+    assert store.counts(by="status", status="ERROR") == {
+        "ERROR": expected["ERROR"]
+    }
+
+    # files with ERROR findings in (or below) a NeXus class path
+    errors = {}
+    for result in results:
+        n = sum(
+            1
+            for f in result.findings
+            if f.status is finding.ERROR
+            and (result.classpaths.get(f.h5_address) or "").startswith("/NXentry/NXdata")
+        )
+        if n > 0:
+            errors[result.fname] = n
+    assert len(errors) > 0
+    found = store.files(status="ERROR", classpath="/NXentry/NXdata")
+    assert dict(found) == errors
+
+    ((run_id, _started, file_set, label, files, findings),) = store.runs()
+    assert (run_id, file_set, label, files) == (run, "v2018.5", "first", 3)
+    assert findings == sum(expected.values())
+
+
+def test_compare(store):
+    run_a, _results = sweep(store, "v2018.5")
+    run_b, _results = sweep(store, "v2018.5", statuses=["ERROR", "WARN"])
+    # only the ERROR & WARN findings were kept (and their rules run)
+    ((key, n_a, n_b, change),) = store.compare(run_a, run_b, status="ERROR")
+    assert (key, n_b, change) == ("ERROR", n_a, 0)
+    by_status = {k: (a, b) for k, a, b, _c in store.compare(run_a, run_b)}
+    assert by_status["OK"][1] < by_status["OK"][0]
+    with pytest.raises(ValueError):
+        store.counts(by="comment")
@@ -0,0 +1,104 @@
+"""
+memoized base class comparison of structurally identical groups
+"""
+
+import collections
+import os
+
+import h5py
+import pytest
+
+from .. import utils
+from .. import validate
+from ._core import EXAMPLE_DATA_DIR
+from ._core import hfile
+
+
+def findings_of(fname, memoize):
+    validator = validate.Data_File_Validator()
+    validator.memoize_groups = memoize
+    validator.validate(fname)
+    result = collections.Counter(
+        (f.h5_address, f.test_name, f.status.key, f.comment)
+        for f in validator.validations
+    )
+    validator.close()
+    return result, validator
+
+
+def write_multi_scan_file(hfile, n_scans):
+    with h5py.File(hfile, "w") as root:
+        root.attrs["default"] = "scan_1"
+        for i in range(1, n_scans + 1):
+            nxentry = root.create_group(f"scan_{i}")
+            nxentry.attrs["NX_class"] = "NXentry"
+            nxentry.attrs["default"] = "data"
+            nxentry.create_dataset("title", data=f"scan {i}")
+            nxdata = nxentry.create_group("data")
+            nxdata.attrs["NX_class"] = "NXdata"
+            nxdata.attrs["signal"] = "counts"
+            nxdata.attrs["axes"] = "x"
+            nxdata.create_dataset("counts", data=[1, 2, 3])
+            nxdata.create_dataset("x", data=[1.0, 2.0, 3.0])
+            nxdetector = nxentry.create_group("detector")
+            nxdetector.attrs["NX_class"] = "NXdetector"
+            nxdetector["data"] = nxdata["counts"]  # hard link
+            nxdetector.create_dataset("distance", data=1.5)
+
+        # outliers
+        root["scan_2/data"].attrs["signal"] = "x"
+        root["scan_3/data"].create_dataset("extra", data=0)
+        root["scan_4/detector"].attrs["NX_class"] = "NXmonitor"
+
+
+def test_memo_matches_full_run(hfile):
+    n_scans = 25
+    write_multi_scan_file(hfile, n_scans)
+
+    full, _v = findings_of(hfile, False)
+    memoized, validator = findings_of(hfile, True)
+    assert memoized == full
+
+    # far fewer signatures than groups
+    groups = [
+        v
+        for v in validator.addresses.values()
+        if utils.isHdf5Group(v.h5_object)
+    ]
+    assert len(groups) == 3 * n_scans
+    assert len(validator.group_memo) < 10
+
+
+def test_signature(hfile):
+    write_multi_scan_file(hfile, 5)
+    validator = validate.Data_File_Validator()
+    validator.validate(hfile)
+
+    def signature(addr):
+        return validator.group_signature(validator.addresses[addr])
+
+    assert signature("/scan_1/data") == signature("/scan_5/data")
+    assert signature("/scan_1/data") != signature("/scan_2/data")  # attr value
+    assert signature("/scan_1/data") != signature("/scan_3/data")  # child
+    assert signature("/scan_1/detector") != signature("/scan_4/detector")
+    assert signature("/scan_1/detector") != signature("/scan_1/data")
+    validator.close()
+
+
+@pytest.mark.parametrize(
+    "infile",
+    [
+        "02_03_setup.h5",
+        "1998spheres.h5",
+        "USAXS_flyScan_GC_M4_NewD_15.h5",
+        "chopper.nxs",
+        "cs_af1410.h5",
+        "scan101.nxs",
+        "writer_2_1.hdf5",
+    ],
+)
+def test_example_files(infile):
+    fname = os.path.join(EXAMPLE_DATA_DIR, infile)
+    full, _v = findings_of(fname, False)
+    memoized, _v = findings_of(fname, True)
+    assert memoized == full
@@ -0,0 +1,143 @@
+"""
+validate files that are still being written (live mode)
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+import h5py
+import pytest
+
+from .. import finding
+from .. import validate
+from ..validations import content
+from ._core import hfile
+
+# writes a SWMR file, extends its dataset when told (by marker files)
+SWMR_WRITER = """
+import os, sys, time
+import h5py, numpy
+
+fname, ready, go, done = sys.argv[1:]
+with h5py.File(fname, "w", libver="latest") as root:
+    root.attrs["default"] = "entry"
+    entry = root.create_group("entry")
+    entry.attrs["NX_class"] = "NXentry"
+    entry.attrs["default"] = "data"
+    data = entry.create_group("data")
+    data.attrs["NX_class"] = "NXdata"
+    data.attrs["signal"] = "counts"
+    counts = data.create_dataset(
+        "counts", data=[1.0, 2.0], maxshape=(None,), chunks=(4,)
+    )
+    root.swmr_mode = True
+    root.flush()
+    open(ready, "w").close()
+    while not os.path.exists(go):
+        time.sleep(0.02)
+    counts.resize((5,))
+    counts[2:] = [3.0, numpy.nan, 5.0]
+    counts.flush()
+    open(done, "w").close()
+    time.sleep(0.5)
+"""
+
+# adds a group (and removes a field) in a file
+APPEND_WRITER = """
+import sys
+import h5py, numpy
+
+with h5py.File(sys.argv[1], "a", locking=False) as root:
+    data = root["entry"].create_group("data")
+    data.attrs["NX_class"] = "NXdata"
+    data["x"] = numpy.arange(3.0)
+    del root["entry/title"]
+"""
+
+
+def wait_for(fname, timeout=30):
+    t_stop = time.time() + timeout
+    while not os.path.exists(fname):
+        assert time.time() < t_stop, f"timeout waiting for {fname}"
+        time.sleep(0.02)
+
+
+def finite_findings(validator):
+    test_name = f"{content.TEST_NAME}: {content.FINITE}"
+    return [f.status for f in validator.validations if f.test_name == test_name]
+
+
+def test_swmr(tmp_path):
+    fname, ready, go, done = [
+        str(tmp_path / name) for name in ("live.h5", "ready", "go", "done")
+    ]
+    writer = subprocess.Popen(
+        [sys.executable, "-c", SWMR_WRITER, fname, ready, go, done]
+    )
+    try:
+        wait_for(ready)
+        validator = validate.Data_File_Validator(live=True, content=True)
+        validator.validate(fname)  # while the writer has the file open
+        assert validator.swmr
+        assert finite_findings(validator) == [finding.OK]
+        assert validator.refresh() == []  # nothing changed yet
+        before = len(validator.validations)
+
+        open(go, "w").close()
+        wait_for(done)
+        assert validator.refresh() == ["/entry/data/counts"]
+        assert validator.shapes["/entry/data/counts"] == (5,)
+        # replaced, not added
+        assert finite_findings(validator) == [finding.WARN]
+        assert len(validator.validations) == before
+        validator.close()
+    finally:
+        open(go, "w").close()
+        writer.wait(30)
+
+
+def test_new_groups(hfile):
+    with h5py.File(hfile, "w") as root:
+        entry = root.create_group("entry")
+        entry.attrs["NX_class"] = "NXentry"
+        entry["title"] = "live"
+
+    validator = validate.Data_File_Validator(live=True)
+    validator.validate(hfile)
+    assert not validator.swmr  # not written as SWMR: opened again to refresh
+    addresses = {f.h5_address for f in validator.validations}
+
+    # another process writes (this one has the file open)
+    subprocess.run([sys.executable, "-c", APPEND_WRITER, hfile], check=True)
+    changed = validator.refresh()
+    assert changed == [
+        "/entry/data",
+        "/entry/data/x",
+        "/entry/data@NX_class",
+        "/entry/title",
+    ]
+    assert "/entry/title" in addresses
+    validator.close()
+
+    # same findings as a new validation
+    fresh = validate.Data_File_Validator()
+    fresh.validate(hfile)
+    fresh.close()
+    assert sorted(map(str, validator.validations)) == sorted(
+        map(str, fresh.validations)
+    )
+
+
+def test_live_options(hfile):
+    with h5py.File(hfile, "w") as root:
+        root.create_group("entry")
+    with pytest.raises(ValueError, match="siblings"):
+        validate.Data_File_Validator(live=True, sibling_sample=5)
+
+    validator = validate.Data_File_Validator()
+    validator.validate(hfile)
+    with pytest.raises(ValueError, match="live"):
+        validator.refresh()
+    validator.close()
@@ -0,0 +1,109 @@
+"""
+match the children of a group with the members of its base class
+"""
+
+import h5py
+import numpy
+import pytest
+
+from .. import member_matcher
+from .. import nxdl_manager
+from .. import validate
+from ._core import hfile
+
+
+@pytest.mark.parametrize(
+    "nxdl_name, name, match",
+    [
+        ["DATA", "counts", True],
+        ["VARIABLE_errors", "x_errors", True],
+        ["VARIABLE_errors", "x_errors_", False],
+        ["AXISNAME_indices", "x_indices", True],
+        ["AXISNAME_indices", "_indices", False],
+        ["x", "x", True],
+        ["x.y", "xzy", False],
+    ],
+)
+def test_name_pattern(nxdl_name, name, match):
+    pattern = member_matcher.name_pattern(nxdl_name)
+    assert (pattern.fullmatch(name) is not None) == match
+
+
+def test_member_matcher():
+    manager = nxdl_manager.NXDL_Manager("v2018.5")
+    matcher = manager.member_matcher("NXdata")
+    assert manager.member_matcher("NXdata") is matcher  # compiled once
+    assert manager.member_matcher("NXunknown") is None
+
+    def names(*args):
+        return [spec.name for spec in matcher.match(*args)]
+
+    assert names("x") == ["x"]
+    assert names("x_errors") == ["VARIABLE_errors"]
+    assert names("counts") == ["VARIABLE", "DATA"]  # equally good, NXDL order
+    assert names("counts", True, "NXcollection") == []
+
+    matcher = manager.member_matcher("NXinstrument")
+    assert names("detector_1", True, "NXdetector") == ["detector"]
+    assert names("detector", True, "NXsample") == []
+    assert names("detector", True, None) == []
+    assert names("detector") == []  # not a field
+
+
+def write_instrument(hfile):
+    with h5py.File(hfile, "w") as root:
+        entry = root.create_group("entry")
+        entry.attrs["NX_class"] = "NXentry"
+        instrument = entry.create_group("instrument")
+        instrument.attrs["NX_class"] = "NXinstrument"
+        for name in ("detector_1", "detector_2"):
+            instrument.create_group(name).attrs["NX_class"] = "NXdetector"
+        instrument.create_group("stuff").attrs["NX_class"] = "NXsample"
+        data = entry.create_group("data")
+        data.attrs["NX_class"] = "NXdata"
+        data.attrs["signal"] = "counts"
+        data["counts"] = numpy.ones(5)
+        data["counts_errors"] = numpy.ones(5)
+
+
+def test_base_class_members(hfile):
+    write_instrument(hfile)
+    validator = validate.Data_File_Validator("v2018.5")
+    validator.validate(hfile)
+    validator.close()
+    findings = {
+        (f.h5_address, f.test_name, f.comment): f.status
+        for f in validator.validations
+    }
+
+    def found(address, test_name, comment):
+        return (address, test_name, comment) in findings
+
+    group = "NXDL group in data file"
+    assert found(
+        "/entry/instrument",
+        group,
+        "found:  in /entry/instrument/detector_1, /entry/instrument/detector_2"
+        " (NXdetector)",
+    )
+    assert found("/entry/instrument", group, "not found:  in /entry/instrument/source")
+    assert found(
+        "/entry/instrument/detector_1",
+        "group in base class",
+        "defined: NXinstrument/detector_1 (NXdetector)",
+    )
+    assert found(
+        "/entry/instrument/stuff",
+        "group in base class",
+        "not defined: NXinstrument/stuff",
+    )
+    field = "NXDL field in data file"
+    assert found(
+        "/entry/data", field, "found: /entry/data/counts_errors (VARIABLE_errors)"
+    )
+    assert found("/entry/data", field, "found: /entry/data/counts (DATA)")
+    assert found(
+        "/entry/data/counts",
+        "field in base class",
+        "defined: NXdata/counts (VARIABLE | DATA)",
+    )
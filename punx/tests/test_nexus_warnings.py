@@ -18,13 +18,13 @@ from .. import validate
     "file_set, count, addr, status, test_name, comment",
     [
         # NX_class attribute must evaluate to OK since it identifies the NXcollection base class
-        ["v2018.5", 61, "/entry/collection@NX_class", "OK", "validItemName", "pattern: NX.+"],
+        ["v2018.5", 62, "/entry/collection@NX_class", "OK", "validItemName", "pattern: NX.+"],
 
-        ["a4fd52d", 63, "/entry/collection", "WARN", "validItemName", "NXcollection contains non-NeXus content"],
-        ["v3.3", 61, "/entry/collection", "WARN", "validItemName", "NXcollection contains non-NeXus content"],
-        ["v2018.5", 61, "/entry/collection", "WARN", "validItemName", "NXcollection contains non-NeXus content"],
-        ["v2018.5", 61, "/entry/collection/also    allowed", "WARN", "validItemName", "NXcollection contains non-NeXus content"],
-        ["v2018.5", 61, "/entry/collection/anything.allowed", "WARN", "validItemName", "NXcollection contains non-NeXus content"],
+        ["a4fd52d", 64, "/entry/collection", "WARN", "validItemName", "NXcollection contains non-NeXus content"],
+        ["v3.3", 62, "/entry/collection", "WARN", "validItemName", "NXcollection contains non-NeXus content"],
+        ["v2018.5", 62, "/entry/collection", "WARN", "validItemName", "NXcollection contains non-NeXus content"],
+        ["v2018.5", 62, "/entry/collection/also    allowed", "WARN", "validItemName", "NXcollection contains non-NeXus content"],
+        ["v2018.5", 62, "/entry/collection/anything.allowed", "WARN", "validItemName", "NXcollection contains non-NeXus content"],
 
         # attributes are not validated yet
         # TODO: ["v2018.5", 61, "/entry/collection@@ignored@", "WARN", "validItemName", "NXcollection contains non-NeXus content"],
@@ -125,7 +125,8 @@ def test_NXDL_attribute__ignoreExtraGroups():
     "file_set, count, addr, status, test_name, comment",
     [
         # as NeXus changes ...
-        ["a4fd52d", 100, "/entry/0_starts_with_number", "ERROR", "validItemName", "valid HDF5 item name, not valid with NeXus"],
+        # (dataset_name_has@symbol is a dataset, not an attribute)
+        ["a4fd52d", 101, "/entry/0_starts_with_number", "ERROR", "validItemName", "valid HDF5 item name, not valid with NeXus"],
         ["v3.3", 99, "/entry/0_starts_with_number", "ERROR", "validItemName", "valid HDF5 item name, not valid with NeXus"],
         ["v2018.5", 99, "/entry/0_starts_with_number", "ERROR", "validItemName", "valid HDF5 item name, not valid with NeXus"],
         # TODO: no such file_set ["v2020.10", 1, "/entry/0_starts_with_number", "NOTE",  "validItemName", "valid HDF5 item name, not valid with NeXus"],
@@ -0,0 +1,100 @@
+"""
+profile the validation: time of each phase and rule
+"""
+
+import json
+import os
+
+import h5py
+
+from .. import batch
+from .. import profiling
+from .. import validate
+from ..validations import registry
+from ._core import EXAMPLE_DATA_DIR
+from ._core import tempdir
+
+EXAMPLE = os.path.join(EXAMPLE_DATA_DIR, "writer_1_3.hdf5")
+
+
+def findings_of(validator):
+    return [
+        (f.h5_address, f.test_name, f.status, f.comment)
+        for f in validator.validations
+    ]
+
+
+def test_profile():
+    original = h5py.Group.__dict__["__getitem__"]
+    profiler = profiling.Profiler()
+    validator = validate.Data_File_Validator(profiler=profiler)
+    validator.validate(EXAMPLE)
+    validator.close()
+    assert h5py.Group.__dict__["__getitem__"] is original  # restored
+
+    plain = validate.Data_File_Validator()
+    plain.validate(EXAMPLE)
+    plain.close()
+    assert findings_of(validator) == findings_of(plain)
+
+    phases = {t.name: t for t in profiler.ranked(profiling.KIND_PHASE)}
+    assert set(phases) == {
+        profiling.PHASE_CATALOG,
+        validate.PHASE_ITEMS,
+        validate.PHASE_GROUPS,
+        validate.PHASE_APPLICATION_DEFINITIONS,
+        validate.PHASE_DEFAULT_PLOT,
+    }
+    assert phases[profiling.PHASE_CATALOG].calls == 1
+    assert phases[profiling.PHASE_CATALOG].hdf5_calls > 0
+    assert phases[validate.PHASE_DEFAULT_PLOT].calls == 1
+    assert sum(t.findings for t in phases.values()) == len(validator.validations)
+
+    rules = {t.name: t for t in profiler.ranked(profiling.KIND_RULE)}
+    for name in (
+        "item_name",
+        "attribute",
+        "hdf5_group_items_in_base_class",
+        "base_class_items_in_hdf5_group",
+        "default_plot",
+    ):
+        assert rules[name].calls > 0, name
+    item_rules = [r.name for r in registry.get_rules() if r.name in rules]
+    assert (
+        sum(rules[name].findings for name in item_rules)
+        == phases[validate.PHASE_ITEMS].findings
+    )
+
+    seconds = [t.seconds for t in profiler.ranked()]
+    assert seconds == sorted(seconds, reverse=True)
+    assert "hdf5_group_items_in_base_class" in str(profiler.report())
+
+
+def test_json_and_merge(tempdir):
+    profiler = profiling.Profiler()
+    validator = validate.Data_File_Validator(profiler=profiler)
+    validator.validate(EXAMPLE)
+    validator.close()
+
+    fname = os.path.join(tempdir, "profile.json")
+    profiler.write_json(fname)
+    with open(fname) as fp:
+        data = json.load(fp)
+    assert data == profiler.to_dict()
+    assert data["files"] == 1
+
+    total = profiling.Profiler()
+    total.merge(data)
+    total.merge(profiler)
+    assert total.files == 2
+    catalog = total.timing(profiling.KIND_PHASE, profiling.PHASE_CATALOG)
+    assert catalog.calls == 2
+
+
+def test_batch_profile():
+    results = list(batch.validate_files([EXAMPLE], profile=True))
+    assert results[0].profile["files"] == 1
+    assert len(results[0].profile["timings"]) > 0
+
+    results = list(batch.validate_files([EXAMPLE]))
+    assert results[0].profile is None
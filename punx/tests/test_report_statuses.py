@@ -0,0 +1,120 @@
+"""
+report-level pushdown: keep only findings of the reported statuses
+"""
+
+import os
+import shutil
+
+import h5py
+import pytest
+
+from .. import batch
+from .. import finding
+from .. import results_cache
+from .. import validate
+from ._core import EXAMPLE_DATA_DIR
+from ._core import hfile
+from ._core import tempdir
+
+EXAMPLE = os.path.join(EXAMPLE_DATA_DIR, "02_03_setup.h5")
+
+
+def summary_of(statuses, fname=EXAMPLE):
+    validator = validate.Data_File_Validator(statuses=statuses)
+    validator.validate(fname)
+    validator.close()
+    return validator
+
+
+def write_bad_file(hfile):
+    with h5py.File(hfile, "w") as root:
+        nxentry = root.create_group("entry")
+        nxentry.attrs["NX_class"] = "NXentry"
+        nxentry.create_dataset("not.allowed", data=1)
+        nxentry.create_dataset("also not allowed", data=1)
+
+
+def test_all_statuses():
+    validator = validate.Data_File_Validator(statuses=finding.VALID_STATUS_DICT)
+    assert validator.statuses is None  # nothing to filter
+
+
+def test_counted_not_kept():
+    full = summary_of(None)
+    validator = summary_of(["note", "OPTIONAL", "ERROR"])
+
+    assert validator.skipped_rules == []
+    assert validator.finding_summary() == full.finding_summary()
+    assert validator.finding_score() == full.finding_score()
+    assert len(validator.validations) < len(full.validations)
+    kept = set(f.status for f in validator.validations)
+    assert kept == {finding.NOTE, finding.OPTIONAL}  # no ERROR in this file
+
+
+def test_skipped_rules():
+    full = summary_of(None).finding_summary()
+    validator = summary_of(["ERROR", "WARN"])
+    assert "base_class_items_in_hdf5_group" in validator.skipped_rules
+    summary = validator.finding_summary()
+    assert summary[finding.OPTIONAL] == 0 < full[finding.OPTIONAL]
+    for status in (finding.ERROR, finding.WARN, finding.NOTE):
+        assert summary[status] == full[status]
+
+
+def test_unknown_status():
+    with pytest.raises(KeyError):
+        validate.Data_File_Validator(statuses=["ERROR", "WRONG"])
+
+
+def test_fail_fast(hfile):
+    write_bad_file(hfile)
+    full = summary_of(None, hfile)
+    assert not full.stopped
+    assert full.finding_summary()[finding.ERROR] == 2
+
+    validator = validate.Data_File_Validator(fail_fast=True)
+    validator.validate(hfile)
+    validator.close()
+    assert validator.stopped
+    assert validator.finding_summary()[finding.ERROR] == 1
+    assert validator.validations[-1].status is finding.ERROR
+
+
+def test_cache_keeps_counts(tempdir):
+    cache = results_cache.ResultsCache(os.path.join(tempdir, "cache.sqlite"))
+    validator = validate.Data_File_Validator(results_cache=cache, statuses=["NOTE"])
+    assert validator.rules_key() != validate.Data_File_Validator().rules_key()
+
+    validator.validate(EXAMPLE)
+    expected = validator.finding_summary()
+    validator.validate(EXAMPLE)
+    assert validator.from_cache
+    assert validator.finding_summary() == expected
+    validator.close()
+    cache.close()
+
+
+def test_cache_skips_stopped(tempdir, hfile):
+    write_bad_file(hfile)
+    cache = results_cache.ResultsCache(os.path.join(tempdir, "cache.sqlite"))
+    validator = validate.Data_File_Validator(results_cache=cache, fail_fast=True)
+    validator.validate(hfile)
+    assert validator.stopped
+    assert cache.total_bytes() == 0  # partial results are not stored
+    validator.close()
+    cache.close()
+
+
+def test_batch_fail_fast(tempdir):
+    files = [os.path.join(tempdir, "a_bad.h5"), os.path.join(tempdir, "b_good.h5")]
+    write_bad_file(files[0])
+    shutil.copy(os.path.join(EXAMPLE_DATA_DIR, "writer_1_3.hdf5"), files[1])
+    results = list(batch.validate_files(files, fail_fast=True))
+    assert len(results) == 1
+    assert results[0].stopped
+
+    results = list(batch.validate_files(files, statuses=["ERROR"]))
+    assert len(results) == 2
+    assert all(f.status is finding.ERROR for r in results for f in r.findings)
+    assert results[0].summary[finding.ERROR] == 2
+    assert results[1].summary[finding.OK] > 0  # counted
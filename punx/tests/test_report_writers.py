@@ -0,0 +1,103 @@
+"""
+machine-readable report writers
+"""
+
+import csv
+import io
+import json
+import os
+
+import pytest
+
+from .. import finding
+from .. import report_writers
+from .. import validate
+from ._core import EXAMPLE_DATA_DIR
+
+EXAMPLE_FILE = os.path.join(EXAMPLE_DATA_DIR, "writer_1_3.hdf5")
+
+
+@pytest.fixture(scope="module")
+def validator():
+    validator = validate.Data_File_Validator()
+    validator.validate(EXAMPLE_FILE)
+    validator.close()
+    return validator
+
+
+def test_sort_key():
+    findings = [
+        finding.Finding("/entry/data", "t", finding.ERROR, ""),
+        finding.Finding("/entry@NX_class", "t", finding.OK, ""),
+        finding.Finding("/entry/data", "t", finding.NOTE, ""),
+        finding.Finding("/entry", "t", finding.WARN, ""),
+        finding.Finding("/entry/data", "t", finding.OK, ""),
+    ]
+    order = [
+        (f.h5_address, f.status.key)
+        for f in report_writers.sorted_findings(findings)
+    ]
+    assert order == [
+        ("/entry", "WARN"),
+        ("/entry@NX_class", "OK"),  # attribute after its group
+        ("/entry/data", "OK"),  # best to worst
+        ("/entry/data", "NOTE"),
+        ("/entry/data", "ERROR"),
+    ]
+
+
+def test_ndjson(validator):
+    stream = io.StringIO()
+    writer = report_writers.get_writer("ndjson", stream=stream)
+    writer.write(validator)
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    assert len(records) == len(validator.validations) + 1
+    assert records[0]["file"] == EXAMPLE_FILE
+    assert set(records[0]) == set(report_writers.CSV_COLUMNS)
+    summary = records[-1]
+    assert sum(summary["summary"].values()) == len(validator.validations)
+    assert not summary["partial"]
+
+
+def test_csv_statuses(validator):
+    stream = io.StringIO()
+    writer = report_writers.get_writer("csv", stream=stream, statuses=["TODO"])
+    writer.write(validator)
+    writer.write_error("missing.h5", "file not found")
+    rows = list(csv.reader(io.StringIO(stream.getvalue())))
+
+    assert rows[0] == report_writers.CSV_COLUMNS  # header, only once
+    assert [r[2] for r in rows[1:-1]] == ["TODO"] * 6
+    assert rows[-1][0] == "missing.h5"
+
+
+def test_summary(validator):
+    stream = io.StringIO()
+    report_writers.get_writer("summary", stream=stream).write(validator)
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 1
+    assert lines[0].startswith(EXAMPLE_FILE + ": OK=")
+    assert f"TOTAL={len(validator.validations)}" in lines[0]
+
+
+def test_streaming():
+    stream = io.StringIO()
+    writer = report_writers.get_writer("ndjson", stream=stream)
+    validator = validate.Data_File_Validator(report_writer=writer)
+    validator.validate(EXAMPLE_FILE)
+    validator.close()
+
+    # as found: in the order recorded, then the summary
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [r["h5_address"] for r in records[:-1]] == [
+        f.h5_address for f in validator.validations
+    ]
+    assert "summary" in records[-1]
+
+
+def test_text(validator, capsys):
+    report_writers.get_writer("text").write(validator)
+    by_writer = capsys.readouterr().out
+    validator.print_report()
+    assert by_writer == capsys.readouterr().out
@@ -0,0 +1,139 @@
+import os
+import shutil
+
+import h5py
+import pytest
+
+from .. import finding
+from .. import results_cache
+from .. import validate
+from ._core import EXAMPLE_DATA_DIR
+from ._core import tempdir
+
+
+@pytest.fixture(scope="function")
+def cache(tempdir):
+    cache = results_cache.ResultsCache(os.path.join(tempdir, "cache.sqlite"))
+    yield cache
+    cache.close()
+
+
+def copy_example(name, directory):
+    fname = os.path.join(directory, name)
+    shutil.copy(os.path.join(EXAMPLE_DATA_DIR, name), fname)
+    return fname
+
+
+def summary_of(findings):
+    return sorted(
+        (f.h5_address, f.test_name, f.status.key, f.comment) for f in findings
+    )
+
+
+def test_finding_dict():
+    f = finding.Finding("/entry@NX_class", "test", finding.NOTE, "comment")
+    f2 = finding.from_dict(f.as_dict())
+    assert f2.status is finding.NOTE
+    assert f2.as_dict() == f.as_dict()
+
+
+def test_hit_and_miss(cache, tempdir):
+    fname = copy_example("writer_1_3.hdf5", tempdir)
+
+    validator = validate.Data_File_Validator(results_cache=cache)
+    validator.validate(fname)
+    assert not validator.from_cache
+    assert cache.misses == 1
+    expected = summary_of(validator.validations)
+    classpaths = validator.finding_classpaths()
+    assert classpaths["/Scan/data"] == "/NXentry/NXdata"
+    validator.close()
+
+    validator.validate(fname)
+    assert validator.from_cache
+    assert validator.h5 is None  # did not open the file
+    assert cache.hits == 1
+    assert summary_of(validator.validations) == expected
+    assert validator.finding_classpaths() == classpaths
+    assert validator.finding_summary()[finding.OK] > 0
+
+    # modify the file: cache miss
+    with h5py.File(fname, "a") as f:
+        f.attrs["note"] = "changed"
+    validator.validate(fname)
+    assert not validator.from_cache
+    assert cache.misses == 2
+    validator.close()
+
+
+def test_key(cache, tempdir):
+    fname = copy_example("writer_1_3.hdf5", tempdir)
+    validator = validate.Data_File_Validator()
+
+    key = cache.key(fname, validator)
+    assert key == cache.key(fname, validator)
+
+    # a copy is another file
+    os.mkdir(os.path.join(tempdir, "copy"))
+    other = copy_example("writer_1_3.hdf5", os.path.join(tempdir, "copy"))
+    assert key != cache.key(other, validator)
+
+    # other rules, other key
+    validator.rules_key = lambda: "something else"
+    assert key != cache.key(fname, validator)
+
+    # other NXDL file set, other key
+    validator = validate.Data_File_Validator("v3.3")
+    assert key != cache.key(fname, validator)
+
+
+def test_eviction(tempdir):
+    cache = results_cache.ResultsCache(
+        os.path.join(tempdir, "cache.sqlite"), max_bytes=1
+    )
+    fname = copy_example("writer_1_3.hdf5", tempdir)
+    validator = validate.Data_File_Validator(results_cache=cache)
+    validator.validate(fname)
+    validator.close()
+    assert cache.total_bytes() == 0  # too big to keep
+
+    cache.max_bytes = results_cache.DEFAULT_MAX_BYTES
+    validator.validate(fname)
+    validator.close()
+    assert cache.total_bytes() > 0
+
+    cache.clear()
+    assert cache.total_bytes() == 0
+    cache.close()
+
+
+def test_external_files(cache, tempdir):
+    fname = os.path.join(tempdir, "master.h5")
+    data_file = os.path.join(tempdir, "data.h5")
+    with h5py.File(data_file, "w") as root:
+        root["data"] = [1, 2, 3]
+    with h5py.File(fname, "w") as root:
+        entry = root.create_group("entry")
+        entry.attrs["NX_class"] = "NXentry"
+        entry["data"] = h5py.ExternalLink("data.h5", "/data")
+        entry["later"] = h5py.ExternalLink("later.h5", "/data")
+
+    def from_cache():
+        validator = validate.Data_File_Validator(results_cache=cache)
+        validator.validate(fname)
+        validator.close()
+        return validator.from_cache
+
+    assert not from_cache()
+    assert from_cache()
+
+    with h5py.File(data_file, "a") as root:  # only the external file changed
+        root["data"][0] = 5
+        root["more"] = 1
+    assert not from_cache()
+    assert from_cache()
+
+    with h5py.File(os.path.join(tempdir, "later.h5"), "w") as root:
+        root["data"] = [1]  # not found before
+    assert not from_cache()
+    assert from_cache()
@@ -0,0 +1,97 @@
+"""
+validation server and its client
+"""
+
+import os
+import threading
+
+import pytest
+
+from .. import client
+from .. import server
+from ._core import EXAMPLE_DATA_DIR
+
+EXAMPLE_FILE = os.path.join(EXAMPLE_DATA_DIR, "writer_1_3.hdf5")
+
+
+@pytest.fixture(scope="module")
+def validation_server():
+    srv = server.ValidationServer(workers=1)
+    ready = threading.Event()
+    thread = threading.Thread(
+        target=srv.serve, kwargs=dict(port=0, ready=lambda s: ready.set())
+    )
+    thread.start()
+    ready.wait(30)
+    yield srv
+    srv.shutdown()
+    thread.join()
+    srv.close()
+
+
+def address(srv):
+    return dict(port=srv.httpd.server_address[1])
+
+
+def test_validate(validation_server):
+    payload = dict(files=[EXAMPLE_FILE, "/no/such/file.h5"], report="TODO")
+    records = list(client.request("/validate", payload, **address(validation_server)))
+
+    findings = [r for r in records if "status" in r]
+    assert len(findings) == 6
+    assert all(r["status"] == "TODO" for r in findings)
+    assert records[len(findings)]["summary"] == {"TODO": 6}
+    assert records[-1] == {"file": "/no/such/file.h5", "error": "file not found"}
+
+
+def test_tree_and_status(validation_server):
+    payload = dict(files=[EXAMPLE_FILE], show_attributes=False)
+    records = list(client.request("/tree", payload, **address(validation_server)))
+    assert len(records) == 1
+    assert records[0]["tree"][1] == "  Scan:NXentry"
+
+    (status,) = client.request("/status", **address(validation_server))
+    assert status["workers"] == 1
+    assert status["requests"] >= 1
+
+
+def test_bad_requests(validation_server):
+    with pytest.raises(ValueError, match="no files named"):
+        list(client.request("/validate", dict(), **address(validation_server)))
+    with pytest.raises(ValueError, match="unknown status"):
+        payload = dict(files=[EXAMPLE_FILE], report="GOOD")
+        list(client.request("/validate", payload, **address(validation_server)))
+    with pytest.raises(ValueError, match="404"):
+        list(client.request("/other", dict(), **address(validation_server)))
+
+
+def test_unix_socket(tmp_path):
+    socket_path = str(tmp_path / "punx.sock")
+    srv = server.ValidationServer(workers=1)
+    ready = threading.Event()
+    thread = threading.Thread(
+        target=srv.serve, kwargs=dict(socket_path=socket_path, ready=lambda s: ready.set())
+    )
+    thread.start()
+    ready.wait(30)
+    try:
+        payload = dict(files=[EXAMPLE_FILE], report="ERROR")
+        records = list(client.request("/validate", payload, socket_path=socket_path))
+        assert records == [
+            dict(
+                file=EXAMPLE_FILE,
+                summary=dict(ERROR=0),
+                score=records[0]["score"],
+                scored=records[0]["scored"],
+                partial=False,
+                stopped=False,
+            )
+        ]
+    finally:
+        srv.shutdown()
+        thread.join()
+        srv.close()
+    assert not os.path.exists(socket_path)
+
+    with pytest.raises(ConnectionError):
+        list(client.request("/status", socket_path=socket_path))
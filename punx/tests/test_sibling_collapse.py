@@ -0,0 +1,97 @@
+"""
+collapse runs of structurally identical sibling groups
+"""
+
+import collections
+
+from .. import finding
+from .. import validate
+from ._core import hfile
+from .test_group_memo import write_multi_scan_file
+
+N_SCANS = 25
+SAMPLE = 3
+
+
+def findings_by_address(validator):
+    result = collections.defaultdict(collections.Counter)
+    for f in validator.validations:
+        result[f.h5_address][(f.test_name, f.status.key, f.comment)] += 1
+    return result
+
+
+def test_collapse(hfile):
+    write_multi_scan_file(hfile, N_SCANS)
+    full = validate.Data_File_Validator()
+    full.validate(hfile)
+    full.close()
+    assert len(full.sibling_runs) == 0
+
+    validator = validate.Data_File_Validator(sibling_sample=SAMPLE)
+    validator.validate(hfile)
+    validator.close()
+    assert len(validator.validations) < len(full.validations)
+
+    # scans 2, 3, & 4 are outliers, the others are identical
+    assert len(validator.sibling_runs) == 1
+    parent, sample, collapsed, total = validator.sibling_runs[0]
+    assert parent.h5_address == "/"
+    assert len(sample) == SAMPLE
+    assert len(collapsed) == N_SCANS - 3 - SAMPLE
+    assert total == N_SCANS
+    names = [v.name for v in sample + collapsed]
+    assert "scan_2" not in names
+    assert "scan_4" not in names
+
+    aggregated = [
+        f for f in validator.validations if f.test_name == "identical siblings"
+    ]
+    assert len(aggregated) == 1
+    # worst in the sample: NOTE, detector/data has rank 1 (NXDL: 4)
+    assert aggregated[0].status == finding.NOTE
+    assert aggregated[0].comment.startswith(
+        f"{N_SCANS - 3} of {N_SCANS} siblings NOTE"
+    )
+
+    # sample and outliers: same findings as a full validation
+    full_findings = findings_by_address(full)
+    partial = findings_by_address(validator)
+    for v_item in sample:
+        addr = v_item.h5_address
+        for a in (addr, addr + "/data", addr + "/detector"):
+            assert partial[a] == full_findings[a]
+    for a in ("/scan_2/data", "/scan_3/data", "/scan_4/detector"):
+        assert partial[a] == full_findings[a]
+
+    # collapsed: not validated
+    # (except by the parent's base class and the default plot search)
+    for v_item in collapsed:
+        addr = v_item.h5_address
+        assert v_item.is_collapsed()
+        assert [k[0] for k in partial[addr]] == ["group in base class"]
+        assert len(partial[addr + "/detector"]) == 0
+        assert validator.addresses[addr + "/detector/distance"].is_collapsed()
+        assert validator.addresses[addr + "/data@signal"].is_collapsed()
+
+
+def test_small_runs_not_collapsed(hfile):
+    write_multi_scan_file(hfile, 5)  # only 2 identical scans
+    validator = validate.Data_File_Validator(sibling_sample=SAMPLE)
+    validator.validate(hfile)
+    validator.close()
+    assert len(validator.sibling_runs) == 0
+    assert validator.rules_key() != validate.Data_File_Validator().rules_key()
+
+
+def test_subtree_signature(hfile):
+    write_multi_scan_file(hfile, 6)
+    validator = validate.Data_File_Validator()
+    validator.validate(hfile)
+
+    def signature(addr):
+        return validator.subtree_signature(validator.addresses[addr])
+
+    assert signature("/scan_1") == signature("/scan_6")
+    assert signature("/scan_1") != signature("/scan_2")  # @signal in scan_N/data
+    assert signature("/scan_1") != signature("/scan_3")  # extra dataset
+    validator.close()
@@ -0,0 +1,98 @@
+"""
+synthetic NeXus files for scaling tests
+"""
+
+import os
+
+import h5py
+import numpy
+import pytest
+
+from .. import h5tree
+from .. import synthetic
+from .. import validate
+from ._core import tempdir
+
+
+def contents(fname):
+    """everything in the file but its name"""
+    result = {}
+
+    def visit(name, obj):
+        value = obj[()] if isinstance(obj, h5py.Dataset) else None
+        result[name] = (value, dict(obj.attrs))
+
+    with h5py.File(fname, "r") as root:
+        root.visititems(visit)
+    return result
+
+
+def same(a, b):
+    assert a.keys() == b.keys()
+    for k in a:
+        numpy.testing.assert_array_equal(a[k][0], b[k][0])
+        assert a[k][1] == b[k][1]
+
+
+def test_deterministic(tempdir):
+    names = [os.path.join(tempdir, f"file_{i}.h5") for i in range(3)]
+    kwargs = dict(hard_links=2, soft_links=1, chunks=16, compression="gzip")
+    synthetic.write_file(names[0], seed=5, **kwargs)
+    synthetic.write_file(names[1], seed=5, **kwargs)
+    synthetic.write_file(names[2], seed=6, **kwargs)
+    same(contents(names[0]), contents(names[1]))
+    with pytest.raises(AssertionError):
+        same(contents(names[0]), contents(names[2]))
+
+    with h5py.File(names[0], "r") as root:
+        signal = root["entry_0/data/signal"]
+        assert signal.chunks == (16,)
+        assert signal.compression == "gzip"
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        dict(),
+        dict(depth=0),
+        dict(entries=3, attributes=3, fanout=2, depth=3, datasets=1),
+        dict(entries=2, hard_links=2, soft_links=3, external_links=2),
+    ],
+)
+def test_count(kwargs, tempdir):
+    fname = os.path.join(tempdir, "synthetic.h5")
+    n = synthetic.write_file(fname, **kwargs)
+    assert n == synthetic.estimate_objects(**kwargs)
+    assert n == synthetic.count_objects(fname)
+
+    validator = validate.Data_File_Validator()
+    validator.validate(fname)
+    validator.close()
+    assert len(validator.addresses) == n
+
+    lines = h5tree.Hdf5TreeView(fname).report()
+    assert len(lines) > 1
+
+
+def test_parameters_for():
+    for objects in (10, 1000, 100_000, 10_000_000):
+        p = synthetic.parameters_for(objects)
+        n = synthetic.estimate_objects(**p)
+        assert 0.5 * objects < n < 1.5 * objects, (objects, p)
+
+    p = synthetic.parameters_for(1000, attributes=0, depth=1)
+    assert p["depth"] <= 1 and p["attributes"] == 0
+
+
+def test_bad_parameters(tempdir):
+    fname = os.path.join(tempdir, "synthetic.h5")
+    with pytest.raises(ValueError):
+        synthetic.write_file(fname, depth=1, fanout=1, datasets=1, hard_links=2)
+    with pytest.raises(KeyError):
+        synthetic.write_file(fname, groups=2)
+
+
+def test_main(tempdir, capsys):
+    fname = os.path.join(tempdir, "synthetic.h5")
+    assert synthetic.main([fname, "--objects", "500", "--seed", "3"]) == 0
+    assert synthetic.count_objects(fname) == int(capsys.readouterr().out.split()[1])
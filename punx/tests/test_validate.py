@@ -669,17 +669,18 @@ def test_default_plot_v2_fail_multi_signal(file_set_name, status, occurs, hfile)
 @pytest.mark.parametrize(
     "infile, report, observations",
     [
-        ["writer_1_3.hdf5", "TODO", 7],
+        ["writer_1_3.hdf5", "TODO", 6],
         ["writer_1_3.hdf5", "NOTE", 1],
-        ["writer_1_3.hdf5", "NOTE,TODO", 7 + 1],
+        ["writer_1_3.hdf5", "NOTE,TODO", 6 + 1],
         ["writer_2_1.hdf5", "note", 0],
-        ["writer_2_1.hdf5", "TODO", 11],
-        ["1998spheres.h5", "ERROR", 2],
+        ["writer_2_1.hdf5", "TODO", 10],
+        # NXcanSAS, in each of 2 entries: Q@units, radiation, NXsample/name
+        ["1998spheres.h5", "ERROR", 6],
         ["02_03_setup.h5", "NOTE", 98],
-        ["02_03_setup.h5", "OPTIONAL", 70],
+        ["02_03_setup.h5", "OPTIONAL", 67],
         ["02_03_setup.h5", "ERROR", 0],
-        ["02_03_setup.h5", "NOTE,OPTIONAL,ERROR", 98 + 70 + 0],
-        ["prj_test.nexus.hdf5", "", 123],
+        ["02_03_setup.h5", "NOTE,OPTIONAL,ERROR", 98 + 67 + 0],
+        ["prj_test.nexus.hdf5", "", 125],
     ],
 )
 def test_report_option(infile, report, observations, capsys):
@@ -0,0 +1,103 @@
+"""
+validate the files written into a directory
+"""
+
+import io
+import json
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+from .. import server
+from .. import watch
+from ._core import EXAMPLE_DATA_DIR
+
+EXAMPLE_FILE = os.path.join(EXAMPLE_DATA_DIR, "writer_1_3.hdf5")
+
+
+def drop_files(directory, names, delay=0.2):
+    """write files into *directory*, one at a time (in a thread)"""
+
+    def writer():
+        os.makedirs(os.path.join(directory, "sub"), exist_ok=True)
+        for name in names:
+            time.sleep(delay)
+            fname = os.path.join(directory, name)
+            if name.endswith(".txt"):
+                with open(fname, "w") as f:
+                    f.write("not HDF5\n")
+            else:
+                shutil.copy(EXAMPLE_FILE, fname)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    return thread
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_directory_watcher(tmp_path, use_inotify):
+    shutil.copy(EXAMPLE_FILE, tmp_path / "before.h5")
+    watcher = watch.DirectoryWatcher(
+        tmp_path, settle=0.3, poll_interval=0.1, use_inotify=use_inotify
+    )
+    assert watcher.mode == ("inotify" if use_inotify else "polling")
+    thread = drop_files(tmp_path, ["a.h5", "notes.txt", "sub/b.hdf5"])
+
+    found = []
+    t_stop = time.time() + 20
+    while len(found) < 2 and time.time() < t_stop:
+        watcher.wait(0.1)
+        found += watcher.ready()
+    thread.join()
+    watcher.close()
+
+    # not: the file from before, the text file
+    assert sorted(found) == [str(tmp_path / "a.h5"), str(tmp_path / "sub/b.hdf5")]
+
+
+def test_settle(tmp_path):
+    watcher = watch.DirectoryWatcher(tmp_path, settle=0.5, poll_interval=0.1)
+    fname = str(tmp_path / "growing.h5")
+    shutil.copy(EXAMPLE_FILE, fname)
+    t_stop = time.time() + 1
+    while time.time() < t_stop:
+        with open(fname, "ab") as f:
+            f.write(b"\0" * 10)  # still being written
+        watcher.wait(0.1)
+        assert watcher.ready() == []
+    time.sleep(0.6)
+    watcher.wait(0.1)
+    assert watcher.ready() == [fname]
+    watcher.close()
+
+
+def test_watcher(tmp_path):
+    shutil.copy(EXAMPLE_FILE, tmp_path / "before.h5")
+    srv = server.ValidationServer(workers=1)
+    log = io.StringIO()
+    watcher = watch.Watcher(
+        tmp_path,
+        srv,
+        log=log,
+        max_in_flight=1,
+        options=dict(statuses=["ERROR"]),
+        settle=0.2,
+        poll_interval=0.1,
+        existing=True,
+    )
+    thread = drop_files(tmp_path, ["one.h5", "two.h5"], delay=0.05)
+    thread.join()
+    watcher.run(max_files=3, timeout=30)
+    watcher.close()
+    srv.close()
+
+    records = [json.loads(line) for line in log.getvalue().splitlines()]
+    assert sorted(os.path.basename(r["file"]) for r in records) == [
+        "before.h5",
+        "one.h5",
+        "two.h5",
+    ]
+    assert all(r["summary"] == {"ERROR": 0} for r in records)
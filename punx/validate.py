@@ -31,20 +31,36 @@ INTERNAL
 
 import collections
 import h5py
+import itertools
 import logging
+import numpy
 import os
 import pyRestTable
+import re
+import time
 
 from . import FileNotFound, HDF5_Open_Error
 from . import finding
 from . import utils
+from . import catalog
+from . import dataset_values
+from . import external_files
 from . import nxdl_manager
+from . import profiling
+from . import report_writers
+from .validations import registry
 
 
 SLASH = "/"
 INFORMATIVE = int((logging.INFO + logging.DEBUG) / 2)
 CLASSPATH_OF_NON_NEXUS_CONTENT = "non-NeXus content"
 VALIDITEMNAME_STRICT_PATTERN = r"[a-z_][a-z0-9_]*"
+PHASE_ITEMS = "item names and attributes"
+PHASE_GROUPS = "base classes"
+PHASE_APPLICATION_DEFINITIONS = "application definitions"
+PHASE_DEFAULT_PLOT = "default plot"
+PHASE_CONTENT = "data content"
+MAX_SUBTREES_REPORTED = 10
 logger = utils.setup_logger(__name__)
 
 
@@ -81,7 +97,10 @@ class Data_File_Validator(object):
 
        ~close
        ~validate
+       ~refresh
        ~print_report
+       ~finding_classpaths
+       ~rules_key
 
     INTERNAL METHODS
 
@@ -89,27 +108,168 @@ class Data_File_Validator(object):
 
        ~build_address_catalog
        ~_group_address_catalog_
-       ~validate_item_name
+       ~group_signature
 
     """
 
-    def __init__(self, ref=None):
+    memoize_groups = True
+    """re-use base class comparisons of structurally identical groups"""
+
+    def __init__(
+        self,
+        ref=None,
+        manager=None,
+        results_cache=None,
+        statuses=None,
+        fail_fast=False,
+        sibling_sample=None,
+        profiler=None,
+        external_file_pool=None,
+        content=False,
+        report_writer=None,
+        live=False,
+        spill_threshold=catalog.SPILL_THRESHOLD,
+        spill_directory=None,
+    ):
+        """
+        PARAMETERS
+
+        ref str:
+            name of the NXDL file set (ignored if *manager* is given)
+
+        manager obj:
+            Instance of :class:`~punx.nxdl_manager.NXDL_Manager` to share
+            (such as between many validators in a batch), default: ``None``
+
+        results_cache obj:
+            Instance of :class:`~punx.results_cache.ResultsCache` to re-use
+            findings of unchanged files, default: ``None`` (no cache)
+
+        statuses [obj]:
+            statuses (or their keys, such as ``"ERROR"``) of the findings
+            to keep, default: ``None`` (all).  Findings of other statuses
+            are only counted.  Rules that can only report other statuses
+            are skipped.
+
+        fail_fast bool:
+            stop the validation at the first ERROR finding,
+            default: ``False``
+
+        sibling_sample int:
+            When a group has more than this many structurally identical
+            child groups (of the same NeXus class), validate only this
+            many of them and report the rest with one finding,
+            such as "250 of 250 siblings OK".  Outliers (siblings that
+            differ) are always validated.  Default: ``None`` (validate all)
+
+        profiler obj:
+            Instance of :class:`~punx.profiling.Profiler` to measure
+            the time of each phase and rule, default: ``None``
+
+        external_file_pool obj:
+            Instance of :class:`~punx.external_files.ExternalFilePool`
+            to share (such as with a tree view), default: ``None``
+            (a new pool for each file, closed with the file)
+
+        content bool:
+            also check the data of numeric datasets (NaN and Inf,
+            negative counts, monotonic axes, frames all zero), which
+            reads all of it, see :mod:`~punx.validations.content`.
+            Default: ``False``
+
+        report_writer obj:
+            Instance of :class:`~punx.report_writers.ReportWriter`
+            to write each finding (that is kept) as it is found,
+            default: ``None``
+
+        live bool:
+            validate a file that is still being written: open it
+            with SWMR (if it was written so) and without HDF5 file
+            locking, then :meth:`refresh` to check again what changed.
+            Findings are not cached.  Cannot be used with
+            *sibling_sample*.  Default: ``False``
+
+        spill_threshold int:
+            catalog a file with more items (groups, datasets, and
+            attributes) than this on disk, not in memory, see
+            :class:`~punx.catalog.SpillCatalog`.
+            ``None``: always in memory.  Not with *live*.
+            Default: ``punx.catalog.SPILL_THRESHOLD``
+
+        spill_directory str:
+            directory of the catalog on disk,
+            default: ``None`` (the system temporary directory)
+        """
+        if live and sibling_sample is not None:
+            raise ValueError("live validation cannot sample siblings")
         self.h5 = None
+        self.fname = None
+        self.from_cache = False
+        self.results_cache = results_cache
+        self.statuses = _status_set(statuses)
+        self.fail_fast = fail_fast
+        self.sibling_sample = sibling_sample
+        self.profiler = profiler
+        self.shared_file_pool = external_file_pool
+        self.external_files = None  # pool of files reached by external links
+        self.content = content
+        self.report_writer = report_writer
+        self.live = live
+        self.swmr = False  # file opened in SWMR mode (live)
+        self.spill_threshold = None if live else spill_threshold
+        self.spill_directory = spill_directory
+        self.catalog = None
         self.__init_local__()
-        self.manager = nxdl_manager.NXDL_Manager(ref)
+        self.manager = manager or nxdl_manager.NXDL_Manager(ref)
 
     def __init_local__(self):
         self.validations = []  # list of Finding() instances
-        self.addresses = (
-            collections.OrderedDict()
-        )  # dictionary of all HDF5 address nodes in the data file
-        self.classpaths = {}
+        self.filtered = collections.Counter()  # by status, findings not kept
+        self.skipped_rules = []
+        self.stopped = False  # stopped at the first ERROR (fail_fast)
+        self.timed_out = False  # stopped at the deadline
+        self.uncovered = collections.OrderedDict()  # by phase: subtrees or None
+        self.sibling_runs = []  # (parent, sample, collapsed, number of siblings)
+        self.produced = {}  # (findings, filtered) by (phase, HDF5 address), live
+        self.shapes = {}  # shape by HDF5 address of dataset, when checked (live)
+        self._checks = {}  # check function, by phase
+        self._stored_classpaths = {}  # from the results cache
+        self._recording = None
+        self._init_catalog()
+
+    def _init_catalog(self, spill=False):
+        if self.catalog is not None:
+            self.catalog.close()
+        if spill:
+            self.catalog = catalog.SpillCatalog(
+                self.h5, self._get_member, directory=self.spill_directory
+            )
+        else:
+            self.catalog = catalog.Catalog(threshold=self.spill_threshold)
+        # lookups of the catalog, see punx.catalog
+        self.addresses = self.catalog.addresses  # all items, by HDF5 address
+        self.classpaths = self.catalog.classpaths
+        self.attribute_classpaths = self.catalog.attribute_classpaths
+        self.children = self.catalog.children  # by HDF5 address of parent
+        self.address_set = self.catalog.address_set  # of all groups and datasets
+        self.link_targets = {}  # @target value by HDF5 address of its item
+        self.broken_links = {}  # link (description) by HDF5 address, not found
+        self.cyclic_links = {}  # HDF5 address of the ancestor, by address of link
         self.regexp_cache = {}
+        self.dataset_values = dataset_values.DatasetValues()  # values read
+        self.group_memo = {}  # base class findings by group signature
+        self._subtree_signatures = {}
+        self._ancestors = {}  # HDF5 address by id, groups being cataloged
 
     def close(self):
         """
-        close the HDF5 file (if it is open)
+        close the HDF5 file (if it is open) and the catalog
         """
+        if self.catalog is not None and self.catalog.spilled:
+            self._init_catalog()  # remove the catalog on disk
+        if self.external_files not in (None, self.shared_file_pool):
+            self.external_files.close()
+        self.external_files = None
         if utils.isHdf5FileObject(self.h5):
             self.h5.close()
             self.h5 = None
@@ -118,11 +278,41 @@ class Data_File_Validator(object):
         """
         prepare the finding object and record it
         """
-        f = finding.Finding(v_item.h5_address, key, status, comment)
-        self.validations.append(f)
-        v_item.validations[key] = f
+        if self._recording is not None:
+            self._recording.append((v_item.h5_address, key, status, comment))
+        if self.statuses is None or status in self.statuses:
+            f = finding.Finding(v_item.h5_address, key, status, comment)
+            self.validations.append(f)
+            v_item.validations[key] = f
+            if self.report_writer is not None:
+                self.report_writer.write_finding(self, f)
+        else:
+            f = None  # not reported: count it only
+            self.filtered[status] += 1
+        if self.fail_fast and status is finding.ERROR:
+            raise StopValidation(v_item.h5_address)
         return f
 
+    def finding_classpaths(self):
+        """
+        Return the NeXus class path of the item of each finding (by HDF5 address).
+
+        Items not found in the file (such as broken links) are not included.
+        """
+        if self.from_cache:
+            return dict(self._stored_classpaths)
+        return {
+            f.h5_address: self.addresses[f.h5_address].classpath
+            for f in self.validations
+            if f.h5_address in self.addresses
+        }
+
+    def reports_any(self, statuses):
+        """Will any findings of these *statuses* be kept?"""
+        if self.statuses is None:
+            return True
+        return any(s in self.statuses for s in statuses)
+
     def finding_score(self):
         """
         return a numerical score for the set of findings
@@ -137,6 +327,10 @@ class Data_File_Validator(object):
             if f.status.value != 0:
                 total += f.status.value
                 count += 1
+        for status, n in self.filtered.items():
+            if status.value != 0:
+                total += status.value * n
+                count += n
         if count == 0:
             return total, count, 0
         else:
@@ -168,6 +362,9 @@ class Data_File_Validator(object):
             summary[status] = 0
         for f in self.validations:
             summary[f.status] += 1
+        for status, n in self.filtered.items():
+            if status in summary:
+                summary[status] += n
         return summary
 
     def print_report(self, statuses=None):
@@ -182,19 +379,31 @@ class Data_File_Validator(object):
             f", dated {self.manager.nxdl_file_set.last_modified}"
             f", sha={self.manager.nxdl_file_set.sha}\n"
         )
-
-        def sort_validations(f):
-            value = f.h5_address
-            value += " %3d" % -f.status.value  # sort from best to worst
-            value += " " + f.status.description
-            value = value.replace("@", " @")  # keep attributes with group or dataset
-            return value
+        if self.from_cache:
+            print("(findings from the validation results cache)\n")
+        if self.stopped:
+            print("(validation stopped at the first ERROR)\n")
+        if self.timed_out:
+            print("PARTIAL validation: time budget exhausted, not covered:")
+            for phase, subtrees in self.uncovered.items():
+                if subtrees is None:
+                    print(f"  {phase}: not started")
+                else:
+                    shown = ", ".join(subtrees[:MAX_SUBTREES_REPORTED])
+                    more = len(subtrees) - MAX_SUBTREES_REPORTED
+                    if more > 0:
+                        shown += f", ... ({more} more)"
+                    print(f"  {phase}: {shown}")
+            print("")
+        if len(self.skipped_rules) > 0:
+            skipped = ", ".join(self.skipped_rules)
+            print(f"(skipped rules, nothing to report: {skipped})\n")
 
         print("findings")
         t = pyRestTable.Table()
         for label in "address status test comments".split():
             t.addLabel(label)
-        for f in sorted(self.validations, key=sort_validations):
+        for f in report_writers.sorted_findings(self.validations):
             if str(f.status) in reported_statuses:
                 row = []
                 row.append(f.h5_address)
@@ -213,99 +422,508 @@ class Data_File_Validator(object):
             t.addRow(row)
         t.addRow(["", "--", "", ""])
         t.addRow(["TOTAL", sum(summary.values()), "", ""])
-        print("\nsummary statistics")
+        if self.timed_out:
+            print("\nsummary statistics (PARTIAL: time budget exhausted)")
+        else:
+            print("\nsummary statistics")
         print(str(t))
         total, count, average = self.finding_score()
         print("<finding>=%f of %d items reviewed" % (average, count))
 
-    def validate(self, fname):
-        """start the validation process from the file root"""
-        from .validations import default_plot
+    def rules_key(self):
+        """
+        describe the validation rules (and options) in use
 
+        Findings of unchanged files may be re-used
+        (see :mod:`~punx.results_cache`) only when this text is unchanged.
+        """
+        terms = [r.name for r in registry.get_rules()]
+        terms += [
+            "hdf5_group_items_in_base_class",
+            "base_class_items_in_hdf5_group",
+            "application_definition",
+            "default_plot",
+        ]
+        if self.statuses is not None:
+            terms.append("report=" + "+".join(sorted(map(str, self.statuses))))
+        if self.sibling_sample is not None:
+            terms.append(f"sibling_sample={self.sibling_sample}")
+        if self.content:
+            terms.append("content")
+        return ",".join(terms)
+
+    def validate(self, fname, deadline=None):
+        """
+        start the validation process from the file root
+
+        PARAMETERS
+
+        fname str:
+            name of the HDF5 data file
+        deadline float:
+            stop validating at this time (as from ``time.time()``),
+            default: ``None`` (no limit).  When given, the most
+            valuable checks are done first: application definitions,
+            default plot, base classes, then item names and attributes.
+            Phases and subtrees not covered are listed in ``uncovered``.
+        """
         if not os.path.exists(fname):
             raise FileNotFound(fname)
         self.fname = fname
+        self.from_cache = False
 
         if self.h5 is not None:
             self.close()  # left open from previous call to validate()
-        try:
-            self.h5 = h5py.File(fname, "r")
-        except IOError:
-            logger.error("Could not open as HDF5: " + fname)
-            raise HDF5_Open_Error(fname)
 
+        cache_key = None
+        if self.results_cache is not None and not self.live:
+            cache_key = self.results_cache.key(fname, self)
+            stored = self.results_cache.get(cache_key)
+            if stored is not None:
+                # unchanged file: report the stored findings, do not open it
+                self.__init_local__()
+                self.validations, self.filtered, self._stored_classpaths = stored
+                self.from_cache = True
+                if self.report_writer is not None:
+                    self.report_writer.write(self, sort=False)
+                return
+
+        self.h5 = self._open(fname)
+        self.external_files = self.shared_file_pool
+        if self.external_files is None:
+            self.external_files = external_files.ExternalFilePool()
+        self.external_files.lookups.clear()  # the files of this validation
         self.__init_local__()
-        self.build_address_catalog()
+        if self.report_writer is not None:
+            self.report_writer.begin(self)
+        if self.profiler is None:
+            self._validate_file(deadline)
+        else:
+            with self.profiler.profiling(self):
+                self._validate_file(deadline)
+
+        complete = not (self.stopped or self.timed_out)
+        if complete:
+            self.report_sibling_runs()
+        if self.live:
+            self.shapes = self._dataset_shapes()
+        if self.report_writer is not None:
+            self.report_writer.end(self)
+        if cache_key is not None and complete:
+            self.results_cache.put(
+                cache_key,
+                fname,
+                self.validations,
+                self.filtered,
+                self.finding_classpaths(),
+                self.external_files.lookups,
+            )
+
+    def _validate_file(self, deadline):
+        """
+        Run the validation phases on the open file (see :meth:`validate`).
+        """
+        from .validations import application_definition
+        from .validations import base_class_items_in_hdf5_group
+        from .validations import content
+        from .validations import default_plot
+        from .validations import hdf5_group_items_in_base_class
 
-        # 1. check all objects in file (name is valid, ...)
-        for v_list in self.classpaths.values():
-            for v_item in v_list:
-                self.validate_item_name(v_item)
-                self.validate_attribute(v_item)
+        catalog = self._profiled(
+            profiling.KIND_PHASE, profiling.PHASE_CATALOG, self.build_address_catalog
+        )
+        catalog()
 
-        # 2. check all base classes against defaults
-        for k, v_item in self.addresses.items():
-            if utils.isHdf5Group(v_item.h5_object) or utils.isHdf5FileObject(
-                v_item.h5_object
-            ):
-                self.validate_group(v_item)
+        # skip the rules that cannot report any of the selected statuses
+        dispatch = registry.DispatchTable(statuses=self.statuses)
+        self.skipped_rules = dispatch.skipped
+        for name, module in (
+            ("hdf5_group_items_in_base_class", hdf5_group_items_in_base_class),
+            ("base_class_items_in_hdf5_group", base_class_items_in_hdf5_group),
+            ("application_definition", application_definition),
+            ("default_plot", default_plot),
+        ):
+            if not self.reports_any(module.STATUSES):
+                self.skipped_rules.append(name)
 
-        # 3. check application definitions
-        for k in ("/NXentry/definition", "/NXentry/NXsubentry/definition"):
-            if k in self.classpaths:
-                for v_item in self.classpaths[k]:
-                    self.validate_application_definition(v_item.parent)
+        def profiled_rule(name, func):
+            return self._profiled(profiling.KIND_RULE, name, func)
+
+        def check_item(v_item):
+            for rule in dispatch.rules_for(v_item):
+                rule.verify(self, v_item)
 
+        def check_item_profiled(v_item):
+            for rule in dispatch.rules_for(v_item):
+                profiled_rule(rule.name, rule.verify)(self, v_item)
+
+        def check_default_plot(v_item):
+            profiled_rule("default_plot", default_plot.verify)(self)
+
+        if self.sibling_sample is not None:
+            self.collapse_siblings()
+
+        # 1. check all objects in file (name is valid, ...)
+        if deadline is None:
+            items = self.catalog.by_classpath()
+        else:
+            items = self.catalog.values()  # uncovered: whole subtrees
+        # 2. check all base classes against defaults
+        groups = self.catalog.groups()
+        if len(self.sibling_runs) > 0:
+            items = (v for v in items if not v.is_collapsed())
+            groups = (v for v in groups if not v.is_collapsed())
+        # 3. check application definitions
+        definitions = []
+        if "application_definition" not in self.skipped_rules:
+            definitions = [
+                v_item
+                for v_item in self.definition_entries()
+                if not v_item.is_collapsed()
+            ]
         # 4. check for default plot
-        default_plot.verify(self)
+        plots = []
+        if "default_plot" not in self.skipped_rules:
+            plots.append(self.addresses["/"])
+
+        phases = [
+            (
+                PHASE_ITEMS,
+                items,
+                check_item if self.profiler is None else check_item_profiled,
+            ),
+            (PHASE_GROUPS, groups, self.validate_group),
+            (
+                PHASE_APPLICATION_DEFINITIONS,
+                definitions,
+                profiled_rule(
+                    "application_definition", self.validate_application_definition
+                ),
+            ),
+            (PHASE_DEFAULT_PLOT, plots, check_default_plot),
+        ]
+        self._checks = {phase: check for phase, _w, check in phases}
+        if deadline is not None:
+            # most valuable first, in case time runs out
+            phases = [phases[i] for i in (2, 3, 1, 0)]
+        # 5. (opt-in) check the data of datasets: last, it reads the most
+        checker = None
+        if self.content and self.reports_any(content.STATUSES):
+            datasets = [
+                v_item
+                for v_item in self.addresses.values()
+                if utils.isHdf5Dataset(v_item.h5_object) and not v_item.is_collapsed()
+            ]
+            checker = content.ContentChecker(self, datasets)
+            phases.append((PHASE_CONTENT, checker.items, checker.check))
+
+        try:
+            self._run_phases(phases, deadline)
+        finally:
+            if checker is not None:
+                checker.close()
+
+    def _run_phases(self, phases, deadline):
+        """
+        Run each of the *phases* ``(phase, work, check)`` in turn.
+        """
+        for i, (phase, work, check) in enumerate(phases):
+            try:
+                check = self._profiled(profiling.KIND_PHASE, phase, check)
+                self._run_phase(phase, work, check, deadline)
+            except StopValidation as exc:
+                self._recording = None
+                if self.timed_out:
+                    logger.info("time budget exhausted in phase: %s", phase)
+                    for later, _w, _c in phases[i + 1:]:
+                        self.uncovered[later] = None
+                else:
+                    logger.info("stopped at the first ERROR: %s", exc)
+                    self.stopped = True
+                break
+
+    def _profiled(self, kind, name, func):
+        """
+        Return *func*, measured as phase or rule *name* (when profiling).
+        """
+        if self.profiler is None:
+            return func
+        return self.profiler.wrap(kind, name, func)
+
+    def _run_phase(self, phase, work, check, deadline):
+        """
+        Call *check* for each item of *work* until done (or out of time).
+        """
+        work = iter(work)
+        for v_item in work:
+            if deadline is not None and time.time() > deadline:
+                self.timed_out = True
+                self.uncovered[phase] = _subtrees(itertools.chain([v_item], work))
+                raise StopValidation(f"time budget exhausted: {phase}")
+            if self.live:
+                self._check_produced(phase, v_item, check)
+            else:
+                check(v_item)
+
+    def _check_produced(self, phase, v_item, check):
+        """
+        Call *check* of *v_item*, remember its findings (to replace them).
+        """
+        start = len(self.validations)
+        filtered = collections.Counter(self.filtered)
+        try:
+            check(v_item)
+        finally:
+            self.produced[(phase, v_item.h5_address)] = (
+                self.validations[start:],
+                self.filtered - filtered,
+            )
+
+    def _open(self, fname):
+        """
+        Open HDF5 file *fname* (read-only).
+
+        In live mode: with SWMR and without file locking, if possible.
+        """
+        options = [{}]
+        if self.live:
+            options = [
+                dict(swmr=True, locking=False),
+                dict(swmr=True),
+                dict(locking=False),
+            ] + options
+        for kwargs in options:
+            try:
+                h5 = h5py.File(fname, "r", **kwargs)
+                break
+            except (IOError, ValueError) as exc:
+                logger.debug("cannot open %s with %s: %s", fname, kwargs, exc)
+        else:
+            logger.error("Could not open as HDF5: " + fname)
+            raise HDF5_Open_Error(fname)
+        # files written for SWMR (only) have superblock version 3
+        superblock = h5.id.get_create_plist().get_version()[0]
+        self.swmr = h5.swmr_mode and superblock >= 3
+        return h5
+
+    def _dataset_shapes(self):
+        """shape of each dataset (by HDF5 address)"""
+        return {
+            address: v_item.h5_object.shape
+            for address, v_item in self.addresses.items()
+            if utils.isHdf5Dataset(v_item.h5_object)
+        }
+
+    def refresh(self):
+        """
+        check again what changed in the file since it was validated (live)
+
+        With SWMR, the datasets are refreshed and those that grew are
+        checked again (a SWMR writer cannot add groups or datasets).
+        Otherwise, the file is opened again and its catalog compared:
+        new, removed, and grown items are checked again.  Checks of the
+        groups that contain them, of their application definition, and
+        of the default plot are repeated.  Findings of repeated checks
+        replace those from before.  Findings of the repeated checks are
+        written to the report writer (if any), as by :meth:`validate`.
+
+        Returns the (sorted) HDF5 addresses that changed.
+        """
+        from .validations import content
+
+        if not self.live or self.h5 is None:
+            raise ValueError("refresh() needs a live validation of an open file")
+        if self.stopped or self.timed_out:
+            # not all was checked: check all again
+            self.validate(self.fname)
+            return sorted(self.addresses)
+
+        old_shapes = self.shapes
+        new, removed = set(), set()
+        if self.swmr:
+            for address in old_shapes:
+                self.addresses[address].h5_object.refresh()
+        else:
+            old_addresses = self.addresses
+            self.h5.close()
+            self.h5 = self._open(self.fname)
+            self._init_catalog()
+            self.build_address_catalog()
+            for address, v_item in self.addresses.items():
+                if address in old_addresses:
+                    v_item.validations = old_addresses[address].validations
+            new = set(self.addresses) - set(old_addresses) - {None}
+            removed = set(old_addresses) - set(self.addresses) - {None}
+        self.shapes = self._dataset_shapes()
+        grown = {
+            address
+            for address, shape in self.shapes.items()
+            if address in old_shapes and old_shapes[address] != shape
+        }
+        changed = new | removed | grown
+        if len(changed) == 0:
+            return []
+        self.dataset_values.clear()  # values (and signatures) may differ now
+        self._subtree_signatures = {}
+        self.group_memo = {}
+
+        groups = set()  # HDF5 addresses of the groups containing changes
+        for address in changed:
+            owner = address.split("@")[0]
+            if "@" in address and owner in self.children:
+                groups.add(owner)  # attribute of a group
+            else:
+                groups.add(owner.rsplit(SLASH, 1)[0] or SLASH)
+        groups = {a for a in groups if a in self.addresses}
+        items = set(new | grown | groups)
+        for address in groups:
+            items.update(
+                v.h5_address
+                for v in self.children[address]
+                if (v.h5_address or "").startswith(address + "@")
+            )
+        entries = {v_item.h5_address for v_item in self.definition_entries()}
+        entries = {a for a in entries if any(_in_subtrees(c, [a]) for c in changed)}
+
+        work = collections.OrderedDict()  # HDF5 addresses to check, by phase
+        work[PHASE_ITEMS] = items
+        work[PHASE_GROUPS] = {a for a in items if a in self.children}
+        if "application_definition" not in self.skipped_rules:
+            work[PHASE_APPLICATION_DEFINITIONS] = entries
+        if "default_plot" not in self.skipped_rules:
+            work[PHASE_DEFAULT_PLOT] = {SLASH}
+        checker = None
+        if self.content and self.reports_any(content.STATUSES):
+            datasets = [
+                self.addresses[a]
+                for a in sorted(new | grown)
+                if utils.isHdf5Dataset(self.addresses[a].h5_object)
+            ]
+            checker = content.ContentChecker(self, datasets)
+            self._checks[PHASE_CONTENT] = checker.check
+            work[PHASE_CONTENT] = {v.h5_address for v in checker.items}
+
+        # forget the findings of removed items and of checks to repeat
+        forget = [
+            key
+            for key in self.produced
+            if key[1] in removed or key[1] in work.get(key[0], ())
+        ]
+        self._forget(forget)
+
+        if self.report_writer is not None:
+            self.report_writer.begin(self)
+        phases = [
+            (
+                phase,
+                [self.addresses[a] for a in self.addresses if a in addresses],
+                self._checks[phase],
+            )
+            for phase, addresses in work.items()
+        ]
+        try:
+            self._run_phases(phases, None)
+        finally:
+            if checker is not None:
+                checker.close()
+        if self.report_writer is not None:
+            self.report_writer.end(self)
+        return sorted(changed)
+
+    def _forget(self, keys):
+        """
+        Remove the findings produced by these checks (*keys*, see
+        :meth:`_check_produced`).
+        """
+        forgotten = set()
+        for key in keys:
+            found, filtered = self.produced.pop(key)
+            self.filtered -= filtered
+            for f in found:
+                forgotten.add(id(f))
+                v_item = self.addresses.get(f.h5_address)
+                if v_item is not None and v_item.validations.get(f.test_name) is f:
+                    del v_item.validations[f.test_name]
+        self.validations = [f for f in self.validations if id(f) not in forgotten]
 
     # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
 
     def build_address_catalog(self):
         """
         find all HDF5 addresses and NeXus class paths in the data file
-        """
-        self._group_address_catalog_(None, self.h5)
 
-    def _group_address_catalog_(self, parent, group):
+        Also finds (for the link rules, without further HDF5 access):
+        the set of all addresses, the ``@target`` of each NeXus link,
+        links to objects not found, and links to an ancestor group
+        (which are not followed).
+
+        A file with more than ``spill_threshold`` items is cataloged
+        again, on disk (see :mod:`~punx.catalog`).
         """
-        catalog this group's address and all its contents
+        try:
+            self._group_address_catalog_(None, self.h5, SLASH)
+        except catalog.CatalogFull:
+            logger.info(
+                "more than %d items in %s: catalog on disk",
+                self.spill_threshold,
+                self.fname,
+            )
+            self._init_catalog(spill=True)
+            self._group_address_catalog_(None, self.h5, SLASH)
+        self.catalog.flush()
+
+    def _group_address_catalog_(self, parent, group, address):
         """
+        catalog this group's address and all its contents
 
-        def addClasspath(v):
-            if v.classpath not in self.classpaths:
-                self.classpaths[v.classpath] = []
-            self.classpaths[v.classpath].append(v)
-            logger.log(INFORMATIVE, "NeXus classpath: " + v.classpath)
+        *address* is the HDF5 address of *group* as reached in this file
+        (which differs from ``group.name`` when reached by external link).
+        """
 
-        def get_subject(parent, o):
+        def get_subject(parent, o, address):
             v = ValidationItem(parent, o)
-            self.addresses[v.h5_address] = v
             logger.log(INFORMATIVE, "HDF5 address: " + v.h5_address)
-            addClasspath(v)
+            logger.log(INFORMATIVE, "NeXus classpath: " + v.classpath)
+            self.catalog.add(v, address)
             for k, a in sorted(o.attrs.items()):
                 av = ValidationItem(v, a, attribute_name=k)
-                self.addresses[av.h5_address] = av
-                addClasspath(av)
+                logger.log(INFORMATIVE, "NeXus classpath: " + av.classpath)
+                self.catalog.add(av, address, attribute=True)
+                if k == "target":
+                    target = _link_target(a)
+                    if target is not None:
+                        self.link_targets[v.h5_address] = target
             return v
 
-        obj = get_subject(parent, group)
-        parent = self.classpaths[obj.classpath][-1]
+        obj = get_subject(parent, group, address)
+        parent = obj
+        self._ancestors[group.id] = address
         for item in group:
-            if utils.isHdf5Group(group[item]):
-                self._group_address_catalog_(parent, group[item])
+            item_address = address.rstrip(SLASH) + SLASH + item
+            member = self._get_member(group, item)
+            if member is None:
+                self.broken_links[item_address] = _describe_link(group, item)
+            elif utils.isHdf5Group(member):
+                if member.id in self._ancestors:
+                    self.cyclic_links[item_address] = self._ancestors[member.id]
+                else:
+                    self._group_address_catalog_(parent, member, item_address)
             else:
-                get_subject(parent, group[item])
-
-    def validate_item_name(self, v_item):
-        from .validations import item_name
+                get_subject(parent, member, item_address)
+        del self._ancestors[group.id]
 
-        item_name.verify(self, v_item)
-
-    def validate_attribute(self, v_item):
-        from .validations import attribute
+    def _get_member(self, group, item):
+        """
+        Return *group[item]*, opening each external file once (from the pool).
 
-        attribute.verify(self, v_item)
+        Returns ``None`` if *item* is a link to an object not found.
+        """
+        link = group.get(item, getlink=True)
+        if isinstance(link, h5py.ExternalLink) and self.external_files is not None:
+            member = self.external_files.get(group, link)
+            if member is not None:
+                return member
+        return group.get(item)
 
     def validate_group(self, v_item):
         """
@@ -334,8 +952,26 @@ class Data_File_Validator(object):
             c = "unknown NeXus base class: " + nx_class
             self.record_finding(v_item, "NeXus base class", finding.ERROR, c)
         else:
-            hdf5_group_items_in_base_class.verify(self, v_item, base_class)
-            base_class_items_in_hdf5_group.verify(self, v_item, base_class)
+            signature = None
+            if self.memoize_groups and v_item.parent is not None:
+                signature = self.group_signature(v_item)
+            memo = self.group_memo.get(signature)
+            if memo is None or not self._replay_group_findings(v_item, memo):
+                self._recording = []
+                for name, module in (
+                    ("hdf5_group_items_in_base_class", hdf5_group_items_in_base_class),
+                    ("base_class_items_in_hdf5_group", base_class_items_in_hdf5_group),
+                ):
+                    if name not in self.skipped_rules:
+                        verify = self._profiled(
+                            profiling.KIND_RULE, name, module.verify
+                        )
+                        verify(self, v_item, base_class)
+                recorded, self._recording = self._recording, None
+                if signature is not None:
+                    self.group_memo[signature] = _relative_findings(
+                        v_item.h5_address, recorded
+                    )
 
             # TODO: validate attributes - both HDF5-supplied & NXDL-specified
             # TODO: validate symbols - both HDF5-supplied & NXDL-specified
@@ -344,6 +980,134 @@ class Data_File_Validator(object):
             c = nx_class + ": more validations needed"
             self.record_finding(v_item, "NeXus base class", finding.TODO, c)
 
+    def collapse_siblings(self):
+        """
+        Find runs of structurally identical sibling groups.
+
+        Beyond the first ``sibling_sample`` groups of each run,
+        the subtrees are marked as collapsed (not to be validated).
+        """
+        n = self.sibling_sample
+        for v_item in self.addresses.values():  # parents before children
+            if v_item.collapsed or v_item.h5_address not in self.children:
+                continue
+            by_classpath = collections.OrderedDict()
+            for child in self.children[v_item.h5_address]:
+                if child.h5_address in self.children:  # a group
+                    by_classpath.setdefault(child.classpath, []).append(child)
+            for siblings in by_classpath.values():
+                if len(siblings) <= n:
+                    continue
+                runs = collections.OrderedDict()
+                for child in siblings:
+                    runs.setdefault(self.subtree_signature(child), []).append(child)
+                for run in runs.values():
+                    if len(run) > n:
+                        for child in run[n:]:
+                            self._collapse(child)
+                        self.sibling_runs.append(
+                            (v_item, run[:n], run[n:], len(siblings))
+                        )
+
+    def _collapse(self, v_item):
+        """mark *v_item* and its subtree as collapsed"""
+        self.catalog.collapse(v_item)
+        for child in self.children.get(v_item.h5_address, []):
+            self._collapse(child)
+
+    def subtree_signature(self, v_item):
+        """
+        Return a structural signature of group *v_item* and all its content.
+
+        Like :meth:`group_signature`, also includes the signatures of the
+        subgroups and the type, shape, and attributes of the datasets.
+        """
+        signature = self._subtree_signatures.get(v_item.h5_address)
+        if signature is not None:
+            return signature
+        parts = [self.group_signature(v_item)]
+        for child in self.children.get(v_item.h5_address, []):
+            obj = child.h5_object
+            if child.h5_address in self.children:
+                parts.append(self.subtree_signature(child))
+            elif isinstance(obj, h5py.Dataset):
+                attrs = tuple(
+                    (k, _attribute_token(a)) for k, a in sorted(obj.attrs.items())
+                )
+                parts.append((child.name, obj.dtype.str, obj.shape, attrs))
+        signature = tuple(parts)
+        self._subtree_signatures[v_item.h5_address] = signature
+        return signature
+
+    def report_sibling_runs(self):
+        """record one finding for each run of collapsed sibling groups"""
+        for parent, sample, collapsed, total in self.sibling_runs:
+            roots = [v.h5_address for v in sample]
+            status = finding.OK
+            for f in self.validations:
+                if f.h5_address is None or not _in_subtrees(f.h5_address, roots):
+                    continue
+                if SIBLING_STATUS_RANK.get(f.status, 0) > SIBLING_STATUS_RANK[status]:
+                    status = f.status
+            c = (
+                f"{len(sample) + len(collapsed)} of {total} siblings {status}"
+                f", identical to {roots[0]}"
+                f" ({len(collapsed)} not validated individually)"
+            )
+            self.record_finding(parent, "identical siblings", status, c)
+
+    def group_signature(self, v_item):
+        """
+        Return a structural signature of the group *v_item*.
+
+        Groups with the same signature (NeXus class path, names, kinds, and
+        NeXus classes of children, names and values of attributes) have the
+        same outcome when compared with their base class.  Only the address
+        catalog is used.
+        """
+        parts = [v_item.classpath, v_item.object_type]
+        for child in self.children.get(v_item.h5_address, []):
+            obj = child.h5_object
+            if isinstance(obj, (h5py.Group, h5py.Dataset)):
+                kind = type(obj).__name__, child.object_type
+                parts.append((child.name, *kind, getattr(child, "nx_class", None)))
+            else:  # attribute
+                parts.append(("@" + child.name, _attribute_token(obj)))
+        return tuple(parts)
+
+    def _replay_group_findings(self, v_item, memo):
+        """
+        Record the *memo* findings of an identical group onto *v_item*.
+
+        Return ``False`` if the memo cannot be used for this group.
+        """
+        if memo is NOT_MEMOIZABLE:
+            return False
+        base = v_item.h5_address
+        targets = []
+        for relative_address, key, status, comment in memo:
+            target = self.addresses.get(base + relative_address)
+            if target is None:
+                return False
+            targets.append(target)
+        for target, (_r, key, status, comment) in zip(targets, memo):
+            comment = ADDRESS_PLACEHOLDER_PATTERN.sub(base, comment)
+            self.record_finding(target, key, status, comment)
+        return True
+
+    def definition_entries(self):
+        """
+        Return the groups to match with application definitions.
+
+        Each ``NXentry`` (with a ``definition`` field or not: see
+        :func:`~punx.validations.application_definition.detect`) and each
+        ``NXsubentry`` with a ``definition`` field.
+        """
+        entries = list(self.classpaths.get("/NXentry", []))
+        for v_item in self.classpaths.get("/NXentry/NXsubentry/definition", []):
+            entries.append(v_item.parent)
+        return entries
+
     def validate_application_definition(self, v_item):
         """
         validate group as a NeXus application definition
@@ -390,6 +1154,112 @@ class Data_File_Validator(object):
         return True
 
 
+class StopValidation(Exception):
+    """internal: stop the validation (at the first ERROR, with fail_fast)"""
+
+
+def _status_set(statuses):
+    """
+    set of status objects named by *statuses* or ``None`` (all statuses)
+
+    Raises ``KeyError`` for an unknown status key.
+    """
+    if statuses is None:
+        return None
+    selected = set()
+    for s in statuses:
+        if isinstance(s, str):
+            s = finding.VALID_STATUS_DICT[s.upper()]
+        selected.add(s)
+    if selected.issuperset(finding.VALID_STATUS_LIST):
+        return None  # nothing to filter
+    return selected
+
+
+def _link_target(value):
+    """HDF5 address named by a ``@target`` attribute (or ``None``)"""
+    target = utils.decode_byte_string(value)
+    if isinstance(target, (list, numpy.ndarray)) and len(target) == 1:
+        target = target[0]  # some writers store an array of one string
+    if isinstance(target, str):
+        return target
+
+
+def _describe_link(group, item):
+    """text that describes link *item* of *group* (such as a broken link)"""
+    link = group.get(item, getlink=True)
+    if isinstance(link, h5py.SoftLink):
+        return "soft link to " + link.path
+    if isinstance(link, h5py.ExternalLink):
+        return f"external link to {link.path} in file {link.filename}"
+    return type(link).__name__
+
+
+def _subtrees(items):
+    """
+    HDF5 addresses of the smallest set of subtrees that holds all *items*
+
+    *items* are in address catalog order (parents before children).
+    """
+    items = list(items)
+    remaining = set(v.h5_address for v in items)
+    roots = []
+    for v_item in items:
+        if v_item.h5_address is None:
+            continue  # attribute of non-NeXus content
+        parent = v_item.parent
+        if parent is None or parent.h5_address not in remaining:
+            roots.append(v_item.h5_address)
+    return roots
+
+
+def _in_subtrees(address, roots):
+    """Is HDF5 *address* in any of the subtrees at *roots*?"""
+    for root in roots:
+        if address == root or address.startswith((root + SLASH, root + "@")):
+            return True
+    return False
+
+
+SIBLING_STATUS_RANK = {
+    finding.OK: 0,
+    finding.NOTE: 1,
+    finding.WARN: 2,
+    finding.ERROR: 3,
+}  # the worst of these, in the sample, describes collapsed siblings
+NOT_MEMOIZABLE = ()
+ADDRESS_PLACEHOLDER = "\x00group\x00"
+ADDRESS_PLACEHOLDER_PATTERN = re.compile(re.escape(ADDRESS_PLACEHOLDER))
+
+
+def _attribute_token(value):
+    """hashable representation of an attribute value (for a signature)"""
+    if isinstance(value, numpy.ndarray):
+        return (str(value.dtype), value.shape, value.tobytes())
+    if isinstance(value, list):
+        return tuple(value)
+    return repr(value)
+
+
+def _relative_findings(base, recorded):
+    """
+    Re-express *recorded* findings relative to group address *base*.
+
+    Addresses (and mentions in comments) of the group are replaced
+    so the findings can be replayed onto another group.
+    """
+    mention = re.compile(r"(?<![\w/])" + re.escape(base) + r"(?=[/@\s]|$)")
+    relative = []
+    for address, key, status, comment in recorded:
+        if address is None or not (
+            address == base or address.startswith((base + SLASH, base + "@"))
+        ):
+            return NOT_MEMOIZABLE  # finding elsewhere in the file
+        comment = mention.sub(ADDRESS_PLACEHOLDER, str(comment))
+        relative.append((address[len(base):], key, status, comment))
+    return relative
+
+
 class ValidationItem(object):
 
     """HDF5 data file object for validation"""
@@ -398,6 +1268,7 @@ class ValidationItem(object):
         assert isinstance(parent, (ValidationItem, type(None)))
         self.parent = parent
         self.validations = {}  # validation findings go here
+        self.collapsed = False  # not validated: identical to a sibling
         self.h5_object = obj
         if hasattr(obj, "name"):
             self.h5_address = obj.name
@@ -427,6 +1298,10 @@ class ValidationItem(object):
         except Exception:
             return object.__str__(self, *args, **kwargs)
 
+    def is_collapsed(self):
+        """Is this item in a collapsed subtree (or an attribute of one)?"""
+        return self.collapsed or (self.parent is not None and self.parent.collapsed)
+
     def identify_object_type(self, *args, **kwargs):
         import h5py._hl
 
@@ -8,21 +8,60 @@
 # The full license is in the file LICENSE.txt, distributed with this software.
 # -----------------------------------------------------------------------------
 
-import numpy
+"""
+match an NXentry (or NXsubentry) to its application definition
+
+The requirements of the definition are compiled once (see
+:mod:`~punx.app_definitions`), then matched in one pass over the
+subtree of the entry, using only the address catalog (children and
+attributes of each group) and the first value of fields with
+enumerations.  Groups named only by their class match each child
+group of that class (the best fit, if the definition has several
+such groups of one class).
+
+A field with any name (``nameType="any"``) matches each child field
+not named by the definition.
+
+Findings: OK for each member found (with an allowed value), ERROR
+for a required member not found (or found too many times) or a value
+not allowed, NOTE for a recommended member not found, WARN for a link
+to an item of another NXDL path.  Optional members not found are not
+reported.
+
+An ``NXentry`` with no ``definition`` field (or an unknown one, or one
+it satisfies less than another) is also ranked against all application
+definitions of the file set (see
+:class:`~punx.app_definitions.DefinitionIndex`): COMMENT for each of
+the best candidates.  Only the class paths of the catalog are probed.
+"""
 
 from .. import finding
+from .. import member_matcher
 from .. import utils
-from ..validate import ValidationItem
+from . import registry
+
+STATUSES = (finding.OK, finding.NOTE, finding.WARN, finding.ERROR, finding.COMMENT)
+DETECTION_LIMIT = 3  # report at most this many candidate definitions
+DETECTION_MINIMUM = 0.75  # part of its required class paths found, to be a candidate
+DETECTION_TEST_NAME = "application definition detection"
+TEST_NAMES = {
+    "group": "NXDL group",
+    "field": "NXDL field",
+    "attribute": "NXDL attribute",
+    "link": "NXDL link",
+}
 
 
 def verify(validator, v_item):
     """
-    Verify items specified in application definition are present in HDF5 data file
+    Verify the entry *v_item* against its application definition
+    (the value of its ``definition`` field).
     """
-    item = v_item.h5_object["definition"][()]
-    if isinstance(item, (list, tuple, numpy.ndarray)):
-        item = item[0]
-    ad_name = str(utils.decode_byte_string(item))
+    v_definition = validator.addresses.get(v_item.h5_address + "/definition")
+    if v_definition is None:
+        detect(validator, v_item)
+        return
+    ad_name = str(validator.dataset_values.first(v_definition.h5_object))
     key = "NeXus application definition"
 
     ad = validator.manager.classes.get(ad_name)
@@ -30,6 +69,7 @@ def verify(validator, v_item):
     msg = ad_name + f": {'un' if ad is None else ''}recognized NXDL specification"
     validator.record_finding(v_item, "known NXDL", status, msg)
     if ad is None:
+        detect(validator, v_item)
         return
 
     msg = ad_name
@@ -42,46 +82,266 @@ def verify(validator, v_item):
         msg += ": unknown application definition"
     validator.record_finding(v_item, key, status, msg)
 
-    c = ad_name + ": more validations needed"
-    validator.record_finding(v_item, key, finding.TODO, c)
-
-    # TODO: groups, attributes, links, type, ... in separate functions
-    ad_entry = list(ad.groups.values())[
-        0
-    ]  # only 1 at this level of the application definition (ad)
-    for field, spec in ad_entry.fields.items():
-
-        msg = "%s:%s" % (ad_name, field)
-        h5_obj = v_item.h5_object.get(field)
-        status = finding.TF_RESULT[h5_obj is not None]
-        if h5_obj is None:
-            msg += " not"
-        msg += " found"
-        v_obj = ValidationItem(v_item, h5_obj)
-        validator.record_finding(v_obj, "NXDL field", status, msg)
-
-        if len(spec.enumerations) > 0:
-            found = False
-            for enum in spec.enumerations:
-                obj = h5_obj[()]
-                if isinstance(obj, (list, tuple, numpy.ndarray)):
-                    obj = obj[0]
-                found = enum == utils.decode_byte_string(obj)
-                if found:
-                    break
-            msg = "%s:%s" % (ad_name, field)
-            required = (
-                spec.xml_attributes["minOccurs"].default_value == 1
-            )  # TODO: is this right?
-            if required:
-                msg += " (required)"
-            else:
-                msg += " (optional)"
-            status = finding.TF_RESULT[found]
-            if found:
-                msg += " has expected value: " + enum
-            else:
-                msg += " does not have value: " + " | ".join(spec.enumerations)
-            validator.record_finding(v_obj, "NXDL field enumerations", status, msg)
-
-        # TODO: attributes, xml_attributes, dimensions, ...
+    tree = validator.manager.requirement_tree(ad_name)
+    if len(tree.groups) > 0:
+        # only one group at this level of the application definition (NXentry)
+        nx_class = getattr(v_item, "nx_class", None)
+        spec = next((g for g in tree.groups if g.nx_class == nx_class), tree.groups[0])
+        verify_group(validator, ad_name, spec, v_item)
+    detect(validator, v_item, ad_name)
+
+
+def detect(validator, v_item, ad_name=None):
+    """
+    Report the application definitions entry *v_item* would satisfy best.
+
+    With a (known) definition *ad_name*: only if another one is
+    satisfied better.
+    """
+    if getattr(v_item, "nx_class", None) != "NXentry":
+        return
+    index = validator.manager.definition_index()
+    present = set(entry_classpaths(validator, v_item, index.definitions))
+    ranking = [r for r in index.rank(present) if r[1] >= DETECTION_MINIMUM * r[2]]
+
+    if ad_name is not None:
+        required = index.required.get(ad_name)
+        if required is None:
+            return  # not ranked: nothing required in an NXentry
+        found = len(required & present)
+        ranking = [  # better: larger part of its required class paths found
+            r
+            for r in ranking
+            if r[0] != ad_name and r[1] * len(required) > found * r[2]
+        ]
+        if len(ranking) == 0:
+            return
+        c = f"{ad_name} has {found} of {len(required)} required class paths"
+        validator.record_finding(v_item, DETECTION_TEST_NAME, finding.COMMENT, c)
+
+    for name, n, total in ranking[:DETECTION_LIMIT]:
+        c = (
+            f"candidate application definition: {name}"
+            f" ({n} of {total} required class paths)"
+        )
+        validator.record_finding(v_item, DETECTION_TEST_NAME, finding.COMMENT, c)
+
+
+def entry_classpaths(validator, v_item, classpaths):
+    """The *classpaths* of the catalog found in entry *v_item*."""
+    candidates = [cp for cp in classpaths if cp in validator.classpaths]
+    if len(validator.classpaths.get("/NXentry", [])) == 1:
+        return candidates  # all in this entry
+    prefixes = (v_item.h5_address + "/", v_item.h5_address + "@")
+    return [
+        cp
+        for cp in candidates
+        if any(
+            (v.h5_address or "").startswith(prefixes) for v in validator.classpaths[cp]
+        )
+    ]
+
+
+def members(validator, v_item):
+    """child groups and fields of group *v_item*, by name (from the catalog)"""
+    groups, fields = {}, {}
+    for child in validator.children.get(v_item.h5_address, []):
+        if child.parent is not v_item or registry.object_kind(child) == "attribute":
+            continue
+        if utils.isHdf5Group(child.h5_object):
+            groups[child.name] = child
+        else:
+            fields[child.name] = child
+    return groups, fields
+
+
+def verify_group(validator, ad_name, req, v_item):
+    """Verify group *v_item* matches requirement *req* (and all below)."""
+    groups, fields = members(validator, v_item)
+    for a_req in req.attributes:
+        verify_attribute(validator, ad_name, a_req, v_item)
+
+    flexible = assign_fields(req, fields)
+    for f_req in req.fields:
+        if f_req.flexible:
+            matches = flexible[f_req.name]
+        else:
+            matches = [fields[f_req.name]] if f_req.name in fields else []
+        if len(matches) == 0:
+            missing(validator, ad_name, f_req, v_item)
+        for v_field in matches:
+            verify_field(validator, ad_name, f_req, v_field)
+
+    for l_req in req.links:
+        v_link = fields.get(l_req.name, groups.get(l_req.name))
+        if v_link is None:
+            missing(validator, ad_name, l_req, v_item)
+        else:
+            verify_link(validator, ad_name, l_req, v_link)
+
+    assigned = assign_groups(validator, req.groups, groups)
+    for g_req in req.groups:
+        if g_req.name is None:
+            matches = [g for g in groups.values() if assigned.get(g.name) is g_req]
+        else:
+            matches = [groups[g_req.name]] if g_req.name in groups else []
+        n = len(matches)
+        c = f"{ad_name}:{g_req.nxdl_path} found {n} times"
+        if n > 0 and g_req.max_occurs is not None and n > g_req.max_occurs:
+            c += f", at most {g_req.max_occurs}"
+            validator.record_finding(v_item, TEST_NAMES["group"], finding.ERROR, c)
+        elif 0 < n < g_req.min_occurs:
+            c += f", at least {g_req.min_occurs}"
+            validator.record_finding(v_item, TEST_NAMES["group"], finding.ERROR, c)
+        elif n == 0:
+            missing(validator, ad_name, g_req, v_item)
+        for v_group in matches:
+            c = f"{ad_name}:{g_req.nxdl_path} found"
+            if getattr(v_group, "nx_class", None) != g_req.nx_class:
+                c += f", not {g_req.nx_class}"
+                validator.record_finding(v_group, TEST_NAMES["group"], finding.ERROR, c)
+                continue
+            validator.record_finding(v_group, TEST_NAMES["group"], finding.OK, c)
+            verify_group(validator, ad_name, g_req, v_group)
+
+
+def assign_fields(req, fields):
+    """
+    Assign each field not named by *req* to one of its flexible fields.
+
+    Returns a list of the fields (items) of each flexible field of *req*
+    (``nameType="any"``), by name.  A field goes to the first flexible
+    field whose name pattern it matches (such as ``run_0`` for
+    ``run_NUMBER``, see :func:`~punx.member_matcher.name_pattern`),
+    else to the first flexible field.
+    """
+    specs = [f_req for f_req in req.fields if f_req.flexible]
+    assigned = {f_req.name: [] for f_req in specs}
+    if len(specs) == 0:
+        return assigned
+    named = set(m.name for m in req.fields + req.links if not m.flexible)
+    patterns = [(member_matcher.name_pattern(f_req.name), f_req) for f_req in specs]
+    for name, v_field in fields.items():
+        if name in named:
+            continue
+        f_req = next((r for p, r in patterns if p.fullmatch(name)), specs[0])
+        assigned[f_req.name].append(v_field)
+    return assigned
+
+
+def assign_groups(validator, specs, groups):
+    """
+    Assign each child group (by name) to one of the unnamed group *specs*.
+
+    When several unnamed specs have the class of the group (such as
+    the NXdata of NXcanSAS: SASdata and SAStransmission_spectrum), the
+    spec it fits best: the most attribute values allowed and required
+    members found.
+    """
+    by_class = {}
+    for g_req in specs:
+        if g_req.name is None:
+            by_class.setdefault(g_req.nx_class, []).append(g_req)
+    named = set(g_req.name for g_req in specs)
+    assigned = {}
+    for name, v_group in groups.items():
+        candidates = by_class.get(getattr(v_group, "nx_class", None), [])
+        if name in named or len(candidates) == 0:
+            continue
+        if len(candidates) == 1:
+            assigned[name] = candidates[0]
+        else:
+            assigned[name] = max(
+                candidates, key=lambda g_req: fitness(validator, g_req, v_group)
+            )  # the first of equals
+    return assigned
+
+
+def fitness(validator, req, v_group):
+    """How well does group *v_group* fit requirement *req*?  (higher is better)"""
+    groups, fields = members(validator, v_group)
+    score = 0
+    for a_req in req.attributes:
+        a_item = validator.addresses.get(f"{v_group.h5_address}@{a_req.name}")
+        if a_item is None:
+            continue
+        score += 1
+        if a_req.enumerations is not None:
+            value = attribute_value(a_item)
+            score += 2 if str(value) in a_req.enumerations else -2
+    for member in req.fields + req.links + req.groups:
+        if member.required and member.name in (*fields, *groups):
+            score += 1
+    return score
+
+
+def attribute_value(a_item):
+    """value of attribute item *a_item* (read by the address catalog)"""
+    value = utils.decode_byte_string(a_item.h5_object)
+    if isinstance(value, list) and len(value) == 1:
+        value = value[0]
+    return value
+
+
+def verify_field(validator, ad_name, req, v_field):
+    """Verify field *v_field* matches requirement *req* (and its attributes)."""
+    c = f"{ad_name}:{req.nxdl_path} found"
+    validator.record_finding(v_field, TEST_NAMES["field"], finding.OK, c)
+    if req.enumerations is not None and utils.isHdf5Dataset(v_field.h5_object):
+        value = validator.dataset_values.first(v_field.h5_object)
+        verify_value(validator, ad_name, req, v_field, value)
+    for a_req in req.attributes:
+        verify_attribute(validator, ad_name, a_req, v_field)
+
+
+def verify_attribute(validator, ad_name, req, v_item):
+    """Verify attribute *req* of *v_item* (from the address catalog)."""
+    a_item = validator.addresses.get(f"{v_item.h5_address}@{req.name}")
+    if a_item is None:
+        missing(validator, ad_name, req, v_item)
+        return
+    c = f"{ad_name}:{req.nxdl_path} found"
+    validator.record_finding(a_item, TEST_NAMES["attribute"], finding.OK, c)
+    if req.enumerations is not None:
+        value = attribute_value(a_item)
+        verify_value(validator, ad_name, req, a_item, value)
+
+
+def verify_value(validator, ad_name, req, v_item, value):
+    """Is the *value* of *v_item* one of the enumerations of *req*?"""
+    test_name = TEST_NAMES[req.kind] + " enumerations"
+    if str(value) in req.enumerations:
+        c = f"{ad_name}:{req.nxdl_path} has expected value: {value}"
+        validator.record_finding(v_item, test_name, finding.OK, c)
+    else:
+        allowed = " | ".join(sorted(req.enumerations))
+        c = f"{ad_name}:{req.nxdl_path} has value: {value}, not: {allowed}"
+        validator.record_finding(v_item, test_name, finding.ERROR, c)
+
+
+def verify_link(validator, ad_name, req, v_link):
+    """Verify link *v_link* (found by name) points to the NXDL target of *req*."""
+    c = f"{ad_name}:{req.nxdl_path} found"
+    validator.record_finding(v_link, TEST_NAMES["link"], finding.OK, c)
+    target = validator.link_targets.get(v_link.h5_address)
+    v_target = None if target is None else validator.addresses.get(target)
+    if req.target is not None and v_target is not None:
+        if v_target.classpath != req.target:
+            c = (
+                f"{ad_name}:{req.nxdl_path} links to {v_target.classpath},"
+                f" not {req.target}"
+            )
+            validator.record_finding(v_link, TEST_NAMES["link"], finding.WARN, c)
+
+
+def missing(validator, ad_name, req, v_parent):
+    """Record member *req* of *v_parent* not found (unless optional)."""
+    if req.required:
+        status = finding.ERROR
+        c = f"{ad_name}:{req.nxdl_path} (required) not found"
+    elif req.recommended:
+        status = finding.NOTE
+        c = f"{ad_name}:{req.nxdl_path} (recommended) not found"
+    else:
+        return
+    validator.record_finding(v_parent, TEST_NAMES[req.kind], status, c)
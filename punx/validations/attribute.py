@@ -12,19 +12,19 @@ import numpy
 
 from .. import finding, utils
 from . import item_name
+from . import registry
 
 TEST_NAME = "attribute value"
+STATUSES = (finding.OK, finding.NOTE, finding.ERROR, finding.TODO)  # possible outcomes
 
 
+@registry.rule(
+    "attribute", kinds=["attribute"], classpaths=["*@*"], statuses=STATUSES
+)
 def verify(validator, v_item):
     """
-    Verify given item as attribute
+    Verify given item as attribute (of NeXus content)
     """
-    if v_item.h5_address is None:
-        return
-    if v_item.h5_address.find("@") < 0:
-        return
-
     handler = HANDLER_DICT.get(v_item.name) or generic_handler
     handler(validator, v_item)
 
@@ -87,9 +87,7 @@ def axes_handler(validator, v_item):
             status = finding.ERROR
             k = "did not find field for named axis"
         validator.record_finding(v_item, test_name, status, k)
-
-    test_name = "compare shapes of signal & axes data"
-    validator.record_finding(v_item, TEST_NAME, finding.TODO, "implement")
+    # shapes of signal & axes: see the dimensions rule
 
 
 def nxclass_handler(validator, v_item):
@@ -152,7 +150,11 @@ def signal_handler(validator, v_item):
 
 
 def target_handler(validator, v_item):
-    """validate @target"""
+    """
+    validate @target
+
+    Addresses are found in the address catalog (no HDF5 access).
+    """
     target = utils.decode_byte_string(v_item.h5_object)
 
     if not target.startswith("/"):
@@ -170,13 +172,13 @@ def target_handler(validator, v_item):
             return
         else:
             addr += "/" + p
-            if addr not in validator.h5:
+            if addr not in validator.address_set:
                 status = finding.ERROR
                 c = "partial HDF5 address not found in file: " + addr
                 validator.record_finding(v_item, TEST_NAME, status, c)
                 return
 
-    test = target in validator.h5
+    test = target in validator.address_set
     status = finding.TF_RESULT[test]
     c = {True: "found", False: "not found"}[test]
     c += ": @target=" + target
@@ -9,42 +9,64 @@
 # -----------------------------------------------------------------------------
 
 from .. import finding
+from . import registry
 
-# from .. import utils
+STATUSES = (finding.OK, finding.OPTIONAL)  # outcomes
+NAMES_SHOWN = 3  # of the children matched to one NXDL member
+
+
+def members(validator, v_item):
+    """child groups and fields of group *v_item* (from the catalog), by name"""
+    children = {}
+    for child in validator.children.get(v_item.h5_address, []):
+        if registry.object_kind(child) != "attribute":
+            children.setdefault(child.name, child)
+    return list(children.values())
+
+
+def found_comment(address, spec_name, names, label):
+    """Describe the children *names* (at *address*) matched to NXDL *spec_name*."""
+    c = ", ".join(address + "/" + name for name in names[:NAMES_SHOWN])
+    if len(names) > NAMES_SHOWN:
+        c += f" and {len(names) - NAMES_SHOWN} more"
+    if names != [spec_name]:
+        c += " (" + label + ")"  # matched by flexible name or by NeXus class
+    return c
 
 
 def verify(validator, v_item, base_class):
     """
     Verify items specified in base class NXDL with data file
+
+    The children of the group (in the catalog) are matched by name,
+    groups named only by their NeXus class by class, and flexible
+    names by pattern (see :class:`~punx.member_matcher.MemberMatcher`).
     """
-    # TODO: need to match up NXDL objects with flexible names with the HDF5 file counterparts
+    matcher = validator.manager.member_matcher(base_class.title)
+    assigned = matcher.assign(members(validator, v_item))
+    address = v_item.h5_address.rstrip("/")
+
     for field_name in sorted(base_class.fields.keys()):
         test = "NXDL field in data file"
         f = finding.OK
-        found = field_name in v_item.h5_object
-        if found:
-            c = "found"
+        names = assigned.get(field_name, [])
+        if len(names) > 0:
+            c = "found: " + found_comment(address, field_name, names, field_name)
         else:
-            # TODO: check if name is flexible
-            c = "not found"
+            c = "not found: " + address + "/" + field_name
             f = finding.OPTIONAL
-        c += ": " + v_item.h5_address
-        if not c.endswith("/"):
-            c += "/"
-        c += field_name
         validator.record_finding(v_item, test, f, c)
 
     for group_name, group_object in sorted(base_class.groups.items()):
         test = "NXDL group in data file"
         f = finding.OK
-        found = group_name in v_item.h5_object
-        if found:
-            t = "found: "
+        names = assigned.get(group_name, [])
+        if len(names) > 0:
+            t = "found:  in "
+            t += found_comment(address, group_name, names, group_object.nx_class)
         else:
-            # TODO: check if name is flexible
-            t = "not found: "
+            t = "not found:  in " + address + "/" + group_name
             f = finding.OPTIONAL
-        t += " in " + v_item.h5_address + "/" + group_name
         validator.record_finding(v_item, test, f, t)
 
         # ---------- this code is in the wrong place: to nxdl_manager -----
@@ -54,7 +76,7 @@ def verify(validator, v_item, base_class):
         minOccurs = int(group_object.attributes.get("minOccurs", minOccurs))
         group_object.minOccurs = minOccurs
         # ---------------------------------------------------------
-        # FIXME: report if required item is present, name could be flexible
+        # FIXME: report if required item is present
 
     for link_name, link_obj in base_class.links.items():  # noqa
         pass  # TODO: complete
@@ -0,0 +1,305 @@
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2023, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+checks of the data in datasets (opt-in: they read all of it)
+
+The checks of each numeric dataset depend on its NXDL type (from the
+base class of its group) and its role in a ``NXdata`` group:
+
+==============  =============================================
+check           applies to
+==============  =============================================
+finite          floating point data: no NaN or Inf
+positive        ``NX_POSINT``: all values > 0
+not negative    ``NX_UINT``, and counts (``@units="counts"``,
+                the data of ``NXdetector`` and ``NXmonitor``)
+monotonic       axes (1-D) named by ``@axes`` or ``AXISNAME_indices``:
+                strictly (no constant axis, no repeated values)
+zero frames     ``@signal`` data: no frame (along the first
+                dimension, for rank > 2) is all zero
+==============  =============================================
+
+Each dataset is read in blocks of whole HDF5 chunks (rows, if not
+chunked) of at most ``MAX_BLOCK_BYTES``, and each check is a
+vectorized (numpy) reduction of the block.  Datasets are read in
+parallel (threads), the findings are recorded in catalog order.
+
+.. autosummary::
+
+   ~ContentChecker
+   ~plan_checks
+   ~scan_dataset
+   ~blocks
+
+"""
+
+import concurrent.futures
+import itertools
+import os
+
+import numpy
+
+from .. import finding
+from .. import utils
+from ..validate import CLASSPATH_OF_NON_NEXUS_CONTENT
+
+TEST_NAME = "data content"
+STATUSES = (finding.OK, finding.WARN, finding.ERROR)
+MAX_BLOCK_BYTES = 16 * 1024 * 1024  # largest block read (unless one chunk is larger)
+WORKERS = min(4, os.cpu_count() or 1)  # datasets read at the same time
+
+FINITE = "finite"
+POSITIVE = "positive"
+NOT_NEGATIVE = "not negative"
+MONOTONIC = "monotonic"
+ZERO_FRAMES = "zero frames"
+COUNTS_UNITS = ("counts", "count", "cts")
+COUNTS_FIELDS = (("NXdetector", "data"), ("NXmonitor", "data"))
+
+
+class ContentChecker(object):
+    """
+    check the data of datasets, in parallel, and record the findings
+
+    validator obj:
+        Instance of :class:`~punx.validate.Data_File_Validator`
+    v_items [obj]:
+        :class:`~punx.validate.ValidationItem` of each dataset to consider
+        (those without any checks are dropped, see :attr:`items`)
+    workers int:
+        number of datasets read at the same time, default: ``WORKERS``
+    max_bytes int:
+        largest block read, default: ``MAX_BLOCK_BYTES``
+
+    The datasets are read (when the first finding is needed) in
+    threads.  Call :meth:`close` when done.
+    """
+
+    def __init__(self, validator, v_items, workers=WORKERS, max_bytes=MAX_BLOCK_BYTES):
+        self.validator = validator
+        self.workers = max(1, workers)
+        self.max_bytes = max_bytes
+        self.items = []  # items with checks, one for each HDF5 dataset
+        self._plans = {}
+        self._futures = {}
+        self._executor = None
+        seen = set()
+        for v_item in v_items:
+            plan = plan_checks(validator, v_item)
+            if len(plan) == 0 or v_item.h5_object.id in seen:
+                continue  # (a hard link is checked once)
+            seen.add(v_item.h5_object.id)
+            self.items.append(v_item)
+            self._plans[v_item.h5_address] = plan
+
+    def check(self, v_item):
+        """Record the findings of the data of *v_item*."""
+        if self._executor is None:
+            self._start()
+        stats = self._futures[v_item.h5_address].result()
+        record_findings(self.validator, v_item, stats)
+
+    def close(self):
+        """Stop reading (any datasets not yet checked)."""
+        if self._executor is not None:
+            for future in self._futures.values():
+                future.cancel()
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _start(self):
+        self._executor = concurrent.futures.ThreadPoolExecutor(self.workers)
+        for v_item in self.items:
+            address = v_item.h5_address
+            self._futures[address] = self._executor.submit(
+                scan_dataset, v_item.h5_object, self._plans[address], self.max_bytes
+            )
+
+
+def plan_checks(validator, v_item):
+    """
+    Return the checks (a set) of the data of dataset *v_item*.
+    """
+    dataset = v_item.h5_object
+    if (
+        not utils.isNeXusDataset(dataset)
+        or v_item.classpath == CLASSPATH_OF_NON_NEXUS_CONTENT
+        or v_item.parent is None
+        or dataset.dtype.kind not in "iuf"
+        or not dataset.size  # also: no dataspace
+    ):
+        return set()
+
+    parent = v_item.parent
+    nx_class = getattr(parent, "nx_class", None)
+    nxdl_type = None
+    base_class = validator.manager.classes.get(nx_class)
+    if base_class is not None and v_item.name in base_class.fields:
+        nxdl_type = base_class.fields[v_item.name].nxdl_type
+
+    plan = set()
+    if dataset.dtype.kind == "f" and nxdl_type in (None, "NX_FLOAT", "NX_NUMBER"):
+        plan.add(FINITE)
+    if nxdl_type == "NX_POSINT":
+        plan.add(POSITIVE)
+    elif nxdl_type == "NX_UINT" and dataset.dtype.kind != "u":
+        plan.add(NOT_NEGATIVE)
+    units = _attribute(validator, v_item, "units")
+    is_counts = (nx_class, v_item.name) in COUNTS_FIELDS or (
+        isinstance(units, str) and units.lower() in COUNTS_UNITS
+    )
+    if is_counts and dataset.dtype.kind != "u":
+        plan.add(NOT_NEGATIVE)
+
+    if nx_class == "NXdata":
+        axes = _attribute(validator, parent, "axes") or []
+        if isinstance(axes, str):
+            axes = [axes]
+        if v_item.name == _attribute(validator, parent, "signal"):
+            plan.add(ZERO_FRAMES)
+        elif len(dataset.shape) == 1 and (
+            v_item.name in axes
+            or _attribute(validator, parent, v_item.name + "_indices") is not None
+        ):
+            plan.add(MONOTONIC)
+    return plan
+
+
+def blocks(shape, chunks=None, itemsize=8, max_bytes=MAX_BLOCK_BYTES):
+    """
+    Selections (tuples of slices) that cover a dataset of *shape*.
+
+    Each block is made of whole *chunks* (rows of one, if not chunked)
+    and has at most *max_bytes* (unless one chunk is larger).
+    Blocks of a 1-D dataset are in order.
+    """
+    rank = len(shape)
+    if rank == 0:
+        yield ()
+        return
+    chunks = chunks or (1,) * rank
+    for k in range(rank):
+        size = itemsize * int(numpy.prod(chunks[: k + 1])) * int(numpy.prod(shape[k + 1:]))
+        if size <= max_bytes:
+            break
+    # iterate chunk by chunk along the axes before k, many chunks along axis k
+    steps = list(chunks[:k]) + [chunks[k] * max(1, max_bytes // max(size, 1))]
+    ranges = [range(0, shape[i], steps[i]) for i in range(k + 1)]
+    for starts in itertools.product(*ranges):
+        selection = tuple(
+            slice(start, min(start + steps[i], shape[i]))
+            for i, start in enumerate(starts)
+        )
+        yield selection + (slice(None),) * (rank - k - 1)
+
+
+def scan_dataset(dataset, plan, max_bytes=MAX_BLOCK_BYTES):
+    """
+    Read the data of *dataset* (block by block), return the statistics.
+
+    The statistics (a dict) are counts of the values that fail each
+    check of *plan* (``size`` is the number of values read).
+    An ``error`` is returned if the data cannot be read.
+    """
+    shape = dataset.shape
+    rank = len(shape)
+    stats = dict(size=0, nan=0, inf=0, not_positive=0, negative=0, repeated=0)
+    increasing = decreasing = False
+    previous = None
+    n_frames = shape[0] if rank > 2 else 1
+    nonzero = numpy.zeros(n_frames, dtype=bool)
+    try:
+        for selection in blocks(shape, dataset.chunks, dataset.dtype.itemsize, max_bytes):
+            block = numpy.asarray(dataset[selection])
+            stats["size"] += block.size
+            if FINITE in plan:
+                stats["nan"] += int(numpy.count_nonzero(numpy.isnan(block)))
+                stats["inf"] += int(numpy.count_nonzero(numpy.isinf(block)))
+            if POSITIVE in plan:
+                stats["not_positive"] += int(numpy.count_nonzero(block <= 0))
+            if NOT_NEGATIVE in plan:
+                stats["negative"] += int(numpy.count_nonzero(block < 0))
+            if MONOTONIC in plan and block.size > 0:
+                steps = numpy.diff(block if previous is None else numpy.r_[previous, block])
+                increasing = increasing or bool(numpy.any(steps > 0))
+                decreasing = decreasing or bool(numpy.any(steps < 0))
+                stats["repeated"] += int(numpy.count_nonzero(steps == 0))
+                previous = block[-1]
+            if ZERO_FRAMES in plan and block.size > 0:
+                if rank > 2:
+                    axes = tuple(range(1, rank))
+                    nonzero[selection[0]] |= numpy.any(block != 0, axis=axes)
+                else:
+                    nonzero[0] |= bool(numpy.any(block != 0))
+    except (OSError, ValueError) as exc:
+        return dict(error=str(exc).splitlines()[0], plan=plan)
+
+    stats["plan"] = plan
+    stats["increasing"], stats["decreasing"] = increasing, decreasing
+    stats["frames"] = n_frames if rank > 2 else None
+    stats["zero_frames"] = int(n_frames - numpy.count_nonzero(nonzero))
+    return stats
+
+
+def _attribute(validator, v_item, name):
+    """value of attribute *name* of *v_item* (from the address catalog)"""
+    a_item = validator.addresses.get(f"{v_item.h5_address}@{name}")
+    if a_item is None:
+        return None
+    value = utils.decode_byte_string(a_item.h5_object)
+    if isinstance(value, list) and len(value) == 1:
+        value = value[0]
+    return value
+
+
+def record_findings(validator, v_item, stats):
+    """Record a finding for each check of *v_item* (from its *stats*)."""
+
+    def record(check, status, comment):
+        validator.record_finding(v_item, f"{TEST_NAME}: {check}", status, comment)
+
+    plan = stats["plan"]
+    if "error" in stats:
+        record("read", finding.ERROR, "cannot read: " + stats["error"])
+        return
+    n = stats["size"]
+    if FINITE in plan:
+        bad = stats["nan"] + stats["inf"]
+        c = f"{stats['nan']} NaN and {stats['inf']} Inf of {n} values"
+        record(FINITE, finding.WARN if bad else finding.OK, c)
+    if POSITIVE in plan:
+        bad = stats["not_positive"]
+        c = f"{bad} of {n} values not positive (NX_POSINT)"
+        record(POSITIVE, finding.ERROR if bad else finding.OK, c)
+    if NOT_NEGATIVE in plan:
+        bad = stats["negative"]
+        c = f"{bad} of {n} values negative"
+        record(NOT_NEGATIVE, finding.WARN if bad else finding.OK, c)
+    if MONOTONIC in plan:
+        direction = "decreasing" if stats["decreasing"] else "increasing"
+        repeated = stats["repeated"]
+        if stats["increasing"] and stats["decreasing"]:
+            status, c = finding.WARN, "not monotonic"
+        elif n > 1 and not (stats["increasing"] or stats["decreasing"]):
+            status, c = finding.WARN, f"constant: all {n} values equal"
+        elif repeated > 0:
+            c = f"not strictly monotonic: {direction}, {repeated} repeated values"
+            status = finding.WARN
+        else:
+            status, c = finding.OK, "monotonic " + direction
+        record(MONOTONIC, status, c)
+    if ZERO_FRAMES in plan:
+        bad = stats["zero_frames"]
+        if stats["frames"] is None:
+            c = "all values are zero" if bad else "not all zero"
+        else:
+            c = f"{bad} of {stats['frames']} frames all zero"
+        record(ZERO_FRAMES, finding.WARN if bad else finding.OK, c)
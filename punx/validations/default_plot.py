@@ -9,177 +9,376 @@
 # -----------------------------------------------------------------------------
 
 
-"""validate the setup identifying the default plot"""
+"""
+validate the setup identifying the default plot
 
-import collections
+Each ``NXentry`` and ``NXsubentry`` (at any depth) is resolved once,
+using only the address catalog (children and attributes of each
+group): its ``@default`` (an ``NXdata``, or an ``NXsubentry`` resolved
+the same way), the ``@signal`` of that ``NXdata`` (v3), or its field
+with ``@signal=1`` (v2), then the ``@axes`` and ``AXISNAME_indices``
+of the plot.  Without ``@default``, the first ``NXdata`` (of the
+entry) with a plottable ``@signal``, then with a v2 signal.
+
+Findings: a verdict for each entry (``NeXus default plot, entry``),
+the ``@signal`` of each ``NXdata`` of an entry, and one for the file
+(``NeXus default plot``): found if any entry has a default plot.
+"""
 
 from .. import finding
 from .. import utils
+from . import registry
+
+STATUSES = (finding.OK, finding.NOTE, finding.WARN, finding.ERROR)  # outcomes
+ENTRY_CLASSES = ("NXentry", "NXsubentry")
+TEST_NAME = "NeXus default plot"
+TEST_ENTRY = TEST_NAME + ", entry"
+TEST_V3 = TEST_NAME + " v3"
+TEST_V2 = TEST_NAME + " v2"
+
+
+class Plot(object):
+    """
+    default plot of an entry (or of an ``NXdata`` group)
+
+    status obj:
+        verdict: :class:`~punx.finding.ValidationResultStatus`
+        (``None``: not resolved yet)
+    comment str:
+        describes the plot, or why there is none
+    signal str:
+        HDF5 address of the plottable field (``None``: none)
+    version str:
+        NeXus rule that identified the plot: ``v3`` or ``v2``
+    explicit bool:
+        named by ``@default`` all the way down from the entry
+    v_signal obj:
+        ``@signal`` attribute item (v3) or the field (v2)
+    """
+
+    def __init__(self, status=None, comment="", signal=None, version=None):
+        self.status = status
+        self.comment = comment
+        self.signal = signal
+        self.version = version
+        self.explicit = False
+        self.v_signal = None
 
 
 def verify(validator):
     """entry function of this module"""
-    # TODO: isn't this validation needed for each NXentry and NXsubentry?
-    c = "need to validate existence of default plot"
-    obj = validator.addresses["/"]
-    status = None
+    missing = missing_status(validator)
+    v2 = find_v2(validator)
+    entries = [
+        v_item
+        for v_item in entry_groups(validator)
+        if not v_item.is_collapsed()
+    ]
 
-    methods = collections.OrderedDict()
-    methods["v3"] = default_plot_v3
-    methods["v2"] = default_plot_v2
-    methods["v1"] = default_plot_v1
-    for k, method in methods.items():
-        addr = method(validator)
-        if addr is not None:
-            c = "found by %s: %s" % (k, addr)
+    plots = {}  # by HDF5 address of entry (or NXdata)
+    for v_entry in entries:
+        plot = resolve_entry(validator, v_entry, plots, v2, missing)
+        validator.record_finding(v_entry, TEST_ENTRY, plot.status, plot.comment)
+
+    # NIAC2014: @default from the file root, then a plottable @signal
+    v_root = validator.addresses["/"]
+    niac2014 = None
+    v_default = attribute(validator, v_root.h5_address, "default")
+    if v_default is not None:
+        top = plots.get(join(v_root.h5_address, text(v_default)))
+        if top is not None and top.explicit and top.version == "v3":
+            niac2014 = top
+            c = "default plot setup in /NXentry/NXdata"
+            validator.record_finding(top.v_signal, TEST_V3 + " NIAC2014", finding.OK, c)
+
+    status = None
+    for version in ("v3", "v2"):
+        found = [
+            plots[v.h5_address]
+            for v in entries
+            if plots[v.h5_address].version == version
+        ]
+        if version == "v2" and len(found) == 0:
+            # no v3 plot: as NeXus v2, a field with @signal=1 in any group
+            for address in list(v2):
+                plot = check_v2(validator, v2, address)
+                if plot is not None and plot.version == version:
+                    found.append(plot)
+        if len(found) > 0:
+            c = f"found by {version}: {found[-1].signal}"  # the field
+            if version == "v3" and niac2014 is not None:
+                c = f"found by {version}: {niac2014.v_signal.h5_address}"
             status = finding.OK
-            break  # no need to look further
+            break
     if status is None:
         c = "no default plot described"
-        data_group = validator.manager.classes["NXentry"].groups["data"]
-        if hasattr(data_group, "minOccurs"):
-            minOccurs = data_group.minOccurs
-        else:
-            minOccurs = 1
-        if minOccurs > 0:
-            status = finding.ERROR
-        else:
-            # even though not "required" it is strongly recommended
-            # thus NOTE rather than OK
-            status = finding.NOTE
+        status = missing
+    validator.record_finding(v_root, TEST_NAME, status, c)
+
 
-    validator.record_finding(obj, "NeXus default plot", status, c)
+def missing_status(validator):
+    """status when no default plot is described"""
+    data_group = validator.manager.classes["NXentry"].groups["data"]
+    if "/NXentry" in validator.classpaths:
+        # same as the base class comparison of the NXentry group
+        # (do not depend on that comparison having been done)
+        minOccurs = int(data_group.attributes.get("minOccurs", 0))
+    else:
+        minOccurs = 1
+    if minOccurs > 0:
+        return finding.ERROR
+    # even though not "required" it is strongly recommended
+    # thus NOTE rather than OK
+    return finding.NOTE
 
 
-def default_plot_v3(validator):
+def entry_groups(validator):
     """
-    return the HDF5 address of the v3 default plottable data or None
+    ``NXentry`` and ``NXsubentry`` groups, at any depth (from the catalog)
 
-    :see: http://download.nexusformat.org/doc/html/datarules.html#version-3
+    Only the NeXus class paths are searched, not the items.
     """
-    # The default plot is described only at classpath: /NXentry/NXdata@signal
-    # This must result in plottable data..
-    # Assume the attribute values are tested elsewhere
-    def build_h5_address(v_item, pointer):
-        "create the HDF5 address"
-        if isinstance(v_item.h5_object, str):
-            parent = v_item.parent or v_item
-            addr = parent.h5_object.name
+    for classpath in list(validator.classpaths):
+        if "@" in classpath or classpath.rsplit("/", 1)[-1] not in ENTRY_CLASSES:
+            continue
+        for v_item in validator.classpaths[classpath]:
+            if getattr(v_item, "nx_class", None) in ENTRY_CLASSES:
+                yield v_item
+
+
+def join(address, name):
+    """HDF5 address of *name* in the group at *address*"""
+    return address.rstrip("/") + "/" + str(name)
+
+
+def attribute(validator, address, name):
+    """the attribute item *name* of the item at *address* (or ``None``)"""
+    return validator.addresses.get(f"{address}@{name}")
+
+
+def text(v_attribute):
+    """value of attribute item *v_attribute*: text or list of texts"""
+    value = utils.decode_byte_string(v_attribute.h5_object)
+    if hasattr(value, "tolist"):
+        value = value.tolist()
+    if isinstance(value, list) and len(value) == 1:
+        value = value[0]
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    return str(value)
+
+
+def members(validator, v_group):
+    """fields and groups (by name) of *v_group* (from the catalog)"""
+    fields, groups = {}, {}
+    for child in validator.children.get(v_group.h5_address, []):
+        if child.parent is not v_group or registry.object_kind(child) == "attribute":
+            continue
+        if utils.isNeXusDataset(child.h5_object):
+            fields[child.name] = child
+        elif utils.isHdf5Group(child.h5_object):
+            groups[child.name] = child
+    return fields, groups
+
+
+def resolve_entry(validator, v_entry, plots, v2, missing):
+    """Return the :class:`Plot` of entry (or subentry) *v_entry*."""
+    address = v_entry.h5_address
+    if address in plots:
+        return plots[address]
+    plot = plots[address] = Plot()  # not resolved yet: a cycle of @default
+
+    _fields, groups = members(validator, v_entry)
+    nxdata = [
+        check_nxdata(validator, v_group, plots, v2)
+        for v_group in groups.values()
+        if getattr(v_group, "nx_class", None) == "NXdata"
+    ]
+
+    v_default = attribute(validator, address, "default")
+    if v_default is not None:
+        name = text(v_default)
+        v_target = groups.get(name) if isinstance(name, str) else None
+        nx_class = getattr(v_target, "nx_class", None)
+        if v_target is None:
+            plot.status = finding.ERROR
+            plot.comment = f"@default={name}: no such group"
+        elif nx_class == "NXdata":
+            target = plots[v_target.h5_address]
+            use(plot, target, f"@default={name}: ")
+            plot.explicit = target.version is not None
+            if target.status is None:
+                plot.status = finding.ERROR  # nothing to plot
+        elif nx_class in ENTRY_CLASSES:
+            target = resolve_entry(validator, v_target, plots, v2, missing)
+            if target.status is None:
+                plot.status = finding.ERROR
+                plot.comment = f"@default={name}: a cycle of @default"
+            else:
+                use(plot, target, f"@default={name}: ")
+                plot.explicit = target.explicit
         else:
-            addr = v_item.h5_object.name
-        if not addr.endswith("/"):
-            addr += "/"
-        addr += utils.decode_byte_string(pointer)
-        return addr
-
-    def attribute_points_at_target(v_item, attribute_name, v_target):
-        "test if attribute value actually points at target"
-        pointer = v_item.h5_object.attrs.get(attribute_name)
-        if pointer is None:
-            return False
-        addr = build_h5_address(v_item, pointer)
-        if addr not in v_item.h5_object:
-            return False
-        return v_target == addr
-
-    test_name = "NeXus default plot v3"
-    short_list = list(validator.classpaths.get("/NXentry/NXdata@signal", []))
-    # TODO: why not look at every NXdata@signal?
-
-    h5_address = None
-    niac2014_path = []
-    for v_item in short_list:
-        # check existence of @default attributes, as well
-        _root, entry, data = v_item.h5_address.split("@")[0].split("/")  # noqa
-        nxdata = validator.addresses["/" + entry + "/" + data]
-        nxentry = validator.addresses["/" + entry]
-        nxroot = validator.addresses["/"]
-        signal_h5_addr = build_h5_address(nxdata, nxdata.h5_object.attrs["signal"])
-        t1 = attribute_points_at_target(nxroot, "default", nxentry.h5_address)
-        t2 = attribute_points_at_target(nxentry, "default", nxdata.h5_address)
-        t3 = attribute_points_at_target(nxdata, "signal", signal_h5_addr)
-        if t3 is False:
-            status = finding.ERROR
+            plot.status = finding.ERROR
+            plot.comment = f"@default={name}: not NXdata or NXsubentry"
+        return plot
+
+    for version in ("v3", "v2"):
+        target = next((p for p in nxdata if p.version == version), None)
+        if target is not None:
+            use(plot, target, "no @default: ")
+            return plot
+    errors = [p for p in nxdata if p.status is finding.ERROR]
+    if len(errors) > 0:
+        use(plot, errors[0], "no @default: ")
+    else:
+        plot.status = missing
+        plot.comment = "no default plot described"
+    return plot
+
+
+def use(plot, target, prefix):
+    """Make *plot* (of an entry) the plot *target* (of its @default)."""
+    plot.status = target.status
+    plot.comment = prefix + target.comment
+    plot.signal = target.signal
+    plot.version = target.version
+    plot.v_signal = target.v_signal
+
+
+def check_nxdata(validator, v_data, plots, v2):
+    """
+    Return the :class:`Plot` of ``NXdata`` group *v_data* (once).
+
+    Records the findings of its ``@signal`` (v3).  Without it, the
+    plot of its field with ``@signal=1`` (v2), from *v2*
+    (see :func:`check_v2`).
+    """
+    address = v_data.h5_address
+    if address in plots:
+        return plots[address]
+    plot = plots[address] = Plot()
+    fields, _groups = members(validator, v_data)
+
+    v_signal = attribute(validator, address, "signal")
+    if v_signal is not None:
+        name = text(v_signal)
+        v_field = fields.get(name) if isinstance(name, str) else None
+        test_name = TEST_V3 + ", NXdata@signal"
+        if v_field is None:
             c = "field described by @signal does not exist"
-            validator.record_finding(v_item, test_name + ", NXdata@signal", status, c)
-            return None  # fail to identify as plottable since @signal is misleading
-        t4 = utils.isNeXusDataset(validator.addresses[signal_h5_addr].h5_object)
-        if t3 and t4:
-            status = finding.OK
-            c = "correct default plot setup in /NXentry/NXdata"
-            validator.record_finding(v_item, test_name + ", NXdata@signal", status, c)
-            h5_address = signal_h5_addr
-        if t1 and t2 and t3 and t4:
-            # this is the NIAC2014 test
-            niac2014_path.append(v_item)
+            validator.record_finding(v_signal, test_name, finding.ERROR, c)
+            plot.status = finding.ERROR
+            plot.comment = f"@signal={name}: {c}"
+            return plot
+        c = "correct default plot setup in /NXentry/NXdata"
+        validator.record_finding(v_signal, test_name, finding.OK, c)
+        plot.version = "v3"
+        plot.v_signal = v_signal
+        plot.signal = join(address, name)
+        plot.status, plot.comment = check_axes(validator, v_data, v_field, fields)
+        return plot
 
-    # TODO: could also test /NXentry/NXdata@axes
-    if len(niac2014_path) == 1:
-        v_item = niac2014_path[0]
-        status = finding.OK
-        c = "default plot setup in /NXentry/NXdata"
-        validator.record_finding(v_item, test_name + " NIAC2014", status, c)
-        return v_item.h5_address
+    v2_plot = check_v2(validator, v2, address)
+    if v2_plot is not None:
+        plot = plots[address] = v2_plot
+    else:
+        plot.comment = "no @signal"  # status: None, nothing to plot
+    return plot
 
-    return h5_address
 
+def find_v2(validator):
+    """
+    Return the fields with ``@signal`` (v2), in any group (from the catalog).
 
-def default_plot_v2(validator):
+    A list of ``@signal`` attribute items, by HDF5 address of the group.
     """
-    return the HDF5 address of the v2 default plottable data or None
+    v2 = {}
+    for classpath in validator.attribute_classpaths.get("signal", []):
+        for v_signal in validator.classpaths[classpath]:
+            v_field = v_signal.parent
+            if v_field is None or not utils.isNeXusDataset(v_field.h5_object):
+                continue
+            v2.setdefault(v_field.parent.h5_address, []).append(v_signal)
+    return v2
+
 
-    :see: http://download.nexusformat.org/doc/html/datarules.html#version-2
+def check_v2(validator, v2, address):
     """
-    test_name = "NeXus default plot v2"
-    review_dict = {}
-    for k, v in validator.classpaths.items():
-        if k.endswith("@signal"):
-            for v_item in v:
-                if utils.isNeXusDataset(v_item.parent.h5_object):
-                    signal = str(v_item.h5_object)
-                    if signal == "1":
-                        status = finding.OK
-                        c = "found field with @signal=1: " + v_item.h5_address
-                        validator.record_finding(
-                            v_item, test_name + ", @signal=1", status, c
-                        )
-
-                        gparent = v_item.parent.parent
-                        group_name = gparent.h5_address
-                        if group_name not in review_dict:
-                            review_dict[group_name] = []
-                        review_dict[group_name].append(v_item)
-                    else:
-                        status = finding.WARN
-                        c = "found field with @signal!=1: " + v_item.h5_address
-                        c += "=" + signal
-                        validator.record_finding(
-                            v_item, test_name + ", @signal!=1", status, c
-                        )
-
-    addr = None
-    for group_name, v_item_list in review_dict.items():
-        if len(v_item_list) == 1:
-            addr = v_item_list[0].parent.h5_address
-            status = finding.OK
-            c = "found plottable data: " + v_item_list[0].h5_address
-            validator.record_finding(v_item_list[0], test_name, status, c)
-        elif len(v_item_list) > 1:
-            status = finding.ERROR
-            c = "multiple fields found with @signal=1 in: " + group_name
-            validator.record_finding(
-                v_item_list[0].parent.parent,
-                test_name + ", multiple @signal=1",
-                status,
-                c,
-            )
-    return addr
-
-
-def default_plot_v1(validator):  # noqa
+    Return the :class:`Plot` (v2) of the group at *address* (or ``None``).
+
+    Records the findings of its fields with ``@signal`` (once: the
+    group is removed from *v2*).
     """
-    return the HDF5 address of the v1 default plottable data or None
+    signals = []  # @signal=1
+    for v_signal in v2.pop(address, []):
+        value = text(v_signal)
+        if value == "1":
+            c = "found field with @signal=1: " + v_signal.h5_address
+            test_name = TEST_V2 + ", @signal=1"
+            validator.record_finding(v_signal, test_name, finding.OK, c)
+            signals.append(v_signal)
+        else:
+            c = f"found field with @signal!=1: {v_signal.h5_address}={value}"
+            test_name = TEST_V2 + ", @signal!=1"
+            validator.record_finding(v_signal, test_name, finding.WARN, c)
+    if len(signals) == 0:
+        return None
+
+    plot = Plot()
+    if len(signals) == 1:
+        v_field = signals[0].parent
+        c = "found plottable data: " + signals[0].h5_address
+        validator.record_finding(signals[0], TEST_V2, finding.OK, c)
+        plot.version = "v2"
+        plot.v_signal = signals[0]
+        plot.signal = v_field.h5_address
+        plot.status = finding.OK
+        plot.comment = f"{v_field.h5_address} (v2: @signal=1)"
+    else:
+        c = "multiple fields found with @signal=1 in: " + address
+        test_name = TEST_V2 + ", multiple @signal=1"
+        validator.record_finding(signals[0].parent.parent, test_name, finding.ERROR, c)
+        plot.status = finding.ERROR
+        plot.comment = c
+    return plot
 
-    :see: http://download.nexusformat.org/doc/html/datarules.html#version-1
+
+def check_axes(validator, v_data, v_signal, fields):
+    """
+    Return the status and description of the plot of *v_signal*:
+    its ``@axes`` are fields of *v_data*, ``AXISNAME_indices`` in range.
     """
-    test_name = "NeXus default plot v1"  # noqa
+    address = v_data.h5_address
+    c = v_signal.h5_address + " (v3)"
+    v_axes = attribute(validator, address, "axes")
+    if v_axes is None:
+        return finding.OK, c
+    names = text(v_axes)
+    names = [names] if isinstance(names, str) else names
+    rank = len(v_signal.h5_object.shape or ())
+    problems = []
+    axes = []
+    for position, name in enumerate(names):
+        if name == ".":
+            continue
+        if name not in fields:
+            problems.append(f"@axes: no field {name}")
+            continue
+        axes.append(name)
+        v_indices = attribute(validator, address, name + "_indices")
+        if v_indices is None:
+            continue
+        indices = utils.decode_byte_string(v_indices.h5_object)
+        indices = [indices] if not hasattr(indices, "__len__") else list(indices)
+        try:
+            indices = [int(i) for i in indices]
+        except (TypeError, ValueError):
+            problems.append(f"@{name}_indices: not integers")
+            continue
+        if not all(0 <= i < max(rank, 1) for i in indices):
+            problems.append(f"@{name}_indices={indices}: signal has rank {rank}")
+    if len(axes) > 0:
+        c += ", axes: " + ", ".join(axes)
+    if len(problems) > 0:
+        return finding.WARN, c + "; " + "; ".join(problems)
+    return finding.OK, c
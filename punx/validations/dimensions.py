@@ -0,0 +1,216 @@
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2023, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+shapes of fields: NXDL dimensions, and the @signal & @axes of NXdata
+
+Only the dataspace (shape) of each dataset is used, no data is read.
+(Attribute values were read by the address catalog.)
+
+The NXDL symbols (such as ``nP`` or ``tof+1``) are resolved in each
+group: the first field that uses a symbol sets its length, the other
+fields of the group must agree.  A field of only one value (such as a
+scalar) may be given for any dimensions: the value applies to all.
+A base class describes all the dimensions a field might have, a
+different rank is only noted.
+"""
+
+import re
+
+import numpy
+
+from .. import finding
+from .. import utils
+from . import registry
+
+TEST_DIMENSIONS = "field dimensions"
+TEST_AXES = "axes shape"
+STATUSES = (finding.OK, finding.NOTE, finding.WARN, finding.ERROR)
+SYMBOL_EXPRESSION = re.compile(r"^([A-Za-z_]\w*)\s*([+-]\s*\d+)?$")
+
+
+@registry.rule("dimensions", kinds=["group"], classpaths=["/NX*"], statuses=STATUSES)
+def verify(validator, v_item):
+    """
+    Verify the shapes of the fields of NeXus group *v_item*.
+    """
+    fields, attributes = {}, {}
+    for child in validator.children.get(v_item.h5_address, []):
+        if child.parent is not v_item:
+            continue
+        if utils.isNeXusDataset(child.h5_object):
+            fields[child.name] = child
+        elif registry.object_kind(child) == "attribute":
+            attributes[child.name] = child
+
+    base_class = validator.manager.classes.get(getattr(v_item, "nx_class", None))
+    if base_class is not None:
+        symbols = {}  # length, by NXDL symbol
+        for name, v_field in fields.items():
+            spec = base_class.fields.get(name)
+            if spec is not None and spec.dimensions is not None:
+                verify_field_dimensions(validator, v_field, spec, fields, symbols)
+
+    if getattr(v_item, "nx_class", None) == "NXdata":
+        verify_axes(validator, fields, attributes)
+
+
+def verify_field_dimensions(validator, v_field, spec, fields, symbols):
+    """
+    Compare the rank and shape of *v_field* with its NXDL dimensions.
+    """
+    shape = v_field.h5_object.shape
+    if shape is None:
+        return  # empty dataspace
+    dimensions = spec.dimensions
+    dims = [str(d.value or d.ref) for d in dimensions.dims.values()]
+    c = f"shape {list(shape)}, NXDL: rank={dimensions.rank} dims={dims}"
+    status = finding.OK
+
+    if numpy.prod(shape) != 1:  # one value: same for all, any shape is OK
+        rank = _resolve(dimensions.rank, symbols, len(shape))
+        if rank is not None and rank != len(shape):
+            # base classes describe all the dimensions a field might have
+            c += f": rank {len(shape)} is not {_expected(dimensions.rank, rank)}"
+            validator.record_finding(v_field, TEST_DIMENSIONS, finding.NOTE, c)
+            return
+
+        problems = []
+        for dim in dimensions.dims.values():
+            index = _integer(dim.index)
+            if index is None or not 0 < index <= len(shape):
+                continue
+            length = shape[index - 1]
+            expected, text = None, dim.value
+            if dim.ref is not None:
+                v_ref = fields.get(dim.ref)
+                refindex = _integer(dim.refindex) or 1
+                ref_shape = () if v_ref is None else (v_ref.h5_object.shape or ())
+                if 0 < refindex <= len(ref_shape):
+                    expected = ref_shape[refindex - 1] + (_integer(dim.incr) or 0)
+                    text = f"{dim.ref}[{refindex}]"
+            else:
+                expected = _resolve(dim.value, symbols, length)
+            if expected is not None and expected != length:
+                text = _expected(text, expected)
+                problems.append(f"dimension {index} is {length}, not {text}")
+        if len(problems) > 0:
+            status = finding.WARN
+            c += ": " + "; ".join(problems)
+    validator.record_finding(v_field, TEST_DIMENSIONS, status, c)
+
+
+def verify_axes(validator, fields, attributes):
+    """
+    Compare the shapes of the @axes fields of a NXdata group with its @signal.
+    """
+    v_signal = fields.get(_text(attributes.get("signal")))
+    if v_signal is None:
+        return  # reported by other rules
+    shape = v_signal.h5_object.shape or ()
+
+    axes = []  # (name, position in @axes)
+    v_axes = attributes.get("axes")
+    if v_axes is not None:
+        names = utils.decode_byte_string(v_axes.h5_object)
+        if isinstance(names, str):
+            names = [names]
+        names = list(names)
+        status = finding.TF_RESULT[len(names) == len(shape)]
+        c = f"@axes has {len(names)} names, {v_signal.name} has rank {len(shape)}"
+        validator.record_finding(v_axes, TEST_AXES, status, c)
+        axes += [(name, i) for i, name in enumerate(names) if name != "."]
+    for name in attributes:
+        if name.endswith("_indices"):
+            axis = name[: -len("_indices")]
+            if axis not in [a[0] for a in axes]:
+                axes.append((axis, None))
+
+    for axis, position in axes:
+        v_axis = fields.get(axis)
+        if v_axis is None:
+            continue  # reported by the attribute rule
+        v_indices = attributes.get(axis + "_indices")
+        if v_indices is not None:
+            indices = numpy.atleast_1d(v_indices.h5_object).tolist()
+            v_attr = v_indices
+        else:
+            indices = [position]
+            v_attr = v_axes
+        verify_axis(validator, v_attr, v_axis, indices, v_signal, shape)
+
+
+def verify_axis(validator, v_attr, v_axis, indices, v_signal, shape):
+    """
+    Compare the shape of axis *v_axis* with dimensions *indices* of the signal.
+    """
+    axis_shape = v_axis.h5_object.shape or ()
+    c = f"{v_axis.name}{list(axis_shape)} & {v_signal.name}{list(shape)}"
+    problem = None
+    if not all(isinstance(i, int) and 0 <= i < len(shape) for i in indices):
+        problem = f"indices {indices} are not dimensions of the signal"
+    elif len(indices) != len(axis_shape):
+        problem = f"{len(indices)} indices for axis of rank {len(axis_shape)}"
+    else:
+        for k, i in enumerate(indices):
+            if axis_shape[k] not in (shape[i], shape[i] + 1):  # +1: bin edges
+                problem = f"axis dimension {k + 1} does not match signal {i + 1}"
+                break
+    if problem is None:
+        status = finding.OK
+    else:
+        status = finding.ERROR
+        c += ": " + problem
+    validator.record_finding(v_attr, TEST_AXES, status, c)
+
+
+def _expected(text, value):
+    """describe the *value* expected from NXDL *text*"""
+    if text == str(value):
+        return text
+    return f"{text}={value}"
+
+
+def _integer(text):
+    """*text* as int (or ``None``)"""
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def _resolve(expression, symbols, actual):
+    """
+    Expected length of NXDL *expression* (or ``None`` if unknown).
+
+    An unbound symbol is bound so that *actual* is expected.
+    """
+    if expression is None:
+        return None
+    value = _integer(expression)
+    if value is not None:
+        return value
+    match = SYMBOL_EXPRESSION.match(expression.strip())
+    if match is None:
+        return None  # cannot evaluate
+    symbol, offset = match.group(1), int((match.group(2) or "0").replace(" ", ""))
+    if symbol not in symbols:
+        symbols[symbol] = actual - offset
+    return symbols[symbol] + offset
+
+
+def _text(v_item):
+    """value of attribute *v_item* as text (or ``None``)"""
+    if v_item is None:
+        return None
+    value = utils.decode_byte_string(v_item.h5_object)
+    if isinstance(value, list) and len(value) == 1:
+        value = value[0]
+    return value if isinstance(value, str) else None
@@ -10,6 +10,9 @@
 
 from .. import finding
 from .. import utils
+from . import base_class_items_in_hdf5_group
+
+STATUSES = (finding.OK, finding.ERROR, finding.TODO)  # outcomes
 
 
 def verify(validator, v_item, base_class):
@@ -95,7 +98,7 @@ def verify_group_attributes(validator, v_item, base_class):
 
         elif k == "target":
             test_name = "value of @target"
-            found = v in v_item.manager.addresses
+            found = v in validator.address_set
             if found:
                 status = finding.OK
                 c = "found"
@@ -117,28 +120,26 @@ def verify_group_attributes(validator, v_item, base_class):
 
 
 def verify_group_children(validator, v_item, base_class):
-    """verify the group's children (groups, fields)"""
-    for child_name in v_item.h5_object:
-        obj = v_item.h5_object[child_name]
-        v_sub_item = validator.addresses[obj.name]
-        # TODO: need an algorithm to know if v_item is defined in base class
+    """
+    verify the group's children (groups, fields), from the catalog
 
-        if utils.isNeXusDataset(obj):
-            if child_name in base_class.fields:
-                t = "defined: "
-            else:
-                t = "not defined: "
-            t += base_class.title + "/" + child_name
-            validator.record_finding(v_sub_item, "field in base class", finding.OK, t)
+    Matched by name, by NeXus class, or by flexible name
+    (see :class:`~punx.member_matcher.MemberMatcher`).
+    """
+    matcher = validator.manager.member_matcher(base_class.title)
+    for v_sub_item in base_class_items_in_hdf5_group.members(validator, v_item):
+        obj = v_sub_item.h5_object
+        child_name = v_sub_item.name
+        nx_class = getattr(v_sub_item, "nx_class", None)
 
+        if utils.isNeXusDataset(obj):
+            specs = matcher.match(child_name)
+            labels = [spec.name for spec in specs]
+            test_name = "field in base class"
         elif utils.isHdf5Group(obj):
-            if child_name in base_class.groups:
-                t = "defined: "
-            else:
-                t = "not defined: "
-            t += base_class.title + "/" + child_name
-            validator.record_finding(v_sub_item, "group in base class", finding.OK, t)
-
+            specs = matcher.match(child_name, True, nx_class)
+            labels = [getattr(spec, "nx_class", spec.name) for spec in specs]
+            test_name = "group in base class"
         else:
             validator.record_finding(
                 v_sub_item,
@@ -146,3 +147,14 @@ def verify_group_children(validator, v_item, base_class):
                 finding.TODO,
                 "TODO: ",
             )
+            continue
+
+        if len(specs) > 0:
+            t = "defined: "
+        else:
+            t = "not defined: "
+        t += base_class.title + "/" + child_name
+        if len(specs) > 0 and [spec.name for spec in specs] != [child_name]:
+            # matched by flexible name or by NeXus class
+            t += " (" + " | ".join(labels) + ")"
+        validator.record_finding(v_sub_item, test_name, finding.OK, t)
@@ -14,6 +14,7 @@ import collections
 
 from .. import finding
 from .. import utils
+from . import registry
 from ..validate import CLASSPATH_OF_NON_NEXUS_CONTENT
 from ..validate import logger
 from ..validate import INFORMATIVE
@@ -24,6 +25,7 @@ TEST_NAME = "validItemName"
 LINK_TARGET = "target"
 LINK_SOURCE = "source"
 NOT_LINKED = "not linked"
+STATUSES = (finding.OK, finding.NOTE, finding.WARN, finding.ERROR, finding.TODO)
 
 
 def isNeXusLinkTarget(v_item):
@@ -40,6 +42,11 @@ def isNeXusLinkTarget(v_item):
     return False  # no @target attribute at all
 
 
+@registry.rule(
+    "item_name",
+    kinds=["group", "dataset", "link", "attribute"],
+    statuses=STATUSES,
+)
 def verify(validator, v_item):
     """
     check :class:`ValidationItem` *v_item* using *validItemName* regular expression
@@ -127,10 +134,7 @@ def handle_any_attribute(validator, v_item, key=None):
     k = validItemName_match_key(validator, v_item.name)
     status = finding.TF_RESULT[k is not None]
     k = k or "no matching pattern found"
-    key = key or "validItemName"
-    f = finding.Finding(v_item.h5_address, TEST_NAME, status, k)  # noqa
-    validator.validations.append(f)
-    v_item.validations[key] = f
+    validator.record_finding(v_item, key or TEST_NAME, status, k)
 
 
 def getValidItemNamePatterns(validator, key=None):
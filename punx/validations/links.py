@@ -0,0 +1,73 @@
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2023, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+broken and cyclic links, in one pass over the whole file
+
+Uses only what the address catalog found: the set of HDF5 addresses,
+the ``@target`` of each NeXus link, links to objects not found, and
+links to an ancestor group.  There is no further HDF5 access.
+"""
+
+from .. import finding
+from . import registry
+
+TEST_NAME = "NeXus link"
+STATUSES = (finding.OK, finding.WARN, finding.ERROR)
+
+
+@registry.rule("links", kinds=["file"], statuses=STATUSES)
+def verify(validator, v_item):
+    """
+    Verify all links of the file (*v_item* is the file root).
+    """
+    for address, target in validator.link_targets.items():
+        if address != target:  # the target itself also has @target
+            verify_nexus_link(validator, validator.addresses[address], target)
+
+    for address, description in validator.broken_links.items():
+        c = f"{address}: not found: {description}"
+        validator.record_finding(
+            _parent_item(validator, v_item, address), TEST_NAME, finding.WARN, c
+        )
+
+    for address, ancestor in validator.cyclic_links.items():
+        c = f"{address}: link to ancestor group {ancestor}, not followed"
+        validator.record_finding(
+            _parent_item(validator, v_item, address), TEST_NAME, finding.WARN, c
+        )
+
+
+def verify_nexus_link(validator, v_item, target):
+    """
+    Verify the NeXus link at *v_item* (with ``@target`` = *target*).
+    """
+    if v_item.is_collapsed():
+        return
+    v_target = validator.addresses.get(target)
+    if target not in validator.address_set:
+        status = finding.ERROR
+        c = "broken, target not found: " + target
+    elif v_item.h5_address.startswith(target.rstrip("/") + "/"):
+        status = finding.ERROR
+        c = "cyclic, target is an ancestor: " + target
+    elif v_target is not None and v_target.h5_object.id != v_item.h5_object.id:
+        status = finding.ERROR
+        c = "target is a different HDF5 object: " + target
+    else:
+        status = finding.OK
+        c = "linked to target: " + target
+    validator.record_finding(v_item, TEST_NAME, status, c)
+
+
+def _parent_item(validator, root, address):
+    """item of the group with link *address* (or the file root)"""
+    parent = address.rsplit("/", 1)[0] or "/"
+    return validator.addresses.get(parent, root)
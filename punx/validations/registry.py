@@ -0,0 +1,232 @@
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2023, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+registry of the validation rules applied to each item of a data file
+
+Each rule declares the kinds of object, NeXus class paths (``fnmatch``
+patterns), and attribute names it applies to.  The validator builds a
+:class:`DispatchTable` so that each item is handed only to the rules
+that match it.
+
+Other packages may add rules through the ``punx.validations``
+entry point group (loaded the first time the rules are needed)::
+
+    [project.entry-points."punx.validations"]
+    my_rule = "my_package.my_module:my_rule"
+
+The entry point names either a :class:`Rule` object, a function
+``verify(validator, v_item)`` (applied to all items), or a module
+that registers its rules (with :func:`rule`) when imported.
+
+.. autosummary::
+
+   ~Rule
+   ~DispatchTable
+   ~register
+   ~rule
+   ~unregister
+   ~get_rules
+   ~object_kind
+
+"""
+
+import collections
+import fnmatch
+import importlib.metadata
+import types
+
+from .. import utils
+
+ENTRY_POINT_GROUP = "punx.validations"
+KINDS = ("file", "group", "dataset", "link", "attribute")
+OBJECT_TYPE_KINDS = {
+    "HDF5 file root": "file",
+    "HDF5 group": "group",
+    "HDF5 dataset": "dataset",
+    "NeXus link": "link",
+}
+logger = utils.setup_logger(__name__)
+
+_rules = collections.OrderedDict()
+_loaded = False
+
+
+class Rule(object):
+    """
+    a validation applied to (some of the) items of a data file
+
+    name str:
+        unique name of this rule
+    verify obj:
+        function ``verify(validator, v_item)`` that records findings
+    kinds [str]:
+        kinds of object (from ``KINDS``) to check, default: all
+    classpaths [str]:
+        ``fnmatch`` patterns of the NeXus class paths to check, default: all
+    attributes [str]:
+        names of the attributes to check, default: all
+        (when given, only attributes are checked)
+    statuses [obj]:
+        possible outcomes (status objects) of this rule, default: all
+    """
+
+    def __init__(
+        self,
+        name,
+        verify,
+        kinds=None,
+        classpaths=None,
+        attributes=None,
+        statuses=None,
+    ):
+        self.name = name
+        self.verify = verify
+        self.kinds = tuple(kinds or KINDS)
+        self.classpaths = tuple(classpaths or ())
+        self.attributes = tuple(attributes or ())
+        self.statuses = None if statuses is None else tuple(statuses)
+        if self.attributes:
+            self.kinds = ("attribute",)
+        for kind in self.kinds:
+            if kind not in KINDS:
+                raise ValueError(f"rule {name}: unknown kind of object: {kind}")
+
+    def __str__(self, *args, **kwargs):
+        return f"Rule({self.name}, kinds={','.join(self.kinds)})"
+
+    def applies_to(self, kind, classpath, name=None):
+        """Does this rule check an item of *kind*, *classpath*, and *name*?"""
+        if kind not in self.kinds:
+            return False
+        if self.attributes and name not in self.attributes:
+            return False
+        if self.classpaths:
+            return any(fnmatch.fnmatchcase(classpath, p) for p in self.classpaths)
+        return True
+
+    def reports_any(self, statuses):
+        """Could this rule report a finding of any of these *statuses*?"""
+        if statuses is None or self.statuses is None:
+            return True
+        return any(s in statuses for s in self.statuses)
+
+
+class DispatchTable(object):
+    """
+    rules that apply to each kind of item, computed once per kind
+
+    Items are grouped by (kind, NeXus class path, and the name, for
+    attributes).  The matching rules of each group are found the first
+    time one of its items is seen.
+
+    Only rules that could report any of *statuses* (default: all) are used,
+    the names of the others are listed in ``skipped``.
+    """
+
+    def __init__(self, rules=None, statuses=None):
+        rules = list(get_rules() if rules is None else rules)
+        self.rules = [r for r in rules if r.reports_any(statuses)]
+        self.skipped = [r.name for r in rules if not r.reports_any(statuses)]
+        self._table = {}
+
+    def rules_for(self, v_item):
+        """list of rules that apply to :class:`ValidationItem` *v_item*"""
+        kind = object_kind(v_item)
+        key = (kind, v_item.classpath, v_item.name if kind == "attribute" else None)
+        found = self._table.get(key)
+        if found is None:
+            found = [r for r in self.rules if r.applies_to(*key)]
+            self._table[key] = found
+        return found
+
+    def names(self):
+        """names of all rules in this table"""
+        return [r.name for r in self.rules]
+
+
+def object_kind(v_item):
+    """kind of object (one of ``KINDS``) of :class:`ValidationItem` *v_item*"""
+    return OBJECT_TYPE_KINDS.get(v_item.object_type, "attribute")
+
+
+def register(new_rule):
+    """Add :class:`Rule` *new_rule* (replaces any rule of the same name)."""
+    if not isinstance(new_rule, Rule):
+        raise TypeError(f"not a Rule: {new_rule!r}")
+    _rules[new_rule.name] = new_rule
+    return new_rule
+
+
+def rule(name, **kwargs):
+    """
+    decorator: register the function as the ``verify`` of a :class:`Rule`
+
+    EXAMPLE::
+
+        @registry.rule("units", attributes=["units"])
+        def verify(validator, v_item):
+            ...
+    """
+
+    def decorator(verify):
+        register(Rule(name, verify, **kwargs))
+        return verify
+
+    return decorator
+
+
+def unregister(name):
+    """Remove the rule *name*, if registered."""
+    _rules.pop(name, None)
+
+
+def get_rules():
+    """list of all registered rules (first loads the rules, if needed)"""
+    global _loaded
+
+    if not _loaded:
+        _loaded = True
+        _load_builtin_rules()
+        _load_entry_point_rules()
+    return list(_rules.values())
+
+
+def _load_builtin_rules():
+    """the rules of this package register when their module is imported"""
+    from . import item_name  # noqa
+    from . import attribute  # noqa
+    from . import links  # noqa
+    from . import dimensions  # noqa
+
+
+def _entry_points():
+    eps = importlib.metadata.entry_points()
+    if hasattr(eps, "select"):  # Python >= 3.10
+        return list(eps.select(group=ENTRY_POINT_GROUP))
+    return list(eps.get(ENTRY_POINT_GROUP, []))
+
+
+def _load_entry_point_rules():
+    """register the rules provided by other packages"""
+    for ep in _entry_points():
+        try:
+            obj = ep.load()
+        except Exception as exc:
+            logger.warning("cannot load validation rule %s: %s", ep.name, exc)
+            continue
+        if isinstance(obj, Rule):
+            register(obj)
+        elif isinstance(obj, types.ModuleType):
+            pass  # registered its rules when imported
+        elif callable(obj):
+            register(Rule(ep.name, obj))
+        else:
+            logger.warning("not a validation rule: %s = %r", ep.name, obj)
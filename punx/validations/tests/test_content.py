@@ -0,0 +1,125 @@
+import h5py
+import numpy
+
+from ... import finding
+from ... import validate
+from ...tests._core import hfile
+from .. import content
+
+
+def write_content_file(hfile):
+    with h5py.File(hfile, "w") as root:
+        entry = root.create_group("entry")
+        entry.attrs["NX_class"] = "NXentry"
+
+        detector = entry.create_group("detector")
+        detector.attrs["NX_class"] = "NXdetector"
+        detector["data"] = numpy.array([3, -1, 4, -1, 5], dtype="int32")
+        detector["distance"] = numpy.array([1.0, numpy.nan, numpy.inf, 2.0])
+
+        data = entry.create_group("data")
+        data.attrs["NX_class"] = "NXdata"
+        data.attrs["signal"] = "frames"
+        data.attrs["axes"] = ["t", ".", "."]
+        frames = numpy.ones((6, 4, 5))
+        frames[2] = 0
+        frames[5] = 0
+        data.create_dataset("frames", data=frames, chunks=(1, 2, 5))
+        data["t"] = numpy.array([0.0, 1, 2, 1.5, 4, 5])
+        data["x"] = numpy.arange(4.0)
+        data.attrs["x_indices"] = 1
+        data["y"] = numpy.full(5, 2.0)
+        data["z"] = numpy.array([3.0, 2, 2, 1, 1])
+        data.attrs["y_indices"] = 2
+        data.attrs["z_indices"] = 2
+
+
+def findings(validator):
+    return {
+        (f.h5_address, f.test_name[len(content.TEST_NAME) + 2:]): (f.status, f.comment)
+        for f in validator.validations
+        if f.test_name.startswith(content.TEST_NAME)
+    }
+
+
+def test_content_checks(hfile):
+    write_content_file(hfile)
+    validator = validate.Data_File_Validator(content=True)
+    validator.validate(hfile)
+    validator.close()
+
+    found = findings(validator)
+    assert found["/entry/detector/data", content.NOT_NEGATIVE] == (
+        finding.WARN,
+        "2 of 5 values negative",
+    )
+    assert found["/entry/detector/distance", content.FINITE] == (
+        finding.WARN,
+        "1 NaN and 1 Inf of 4 values",
+    )
+    assert found["/entry/data/frames", content.FINITE][0] == finding.OK
+    assert found["/entry/data/frames", content.ZERO_FRAMES] == (
+        finding.WARN,
+        "2 of 6 frames all zero",
+    )
+    assert found["/entry/data/t", content.MONOTONIC] == (finding.WARN, "not monotonic")
+    assert found["/entry/data/x", content.MONOTONIC] == (
+        finding.OK,
+        "monotonic increasing",
+    )
+    assert found["/entry/data/y", content.MONOTONIC] == (
+        finding.WARN,
+        "constant: all 5 values equal",
+    )
+    assert found["/entry/data/z", content.MONOTONIC] == (
+        finding.WARN,
+        "not strictly monotonic: decreasing, 2 repeated values",
+    )
+    assert "content" in validator.rules_key()
+
+
+def test_content_is_opt_in(hfile):
+    write_content_file(hfile)
+    validator = validate.Data_File_Validator()
+    validator.validate(hfile)
+    validator.close()
+
+    assert len(findings(validator)) == 0
+    assert "content" not in validator.rules_key()
+
+
+def test_small_blocks(hfile):
+    write_content_file(hfile)
+    with h5py.File(hfile, "r") as root:
+        plan = {content.FINITE, content.ZERO_FRAMES}
+        stats = content.scan_dataset(root["/entry/data/frames"], plan, max_bytes=100)
+        assert stats["size"] == 120
+        assert stats["zero_frames"] == 2
+
+        plan = {content.MONOTONIC}
+        stats = content.scan_dataset(root["/entry/data/t"], plan, max_bytes=16)
+        assert stats["increasing"] and stats["decreasing"]
+
+        # repeated values across the blocks
+        stats = content.scan_dataset(root["/entry/data/z"], plan, max_bytes=16)
+        assert stats["decreasing"] and not stats["increasing"]
+        assert stats["repeated"] == 2
+
+
+def test_blocks():
+    shape, chunks = (6, 4, 5), (1, 2, 5)
+    covered = numpy.zeros(shape, dtype=int)
+    for selection in content.blocks(shape, chunks, itemsize=8, max_bytes=200):
+        covered[selection] += 1
+        for s, chunk in zip(selection, chunks):
+            assert s.start is None or s.start % chunk == 0  # whole chunks
+        assert covered[selection].size * 8 <= 200
+    assert numpy.all(covered == 1)
+
+    # 1-D: in order, many rows at a time
+    selections = list(content.blocks((10,), None, itemsize=8, max_bytes=32))
+    assert [s[0].start for s in selections] == [0, 4, 8]
+
+    # one chunk larger than the limit
+    assert len(list(content.blocks((4, 100), (2, 100), 8, max_bytes=10))) == 2
+    assert list(content.blocks((), None)) == [()]
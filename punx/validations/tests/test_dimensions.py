@@ -0,0 +1,98 @@
+import h5py
+import numpy
+
+from ... import finding
+from ... import profiling
+from ... import validate
+from ...tests._core import hfile
+
+
+def write_shapes_file(hfile):
+    with h5py.File(hfile, "w") as root:
+        entry = root.create_group("entry")
+        entry.attrs["NX_class"] = "NXentry"
+
+        detector = entry.create_group("detector")
+        detector.attrs["NX_class"] = "NXdetector"
+        detector["data"] = numpy.zeros((2, 3, 4, 10))
+        detector["time_of_flight"] = numpy.zeros(11)  # tof+1
+        detector["distance"] = numpy.zeros((2, 3, 5))  # j is 4
+        detector["count_time"] = 1.0  # one value
+
+        monitor = entry.create_group("monitor")
+        monitor.attrs["NX_class"] = "NXmonitor"
+        monitor["efficiency"] = numpy.zeros(5)
+        monitor["time_of_flight"] = numpy.zeros(6)  # ref="efficiency"
+
+        data = entry.create_group("data")
+        data.attrs["NX_class"] = "NXdata"
+        data.attrs["signal"] = "counts"
+        data.attrs["axes"] = ["x", "."]
+        data.attrs["y_indices"] = 1
+        data.attrs["z_indices"] = 5
+        data["counts"] = numpy.zeros((3, 4))
+        data["x"] = numpy.zeros(7)  # should be 3 (or 4: bin edges)
+        data["y"] = numpy.zeros(5)  # bin edges
+        data["z"] = numpy.zeros(3)
+
+
+def findings(validator, test_name):
+    return {
+        f.h5_address: (f.status, f.comment)
+        for f in validator.validations
+        if f.test_name == test_name
+    }
+
+
+def test_field_dimensions(hfile):
+    write_shapes_file(hfile)
+    validator = validate.Data_File_Validator()
+    validator.validate(hfile)
+    validator.close()
+
+    found = findings(validator, "field dimensions")
+    assert found["/entry/detector/data"][0] == finding.OK
+    assert found["/entry/detector/time_of_flight"][0] == finding.OK
+    assert found["/entry/detector/count_time"][0] == finding.OK
+    status, comment = found["/entry/detector/distance"]
+    assert status == finding.WARN
+    assert comment.endswith("dimension 3 is 5, not j=4")
+    status, comment = found["/entry/monitor/time_of_flight"]
+    assert status == finding.WARN
+    assert comment.endswith("dimension 1 is 6, not efficiency[1]=5")
+
+
+def test_axes_shape(hfile):
+    write_shapes_file(hfile)
+    validator = validate.Data_File_Validator()
+    validator.validate(hfile)
+    validator.close()
+
+    found = findings(validator, "axes shape")
+    assert found["/entry/data@y_indices"] == (finding.OK, "y[5] & counts[3, 4]")
+    status, comment = found["/entry/data@axes"]
+    assert status == finding.ERROR  # (the last finding for @axes)
+    assert comment.endswith("axis dimension 1 does not match signal 1")
+    status, comment = found["/entry/data@z_indices"]
+    assert status == finding.ERROR
+    assert comment.endswith("indices [5] are not dimensions of the signal")
+
+    # no TODO for the shapes of @axes
+    assert not any(
+        f.status == finding.TODO
+        for f in validator.validations
+        if f.h5_address == "/entry/data@axes"
+    )
+
+
+def test_no_data_read(hfile):
+    write_shapes_file(hfile)
+    profiler = profiling.Profiler()
+    validator = validate.Data_File_Validator(profiler=profiler)
+    validator.validate(hfile)
+    validator.close()
+
+    timing = profiler.timing(profiling.KIND_RULE, "dimensions")
+    assert timing.calls == 4  # NeXus groups
+    assert timing.findings > 0
+    assert timing.hdf5_calls == 0
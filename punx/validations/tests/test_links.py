@@ -0,0 +1,101 @@
+import h5py
+
+from ... import finding
+from ... import profiling
+from ... import validate
+from ...tests._core import hfile
+
+
+def write_links_file(hfile):
+    with h5py.File(hfile, "w") as root:
+        root.attrs["default"] = "entry"
+        entry = root.create_group("entry")
+        entry.attrs["NX_class"] = "NXentry"
+        detector = entry.create_group("detector")
+        detector.attrs["NX_class"] = "NXdetector"
+        counts = detector.create_dataset("counts", data=[1, 2, 3])
+        counts.attrs["target"] = counts.name
+        data = entry.create_group("data")
+        data.attrs["NX_class"] = "NXdata"
+        data.attrs["signal"] = "counts"
+        data["counts"] = counts  # NeXus link
+
+        other = data.create_dataset("other", data=[0])
+        other.attrs["target"] = "/entry/detector/missing"
+        mixed = data.create_dataset("mixed", data=[0])
+        mixed.attrs["target"] = counts.name  # not the same object
+
+        data["dangling"] = h5py.SoftLink("/entry/no_such_item")
+        data["external"] = h5py.ExternalLink("no_such_file.h5", "/counts")
+        detector["up"] = entry  # hard link to an ancestor
+        detector["loop"] = h5py.SoftLink("/entry/detector")
+
+
+def link_findings(validator):
+    return {
+        f.comment: f.status for f in validator.validations if f.test_name == "NeXus link"
+    }
+
+
+def test_catalog(hfile):
+    write_links_file(hfile)
+    validator = validate.Data_File_Validator()
+    validator.validate(hfile)
+    validator.close()
+
+    assert "/entry/data/counts" in validator.address_set
+    assert "/entry/detector/up" not in validator.address_set  # not followed
+    assert validator.link_targets["/entry/data/counts"] == "/entry/detector/counts"
+    assert validator.link_targets["/entry/detector/counts"] == "/entry/detector/counts"
+    assert sorted(validator.broken_links) == [
+        "/entry/data/dangling",
+        "/entry/data/external",
+    ]
+    assert validator.cyclic_links == {
+        "/entry/detector/loop": "/entry/detector",
+        "/entry/detector/up": "/entry",
+    }
+
+
+def test_links_rule(hfile):
+    write_links_file(hfile)
+    validator = validate.Data_File_Validator()
+    validator.validate(hfile)
+    validator.close()
+
+    found = link_findings(validator)
+    assert len(found) == 7
+    expected = {
+        "linked to target: /entry/detector/counts": finding.OK,
+        "broken, target not found: /entry/detector/missing": finding.ERROR,
+        "target is a different HDF5 object: /entry/detector/counts": finding.ERROR,
+        "/entry/data/dangling: not found: soft link to /entry/no_such_item": (
+            finding.WARN
+        ),
+        "/entry/detector/up: link to ancestor group /entry, not followed": (
+            finding.WARN
+        ),
+    }
+    for comment, status in expected.items():
+        assert found[comment] == status, comment
+
+    targets = {
+        f.comment: f.status
+        for f in validator.validations
+        if f.h5_address.endswith("@target")
+    }
+    assert targets["found: @target=/entry/detector/counts"] == finding.OK
+    assert "partial HDF5 address not found in file: /entry/detector/missing" in targets
+
+
+def test_no_hdf5_calls(hfile):
+    write_links_file(hfile)
+    profiler = profiling.Profiler()
+    validator = validate.Data_File_Validator(profiler=profiler)
+    validator.validate(hfile)
+    validator.close()
+
+    timing = profiler.timing(profiling.KIND_RULE, "links")
+    assert timing.calls == 1
+    assert timing.findings == 7
+    assert timing.hdf5_calls == 0
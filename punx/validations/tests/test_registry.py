@@ -0,0 +1,103 @@
+import h5py
+import pytest
+
+from .. import registry
+from ... import finding
+from ... import validate
+from ...tests._core import hfile
+
+
+def write_file(hfile):
+    with h5py.File(hfile, "w") as root:
+        entry = root.create_group("entry")
+        entry.attrs["NX_class"] = "NXentry"
+        data = entry.create_group("data")
+        data.attrs["NX_class"] = "NXdata"
+        data.attrs["signal"] = "counts"
+        counts = data.create_dataset("counts", data=[1, 2, 3])
+        counts.attrs["units"] = "counts"
+        other = root.create_group("other")  # not NeXus
+        other.attrs["note"] = "not NeXus"
+
+
+@pytest.fixture(scope="function")
+def custom_rule():
+    seen = []
+
+    def verify(validator, v_item):
+        seen.append(v_item.h5_address)
+        validator.record_finding(v_item, "custom", finding.NOTE, "checked")
+
+    rule = registry.register(
+        registry.Rule("custom", verify, classpaths=["/NXentry/NXdata*"])
+    )
+    yield rule, seen
+    registry.unregister("custom")
+
+
+def test_builtin_rules():
+    names = [r.name for r in registry.get_rules()]
+    assert names[:2] == ["item_name", "attribute"]
+
+
+def test_dispatch(hfile):
+    write_file(hfile)
+    validator = validate.Data_File_Validator()
+    validator.validate(hfile)
+    dispatch = registry.DispatchTable()
+
+    def rules_for(addr):
+        return [r.name for r in dispatch.rules_for(validator.addresses[addr])]
+
+    assert rules_for("/") == ["links"]
+    assert rules_for("/entry") == ["item_name", "dimensions"]
+    assert rules_for("/entry/data@signal") == ["item_name", "attribute"]
+    assert rules_for("/entry/data/counts@units") == ["item_name", "attribute"]
+    assert rules_for("/other") == ["item_name"]  # not NeXus
+
+    # same kind and class path: same (cached) list of rules
+    v_item = validator.addresses["/entry/data"]
+    assert dispatch.rules_for(v_item) is dispatch.rules_for(v_item)
+    validator.close()
+
+
+def test_attribute_rule():
+    rule = registry.Rule("units", None, attributes=["units"])
+    assert rule.kinds == ("attribute",)
+    assert rule.applies_to("attribute", "/NXentry/NXdata/counts@units", "units")
+    assert not rule.applies_to("attribute", "/NXentry/NXdata@signal", "signal")
+    assert not rule.applies_to("group", "/NXentry/NXdata", "data")
+
+    with pytest.raises(ValueError):
+        registry.Rule("bad", None, kinds=["table"])
+
+
+def test_custom_rule(custom_rule, hfile):
+    rule, seen = custom_rule
+    write_file(hfile)
+    validator = validate.Data_File_Validator()
+    assert "custom" in validator.rules_key().split(",")
+    validator.validate(hfile)
+
+    assert sorted(seen) == [
+        "/entry/data",
+        "/entry/data/counts",
+        "/entry/data/counts@units",
+        "/entry/data@NX_class",
+        "/entry/data@signal",
+    ]
+    custom = [f for f in validator.validations if f.test_name == "custom"]
+    assert len(custom) == len(seen)
+    validator.close()
+
+
+def test_attribute_classpaths(hfile):
+    write_file(hfile)
+    validator = validate.Data_File_Validator()
+    validator.validate(hfile)
+    assert validator.attribute_classpaths["signal"] == ["/NXentry/NXdata@signal"]
+    assert validator.attribute_classpaths["units"] == [
+        "/NXentry/NXdata/counts@units"
+    ]
+    assert "note" not in validator.attribute_classpaths  # not NeXus content
+    validator.close()
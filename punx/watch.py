@@ -0,0 +1,357 @@
+# -----------------------------------------------------------------------------
+# :author:    Pete R. Jemian
+# :email:     prjemian@gmail.com
+# :copyright: (c) 2014-2023, Pete R. Jemian
+#
+# Distributed under the terms of the Creative Commons Attribution 4.0 International Public License.
+#
+# The full license is in the file LICENSE.txt, distributed with this software.
+# -----------------------------------------------------------------------------
+
+"""
+validate the HDF5 files written into a directory, as they land
+
+A :class:`DirectoryWatcher` finds the files that are new (or changed)
+in a directory tree: from inotify (Linux) or, if that is not
+available, by scanning the directory every ``POLL_INTERVAL`` seconds.
+A file is ready once it has not changed for ``SETTLE_TIME`` seconds
+(it is probably still being written before that).
+
+A :class:`Watcher` validates each ready file with the warm workers of a
+:class:`~punx.server.ValidationServer` and appends the findings
+(NDJSON, see :mod:`~punx.report_writers`) to a log.  At most
+``max_in_flight`` files are given to the workers at one time, the
+others wait (by name only) in a queue.
+
+.. autosummary::
+
+   ~Watcher
+   ~DirectoryWatcher
+   ~Inotify
+
+"""
+
+import collections
+import concurrent.futures
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+import h5py
+
+from . import utils
+
+POLL_INTERVAL = 2.0  # s, between scans of the directory (no inotify)
+SETTLE_TIME = 2.0  # s, a file is ready when not changed this long
+logger = utils.setup_logger(__name__)
+
+
+class Watcher(object):
+    """
+    validate the files written into directory *path*, append the findings
+
+    path str:
+        directory to watch (and its subdirectories)
+    server obj:
+        Instance of :class:`~punx.server.ValidationServer` (its workers)
+    log obj:
+        open (text) file to append the NDJSON findings, default: ``sys.stdout``
+    max_in_flight int:
+        most files given to the workers at one time,
+        default: twice the number of workers
+    options dict:
+        of each validation (such as ``statuses``),
+        see :func:`~punx.server.validate_file`
+
+    Other keywords are given to :class:`DirectoryWatcher`.
+    """
+
+    def __init__(
+        self, path, server, log=None, max_in_flight=None, options=None, **kwargs
+    ):
+        self.directory = DirectoryWatcher(path, **kwargs)
+        self.server = server
+        self.log = log or sys.stdout
+        self.max_in_flight = max_in_flight or 2 * server.workers
+        self.options = options or {}
+        self.queue = collections.deque()  # ready files, not yet validated
+        self.in_flight = {}  # file name, by future
+        self.validated = 0
+
+    def run(self, max_files=None, timeout=None):
+        """
+        Validate files as they are ready, until interrupted.
+
+        Stop after (at least) *max_files* are validated or after
+        *timeout* (s).  Validations already started are finished.
+        """
+        t_stop = None if timeout is None else time.time() + timeout
+        try:
+            while max_files is None or self.validated < max_files:
+                wait = self.directory.poll_interval
+                if len(self.in_flight) > 0:
+                    wait = min(wait, 0.1)  # soon: write the reports
+                if t_stop is not None:
+                    wait = min(wait, t_stop - time.time())
+                    if wait <= 0:
+                        break
+                if len(self.in_flight) >= self.max_in_flight:
+                    # all workers busy: wait for one, the new files wait
+                    self._collect(wait)
+                    wait = 0
+                self.directory.wait(wait)
+                self.queue.extend(self.directory.ready())
+                self._submit()
+                self._collect(0)
+            self._collect(None)
+        finally:
+            for future in self.in_flight:
+                future.cancel()
+
+    def close(self):
+        """Stop watching the directory."""
+        self.directory.close()
+
+    def _submit(self):
+        while len(self.queue) > 0 and len(self.in_flight) < self.max_in_flight:
+            fname = self.queue.popleft()
+            self.in_flight[self.server.submit(fname, **self.options)] = fname
+
+    def _collect(self, timeout):
+        """
+        Append the reports of the validations done (in *timeout* s).
+
+        *timeout* ``None``: wait for all of them.
+        """
+        if len(self.in_flight) == 0:
+            return
+        done, _pending = concurrent.futures.wait(
+            list(self.in_flight),
+            timeout=timeout,
+            return_when=(
+                concurrent.futures.ALL_COMPLETED
+                if timeout is None
+                else concurrent.futures.FIRST_COMPLETED
+            ),
+        )
+        for future in done:
+            self.log.write(future.result())
+            self.log.flush()
+            self.validated += 1
+            del self.in_flight[future]
+
+
+class DirectoryWatcher(object):
+    """
+    find the files in a directory tree that are new or changed
+
+    path str:
+        directory to watch (and its subdirectories)
+    settle float:
+        seconds a file must be unchanged before it is ready,
+        default: ``SETTLE_TIME``
+    poll_interval float:
+        seconds between scans of the directory (without inotify),
+        default: ``POLL_INTERVAL``
+    use_inotify bool:
+        use inotify, if available (Linux), default: ``True``
+    existing bool:
+        also report the files already in the directory, default: ``False``
+
+    USAGE::
+
+        watcher = DirectoryWatcher(path)
+        while True:
+            watcher.wait(1)
+            for fname in watcher.ready():
+                ...
+    """
+
+    def __init__(
+        self,
+        path,
+        settle=SETTLE_TIME,
+        poll_interval=POLL_INTERVAL,
+        use_inotify=True,
+        existing=False,
+    ):
+        self.path = os.path.abspath(path)
+        if not os.path.isdir(self.path):
+            raise NotADirectoryError(self.path)
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.known = {}  # (size, mtime) by file name, as reported (or at start)
+        self.pending = {}  # (size, mtime, time of last change) by file name
+        self.inotify = None
+        if use_inotify:
+            try:
+                self.inotify = Inotify()
+            except OSError as exc:
+                logger.info("no inotify (%s), scanning every %s s", exc, poll_interval)
+        self.mode = "polling" if self.inotify is None else "inotify"
+        self._watch_tree(self.path)
+        for fname, signature in self._scan():
+            if existing:
+                self.pending[fname] = signature + (time.time(),)
+            else:
+                self.known[fname] = signature
+        self._next_scan = time.time() + poll_interval
+
+    def wait(self, timeout):
+        """Wait (up to *timeout* s) for changes in the directory."""
+        if self.inotify is None:
+            time.sleep(max(0, min(timeout, self._next_scan - time.time())))
+            if time.time() >= self._next_scan:
+                self._next_scan = time.time() + self.poll_interval
+                for fname, signature in self._scan():
+                    self._changed(fname, signature)
+            return
+
+        for name, mask in self.inotify.read(timeout):
+            if mask & Inotify.IN_Q_OVERFLOW:
+                logger.warning("inotify queue overflow, scanning %s", self.path)
+                for fname, signature in self._scan():
+                    self._changed(fname, signature)
+            elif mask & Inotify.IN_ISDIR:
+                if mask & (Inotify.IN_CREATE | Inotify.IN_MOVED_TO):
+                    self._watch_tree(name)
+                    for fname, signature in self._scan(name):
+                        self._changed(fname, signature)
+            elif name is not None:
+                self._changed(name, _signature(name))
+
+    def ready(self):
+        """Return the files (HDF5) not changed for ``settle`` seconds."""
+        now = time.time()
+        found = []
+        for fname, (size, mtime, changed) in list(self.pending.items()):
+            if now - changed < self.settle:
+                continue
+            signature = _signature(fname)
+            if signature is None:
+                del self.pending[fname]  # removed
+            elif signature != (size, mtime):
+                self.pending[fname] = signature + (now,)  # still changing
+            else:
+                del self.pending[fname]
+                self.known[fname] = signature
+                if _is_hdf5(fname):
+                    found.append(fname)
+        return sorted(found)
+
+    def close(self):
+        """Stop watching."""
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
+
+    def _changed(self, fname, signature):
+        if signature is None:
+            self.pending.pop(fname, None)
+        elif fname in self.pending:
+            if signature != self.pending[fname][:2]:
+                self.pending[fname] = signature + (time.time(),)
+        elif signature != self.known.get(fname):
+            self.pending[fname] = signature + (time.time(),)
+
+    def _scan(self, top=None):
+        """yield (name, signature) of each file in the tree"""
+        for root, _dirs, files in os.walk(top or self.path):
+            for name in files:
+                fname = os.path.join(root, name)
+                signature = _signature(fname)
+                if signature is not None:
+                    yield fname, signature
+
+    def _watch_tree(self, top):
+        if self.inotify is not None:
+            for root, _dirs, _files in os.walk(top):
+                self.inotify.add_watch(root)
+
+
+class Inotify(object):
+    """
+    Linux inotify (from the C library), events of files in directories
+
+    Raises ``OSError`` if not available.
+    """
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_ISDIR = 0x40000000
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+    EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (of name)
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self.directories = {}  # directory, by watch descriptor
+
+    def add_watch(self, directory):
+        """Watch the files in *directory*."""
+        wd = self._libc.inotify_add_watch(
+            self.fd, os.fsencode(directory), ctypes.c_uint32(self.MASK)
+        )
+        if wd < 0:
+            logger.warning("cannot watch %s: %s", directory, os.strerror(ctypes.get_errno()))
+        else:
+            self.directories[wd] = directory
+
+    def read(self, timeout):
+        """Return the events ``(path, mask)`` of the next *timeout* (s)."""
+        readable, _w, _x = select.select([self.fd], [], [], max(0, timeout))
+        if len(readable) == 0:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = data[offset: offset + length].rstrip(b"\0")
+            offset += length
+            directory = self.directories.get(wd)
+            path = None
+            if directory is not None and len(name) > 0:
+                path = os.path.join(directory, os.fsdecode(name))
+            events.append((path, mask))
+        return events
+
+    def close(self):
+        """Stop all watches."""
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def _signature(fname):
+    """(size, mtime) of file *fname* (or ``None`` if not a file)"""
+    try:
+        st = os.stat(fname)
+    except OSError:
+        return None
+    if not os.path.isfile(fname):
+        return None
+    return (st.st_size, st.st_mtime_ns)
+
+
+def _is_hdf5(fname):
+    """Is *fname* an HDF5 file?  (reads only the file signature)"""
+    try:
+        return h5py.is_hdf5(fname)
+    except (IOError, OSError):
+        return False